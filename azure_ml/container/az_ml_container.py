@@ -1,7 +1,16 @@
+import os
+import time
+import base64
+import random
+import hashlib
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from azure.core.exceptions import ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 from azure.mgmt.storage import StorageManagementClient
-from azure.storage.blob import BlobServiceClient
+from azure.storage.blob import BlobBlock, BlobServiceClient, ContentSettings
+
+DEFAULT_BLOCK_SIZE = 8 * 1024 * 1024
 
 
 def get_storage_account_key(subscription_id, resource_group, storage_account_name):
@@ -23,18 +32,266 @@ def create_container(blob_service_client, container_name):
         print(f"Container creation failed or already exists: {e}")
 
 
-def upload_blob(blob_service_client, container_name, blob_name, file_path):
+def file_md5(file_path, chunk_size=DEFAULT_BLOCK_SIZE):
+    """
+    Compute the MD5 digest of a file, read in chunks.
+
+    Args:
+        file_path (str): Local file path.
+        chunk_size (int): Bytes read at a time.
+
+    Returns:
+        bytes: The 16-byte MD5 digest, as stored in a blob's Content-MD5.
+    """
+    digest = hashlib.md5()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def with_retries(operation, retries=5, backoff=1.0):
+    """
+    Call an operation, retrying failures with exponential backoff and jitter.
+
+    A missing resource is not retried. The CLI turns the SDK's own retries
+    off, so this is the only retry layer and the delays do not multiply.
+
+    Args:
+        operation (callable): The call to make.
+        retries (int): Retries after the first attempt.
+        backoff (float): Delay in seconds before the first retry, doubled each time.
+
+    Returns:
+        The operation's result.
+    """
+    for attempt in range(retries + 1):
+        try:
+            return operation()
+        except ResourceNotFoundError:
+            raise
+        except Exception as e:
+            if attempt == retries:
+                raise
+            delay = backoff * 2**attempt * random.uniform(0.5, 1.5)
+            print(f"Attempt {attempt + 1} failed ({e}); retrying in {delay:.1f}s.")
+            time.sleep(delay)
+
+
+def blob_is_unchanged(blob_client, md5):
+    """
+    Check whether a blob exists with the given Content-MD5.
+
+    Args:
+        blob_client (BlobClient): The blob.
+        md5 (bytes): MD5 digest of the local file.
+
+    Returns:
+        bool: True when the blob holds the same content.
+    """
+    try:
+        properties = blob_client.get_blob_properties()
+    except ResourceNotFoundError:
+        return False
+    stored = properties.content_settings.content_md5
+    return stored is not None and bytes(stored) == md5
+
+
+def block_id(md5, block_size, index):
+    """
+    Name a block after the file content, the block size and its position.
+
+    The same block of the same file always gets the same ID, so blocks staged
+    by an interrupted upload can be recognised and reused. IDs have a fixed
+    length, as the service requires within a blob.
+    """
+    name = hashlib.md5(f"{md5.hex()}:{block_size}:{index}".encode()).hexdigest()
+    return base64.b64encode(name.encode()).decode()
+
+
+def uncommitted_blocks(blob_client):
+    """
+    List the blocks staged on a blob but not committed yet.
+
+    Returns:
+        dict: Block size by block ID; empty when the blob does not exist.
+    """
+    try:
+        _, uncommitted = blob_client.get_block_list("uncommitted")
+    except ResourceNotFoundError:
+        return {}
+    return {block.id: block.size for block in uncommitted}
+
+
+def upload_blocks(
+    blob_client,
+    file_path,
+    md5,
+    block_size=DEFAULT_BLOCK_SIZE,
+    max_concurrency=4,
+    retries=5,
+    backoff=1.0,
+):
+    """
+    Upload a file as blocks staged in parallel, then commit them.
+
+    Blocks already staged by an interrupted upload of the same file are
+    not sent again. Every block is checked with a transactional MD5, and the
+    whole file's MD5 is stored as the blob's Content-MD5 on commit.
+
+    Args:
+        blob_client (BlobClient): The destination blob.
+        file_path (str): Local file path.
+        md5 (bytes): MD5 digest of the file.
+        block_size (int): Bytes per block.
+        max_concurrency (int): Blocks staged at the same time.
+        retries (int): Retries per block.
+        backoff (float): First retry delay in seconds.
+
+    Returns:
+        int: Number of blocks staged by this call.
+    """
+    size = os.path.getsize(file_path)
+    offsets = range(0, size, block_size)
+    ids = [block_id(md5, block_size, i) for i in range(len(offsets))]
+    staged = uncommitted_blocks(blob_client)
+
+    def stage(index):
+        offset = offsets[index]
+        length = min(block_size, size - offset)
+        if staged.get(ids[index]) == length:
+            return 0
+        with open(file_path, "rb") as f:
+            f.seek(offset)
+            data = f.read(length)
+        with_retries(
+            lambda: blob_client.stage_block(
+                ids[index], data, length=length, validate_content=True
+            ),
+            retries,
+            backoff,
+        )
+        return 1
+
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        sent = sum(pool.map(stage, range(len(offsets))))
+    if len(offsets) - sent:
+        print(f"Reused {len(offsets) - sent} blocks staged by an earlier upload.")
+
+    with_retries(
+        lambda: blob_client.commit_block_list(
+            [BlobBlock(block_id=i) for i in ids],
+            content_settings=ContentSettings(content_md5=bytearray(md5)),
+        ),
+        retries,
+        backoff,
+    )
+    return sent
+
+
+def upload_blob(
+    blob_service_client,
+    container_name,
+    blob_name,
+    file_path,
+    block_size=DEFAULT_BLOCK_SIZE,
+    max_concurrency=4,
+    retries=5,
+    backoff=1.0,
+    force=False,
+):
+    """
+    Upload a file unless the blob already holds the same content.
+
+    Files larger than one block are uploaded as parallel blocks, others in
+    a single request.
+
+    Returns:
+        str: "skipped", "uploaded" or "failed".
+    """
     try:
         blob_client = blob_service_client.get_blob_client(
             container=container_name, blob=blob_name
         )
-        with open(file_path, "rb") as data:
-            blob_client.upload_blob(data, overwrite=True)
+        md5 = file_md5(file_path)
+        if not force and blob_is_unchanged(blob_client, md5):
+            print(f"Blob '{blob_name}' is up to date; skipping '{file_path}'.")
+            return "skipped"
+
+        start = time.perf_counter()
+        size = os.path.getsize(file_path)
+        if size > block_size:
+            blocks = upload_blocks(
+                blob_client,
+                file_path,
+                md5,
+                block_size=block_size,
+                max_concurrency=max_concurrency,
+                retries=retries,
+                backoff=backoff,
+            )
+            detail = f" in blocks ({blocks} sent)"
+        else:
+
+            def upload():
+                with open(file_path, "rb") as data:
+                    blob_client.upload_blob(
+                        data,
+                        overwrite=True,
+                        content_settings=ContentSettings(content_md5=bytearray(md5)),
+                    )
+
+            with_retries(upload, retries, backoff)
+            detail = ""
+        elapsed = time.perf_counter() - start
         print(
-            f"File '{file_path}' uploaded to blob '{blob_name}' in container '{container_name}'."
+            f"File '{file_path}' uploaded to blob '{blob_name}' in container '{container_name}'"
+            f"{detail} ({size / 1024 ** 2:.1f} MB in {elapsed:.2f}s)."
         )
+        return "uploaded"
     except Exception as e:
         print(f"Blob upload failed: {e}")
+        return "failed"
+
+
+def upload_path(blob_service_client, container_name, blob_name, path, **options):
+    """
+    Upload a file, or every file under a directory with ``blob_name`` as the prefix.
+
+    Args:
+        blob_service_client (BlobServiceClient): The storage account client.
+        container_name (str): Destination container.
+        blob_name (str): Blob name, or the prefix for a directory.
+        path (str): Local file or directory.
+        **options: Passed to ``upload_blob``.
+
+    Returns:
+        dict: Number of files per outcome.
+    """
+    if os.path.isdir(path):
+        files = [
+            (os.path.join(root, name), os.path.relpath(os.path.join(root, name), path))
+            for root, _, names in os.walk(path)
+            for name in sorted(names)
+        ]
+        targets = [
+            (local, f"{blob_name.rstrip('/')}/{relative.replace(os.sep, '/')}")
+            for local, relative in files
+        ]
+    else:
+        targets = [(path, blob_name)]
+
+    outcomes = {"uploaded": 0, "skipped": 0, "failed": 0}
+    for local, name in targets:
+        outcome = upload_blob(
+            blob_service_client, container_name, name, local, **options
+        )
+        outcomes[outcome] += 1
+    print(
+        f"{outcomes['uploaded']} uploaded, {outcomes['skipped']} unchanged, "
+        f"{outcomes['failed']} failed."
+    )
+    return outcomes
 
 
 def main():
@@ -58,32 +315,69 @@ def main():
         "--container_name", default="containerpy01", help="Container Name"
     )
     parser.add_argument(
-        "--file_path", default="./data/Date_Fruit_Datasets.csv", help="Local File Path"
+        "--file_path",
+        default="./data/Date_Fruit_Datasets.csv",
+        help="Local file path, or a directory uploaded under the blob name as prefix",
     )
     parser.add_argument(
         "--blob_name", default="Date_Fruit_Datasets.csv", help="Blob Name"
     )
+    parser.add_argument(
+        "--connection_string",
+        default=os.getenv("AZURE_STORAGE_CONNECTION_STRING"),
+        help="Storage connection string, e.g. an Azurite emulator's (skips the key lookup)",
+    )
+    parser.add_argument(
+        "--block_size_mb",
+        type=float,
+        default=DEFAULT_BLOCK_SIZE / 1024**2,
+        help="Block size of files uploaded in blocks",
+    )
+    parser.add_argument(
+        "--max_concurrency", type=int, default=4, help="Blocks uploaded in parallel"
+    )
+    parser.add_argument(
+        "--retries", type=int, default=5, help="Retries per block or request"
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Upload even when the blob is unchanged"
+    )
 
     args = parser.parse_args()
 
-    # Get storage account key
-    storage_account_key = get_storage_account_key(
-        args.subscription_id, args.resource_group, args.storage_account
-    )
+    if args.connection_string:
+        blob_service_client = BlobServiceClient.from_connection_string(
+            args.connection_string, retry_total=0
+        )
+    else:
+        # Get storage account key
+        storage_account_key = get_storage_account_key(
+            args.subscription_id, args.resource_group, args.storage_account
+        )
 
-    # Initialize BlobServiceClient
-    blob_service_client = BlobServiceClient(
-        account_url=f"https://{args.storage_account}.blob.core.windows.net",
-        credential=storage_account_key,
-    )
+        # Initialize BlobServiceClient
+        blob_service_client = BlobServiceClient(
+            account_url=f"https://{args.storage_account}.blob.core.windows.net",
+            credential=storage_account_key,
+            retry_total=0,
+        )
 
     # Create container
     create_container(blob_service_client, args.container_name)
 
-    # Upload file to container
-    upload_blob(
-        blob_service_client, args.container_name, args.blob_name, args.file_path
+    # Upload files that changed to the container
+    outcomes = upload_path(
+        blob_service_client,
+        args.container_name,
+        args.blob_name,
+        args.file_path,
+        block_size=int(args.block_size_mb * 1024**2),
+        max_concurrency=args.max_concurrency,
+        retries=args.retries,
+        force=args.force,
     )
+    if outcomes["failed"]:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
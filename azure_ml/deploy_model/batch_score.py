@@ -0,0 +1,267 @@
+import os
+import json
+import time
+import glob
+import logging
+import argparse
+import multiprocessing
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import score
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Per-process state of pool workers, filled once by the pool initializer
+WORKER_STATE: Dict = {}
+
+MANIFEST_FILE = "_manifest.json"
+SUCCESS_FILE = "_SUCCESS"
+
+
+def _init_worker(model_path: str, threads: int):
+    # Set before load_model imports lightgbm, so workers do not oversubscribe cores
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    WORKER_STATE["model"] = score.load_model(model_path)
+    WORKER_STATE["labels"] = np.asarray(score.load_labels(model_path), dtype=object)
+
+
+def _feature_names() -> List[str]:
+    return WORKER_STATE["model"].feature_name()
+
+
+def _score_shard(
+    shard: int, features: np.ndarray, passthrough: Dict, part_path: str
+) -> Tuple[int, int]:
+    probabilities, predicted_classes = score.classify(
+        WORKER_STATE["model"].predict(features)
+    )
+    labels = WORKER_STATE["labels"]
+
+    columns = dict(passthrough)
+    columns["prediction"] = pa.array(labels.take(predicted_classes).tolist())
+    for i, label in enumerate(labels):
+        columns[f"proba_{label}"] = pa.array(probabilities[:, i])
+
+    # A part file only appears once complete, so resuming can trust it
+    tmp_path = f"{part_path}.tmp"
+    pq.write_table(pa.table(columns), tmp_path)
+    os.replace(tmp_path, part_path)
+    return shard, len(features)
+
+
+class BatchScorer:
+    """
+    A class to score a large CSV or Parquet file offline with worker processes.
+
+    The input is read in chunks of ``chunk_size`` rows. Each chunk is a shard,
+    scored by a spawned worker that loaded the model once through
+    ``score.load_model``, and written to ``part-<shard>.parquet`` with the
+    predicted label and one ``proba_<label>`` column per class. At most
+    ``max_pending`` shards are in flight, which bounds memory. A rerun on the
+    same input skips the shards whose part files exist.
+    """
+
+    def __init__(
+        self,
+        model_path: str,
+        output_dir: str,
+        chunk_size: int = 100000,
+        n_workers: Optional[int] = None,
+        keep_columns: Optional[List[str]] = None,
+        max_pending: Optional[int] = None,
+    ):
+        self.model_path = model_path
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.keep_columns = keep_columns or []
+        self.max_pending = max_pending or 2 * self.n_workers
+
+    def _part_path(self, shard: int) -> str:
+        return os.path.join(self.output_dir, f"part-{shard:05d}.parquet")
+
+    def _iter_chunks(
+        self, input_path: str, feature_names: List[str]
+    ) -> Iterator[Tuple[np.ndarray, Dict]]:
+        """
+        Yield (features, passthrough columns) per chunk of the input file.
+        """
+        columns = feature_names + [
+            c for c in self.keep_columns if c not in feature_names
+        ]
+        if input_path.endswith((".parquet", ".pq")):
+            parquet = pq.ParquetFile(input_path)
+            for batch in parquet.iter_batches(
+                batch_size=self.chunk_size, columns=columns
+            ):
+                features = np.empty((batch.num_rows, len(feature_names)), np.float32)
+                for i, name in enumerate(feature_names):
+                    features[:, i] = batch.column(name).to_numpy(False)
+                yield features, {c: batch.column(c) for c in self.keep_columns}
+        else:
+            reader = pd.read_csv(
+                input_path,
+                usecols=columns,
+                chunksize=self.chunk_size,
+                dtype={name: np.float32 for name in feature_names},
+            )
+            for chunk in reader:
+                yield chunk[feature_names].to_numpy(np.float32), {
+                    c: pa.array(chunk[c]) for c in self.keep_columns
+                }
+
+    def _prepare_output(self, input_path: str, overwrite: bool) -> set:
+        """
+        Check the output directory against the input and return the completed shards.
+        """
+        stat = os.stat(input_path)
+        manifest = {
+            "input_path": os.path.abspath(input_path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunk_size": self.chunk_size,
+            "model_path": os.path.abspath(self.model_path),
+        }
+        os.makedirs(self.output_dir, exist_ok=True)
+        manifest_path = os.path.join(self.output_dir, MANIFEST_FILE)
+
+        if os.path.exists(manifest_path) and not overwrite:
+            with open(manifest_path) as f:
+                if json.load(f) != manifest:
+                    raise ValueError(
+                        f"{self.output_dir} holds results for another input, chunk "
+                        f"size or model; pass overwrite to start over"
+                    )
+        else:
+            for path in glob.glob(os.path.join(self.output_dir, "part-*")):
+                os.remove(path)
+            with open(manifest_path, "w") as f:
+                json.dump(manifest, f)
+
+        for path in glob.glob(os.path.join(self.output_dir, "*.tmp")):
+            os.remove(path)
+        success_path = os.path.join(self.output_dir, SUCCESS_FILE)
+        if os.path.exists(success_path):
+            os.remove(success_path)
+        return {
+            int(os.path.basename(path)[len("part-") : -len(".parquet")])
+            for path in glob.glob(os.path.join(self.output_dir, "part-*.parquet"))
+        }
+
+    def run(self, input_path: str, overwrite: bool = False) -> Dict:
+        """
+        Score every row of the input file.
+
+        Args:
+            input_path (str): CSV or Parquet file holding the model features.
+            overwrite (bool): Discard the results of a previous run instead of resuming.
+
+        Returns:
+            Dict: Shards and rows scored in this run, shards skipped and seconds taken.
+        """
+        try:
+            start = time.perf_counter()
+            completed = self._prepare_output(input_path, overwrite)
+            if completed:
+                logging.info(f"Resuming: {len(completed)} shards already written")
+
+            threads = max(1, (os.cpu_count() or 1) // self.n_workers)
+            summary = {"shards": 0, "rows": 0, "skipped_shards": 0}
+            with ProcessPoolExecutor(
+                max_workers=self.n_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_path, threads),
+            ) as pool:
+                feature_names = pool.submit(_feature_names).result()
+                pending = set()
+                for shard, (features, passthrough) in enumerate(
+                    self._iter_chunks(input_path, feature_names)
+                ):
+                    if shard in completed:
+                        summary["skipped_shards"] += 1
+                        continue
+                    if len(pending) >= self.max_pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        self._collect(done, summary)
+                    pending.add(
+                        pool.submit(
+                            _score_shard,
+                            shard,
+                            features,
+                            passthrough,
+                            self._part_path(shard),
+                        )
+                    )
+                self._collect(wait(pending).done, summary)
+
+            summary["seconds"] = time.perf_counter() - start
+            with open(os.path.join(self.output_dir, SUCCESS_FILE), "w") as f:
+                json.dump(summary, f)
+            logging.info(
+                f"Scored {summary['rows']} rows in {summary['shards']} shards "
+                f"({summary['skipped_shards']} resumed) in {summary['seconds']:.1f}s"
+            )
+            return summary
+        except Exception as e:
+            logging.error(f"Error in batch scoring: {e}")
+            raise
+
+    @staticmethod
+    def _collect(done, summary: Dict):
+        for future in done:
+            shard, rows = future.result()
+            summary["shards"] += 1
+            summary["rows"] += rows
+            logging.info(f"Shard {shard} written ({rows} rows)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("batch_score")
+    parser.add_argument(
+        "--input_data", type=str, required=True, help="CSV or Parquet file to score"
+    )
+    parser.add_argument(
+        "--output_dir",
+        type=str,
+        required=True,
+        help="Directory for the Parquet part files",
+    )
+    parser.add_argument(
+        "--model_path",
+        type=str,
+        default=os.path.join(os.getenv("AZUREML_MODEL_DIR", "."), "outputs"),
+        help="Directory holding the model files, as loaded by score.py",
+    )
+    parser.add_argument("--chunk_size", type=int, default=100000, help="Rows per shard")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (all cores)"
+    )
+    parser.add_argument(
+        "--keep_columns",
+        type=str,
+        default=None,
+        help="Comma-separated input columns copied to the output, e.g. an id",
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Discard previous results instead of resuming",
+    )
+    args = parser.parse_args()
+
+    BatchScorer(
+        model_path=args.model_path,
+        output_dir=args.output_dir,
+        chunk_size=args.chunk_size,
+        n_workers=args.workers,
+        keep_columns=args.keep_columns.split(",") if args.keep_columns else None,
+    ).run(args.input_data, overwrite=args.overwrite)
@@ -0,0 +1,172 @@
+import time
+import queue
+import logging
+import threading
+import numpy as np
+from concurrent.futures import Future
+from typing import Callable, Dict
+
+
+class MicroBatcher:
+    """
+    A class to merge concurrent predict calls into one model call.
+
+    Callers submit feature matrices from any thread. A single worker thread
+    takes the first queued request, keeps collecting while the next request
+    fits in ``max_batch_size`` rows and ``max_wait_ms`` has not passed, runs
+    one predict on the stacked rows and hands every caller its slice of the
+    result. A request that does not fit opens the next batch. A request that
+    arrives while nothing else is in flight is predicted in the caller's
+    thread, and a batch is flushed at once when no other request is waiting,
+    so serial traffic pays neither the wait nor the thread handoff.
+    """
+
+    def __init__(
+        self,
+        predict_fn: Callable[[np.ndarray], np.ndarray],
+        max_batch_size: int = 256,
+        max_wait_ms: float = 2.0,
+        max_queue_size: int = 10000,
+    ):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._inline = 0
+        self._stats = {"requests": 0, "rows": 0, "batches": 0, "wait_seconds": 0.0}
+        self._closed = False
+        # A request that did not fit in the previous batch; only the worker uses it
+        self._carry = None
+        self._worker = threading.Thread(
+            target=self._loop, name="micro-batcher", daemon=True
+        )
+        self._worker.start()
+
+    def submit(self, matrix: np.ndarray) -> Future:
+        """
+        Queue a feature matrix for prediction.
+
+        Args:
+            matrix (np.ndarray): (n, features) float32 rows.
+
+        Returns:
+            Future: Resolves to the (n, ...) predictions of these rows.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        future = Future()
+        with self._lock:
+            self._in_flight += 1
+        self._queue.put((matrix, future, time.perf_counter()))
+        return future
+
+    def predict(self, matrix: np.ndarray) -> np.ndarray:
+        """
+        Predict through the batcher, blocking until this request's rows are scored.
+        """
+        if self._closed:
+            raise RuntimeError("MicroBatcher is closed")
+        with self._lock:
+            idle = self._in_flight == 0 and self._inline == 0
+            if idle:
+                self._inline += 1
+        if not idle:
+            return self.submit(matrix).result()
+
+        try:
+            return self.predict_fn(matrix)
+        finally:
+            with self._lock:
+                self._inline -= 1
+                self._stats["requests"] += 1
+                self._stats["rows"] += len(matrix)
+                self._stats["batches"] += 1
+
+    def _collect(self):
+        first, self._carry = self._carry or self._queue.get(), None
+        batch = [first]
+        if first is None:
+            return None
+        rows = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+
+        while rows < self.max_batch_size:
+            with self._lock:
+                others_waiting = self._in_flight > len(batch)
+            if not others_waiting:
+                break
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is None:
+                self._queue.put(None)
+                break
+            if rows + len(item[0]) > self.max_batch_size:
+                self._carry = item
+                break
+            batch.append(item)
+            rows += len(item[0])
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            if batch is None:
+                return
+
+            matrices = [item[0] for item in batch]
+            offsets = np.cumsum([0] + [len(m) for m in matrices])
+            now = time.perf_counter()
+            try:
+                stacked = matrices[0] if len(matrices) == 1 else np.vstack(matrices)
+                predictions = self.predict_fn(stacked)
+                for i, (_, future, _) in enumerate(batch):
+                    future.set_result(predictions[offsets[i] : offsets[i + 1]])
+            except Exception as e:
+                logging.error(f"Micro-batch prediction failed: {e}")
+                for _, future, _ in batch:
+                    future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._in_flight -= len(batch)
+                    self._stats["requests"] += len(batch)
+                    self._stats["rows"] += int(offsets[-1])
+                    self._stats["batches"] += 1
+                    self._stats["wait_seconds"] += sum(now - t for _, _, t in batch)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Report queue depth and batching statistics.
+
+        Returns:
+            Dict[str, float]: Queue depth, in-flight requests, totals and averages.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            in_flight = self._in_flight
+        batches = max(stats["batches"], 1)
+        requests = max(stats["requests"], 1)
+        return {
+            "queue_depth": self._queue.qsize(),
+            "in_flight": in_flight,
+            "requests": stats["requests"],
+            "rows": stats["rows"],
+            "batches": stats["batches"],
+            "avg_batch_requests": stats["requests"] / batches,
+            "avg_batch_rows": stats["rows"] / batches,
+            "avg_queue_wait_ms": 1000.0 * stats["wait_seconds"] / requests,
+        }
+
+    def close(self):
+        """
+        Stop the worker thread after the queued requests are served.
+        """
+        self._closed = True
+        self._queue.put(None)
+        self._worker.join()
@@ -0,0 +1,332 @@
+import os
+import json
+import random
+import logging
+import threading
+import contextlib
+import numpy as np
+from typing import Callable, Dict, Iterator, List, Optional
+
+# Request header selecting a model version, echoed on the response
+VERSION_HEADER = "x-model-version"
+# Optional {"<version>": weight} file in the registry directory
+TRAFFIC_FILE = "traffic.json"
+# A version directory is complete once its labels are written
+LABELS_FILE = "unique_labels.json"
+
+
+class ModelVersion:
+    """
+    A class to hold one loaded model version with its labels, micro-batcher and cache.
+
+    Requests take a lease while they use the version. A retired version keeps
+    serving its leases and closes its batcher once the last one ends, so a
+    hot swap never fails a request that was already routed to it.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        model_path: str,
+        model,
+        unique_labels: List,
+        batcher=None,
+        cache=None,
+    ):
+        self.version = version
+        self.model_path = model_path
+        self.model = model
+        self.unique_labels = unique_labels
+        self.label_array = np.asarray(unique_labels, dtype=object)
+        # Feature order the model was trained with, used to lay out request rows
+        self.feature_names = (
+            model.feature_name() if hasattr(model, "feature_name") else None
+        )
+        self.batcher = batcher
+        self.cache = cache
+        self._leases = 0
+        self._retired = False
+        self._lock = threading.Lock()
+
+    def predict(self, input_matrix) -> np.ndarray:
+        """
+        Predict the rows missing from the cache and merge them with the cached ones.
+        """
+        predict = (
+            self.batcher.predict if self.batcher is not None else self.model.predict
+        )
+        if self.cache is None or not isinstance(input_matrix, np.ndarray):
+            return predict(input_matrix)
+
+        keys = self.cache.keys(input_matrix)
+        hits, misses = self.cache.get_many(keys)
+        if not hits:
+            probabilities = predict(input_matrix)
+            self.cache.put_many(keys, probabilities)
+            return probabilities
+
+        rows = [None] * len(keys)
+        for i, row in hits.items():
+            rows[i] = row
+        if misses:
+            fresh = predict(input_matrix[misses])
+            self.cache.put_many([keys[i] for i in misses], fresh)
+            for i, row in zip(misses, fresh):
+                rows[i] = row
+        return np.stack(rows)
+
+    def _acquire(self):
+        with self._lock:
+            self._leases += 1
+
+    def _release(self):
+        with self._lock:
+            self._leases -= 1
+            finished = self._retired and self._leases == 0
+        if finished:
+            self._close()
+
+    def retire(self):
+        """
+        Stop routing to this version; resources are freed once in-flight requests end.
+        """
+        with self._lock:
+            self._retired = True
+            finished = self._leases == 0
+        if finished:
+            self._close()
+
+    def _close(self):
+        if self.batcher is not None:
+            self.batcher.close()
+        logging.info(f"Model version {self.version} unloaded")
+
+    def metrics(self) -> Dict:
+        """
+        Report the in-flight requests, batching and cache metrics of this version.
+
+        Returns:
+            Dict: Model path, leases and the batcher and cache metrics.
+        """
+        return {
+            "model_path": self.model_path,
+            "in_flight": self._leases,
+            "batching": self.batcher.metrics() if self.batcher is not None else {},
+            "cache": self.cache.metrics() if self.cache is not None else {},
+        }
+
+
+class ModelRegistry:
+    """
+    A class to hold several model versions and route requests between them.
+
+    A request names its version (see ``VERSION_HEADER``) or is routed by the
+    weighted traffic split; without a split, by the version loaded last.
+    Versions are loaded outside the lock and published by swapping in a new
+    mapping, so routing never waits on a load and a replaced version drains
+    its in-flight requests before it is closed.
+
+    ``sync`` mirrors a directory holding one subdirectory per version, each
+    laid out like the ``outputs`` model directory, plus an optional
+    ``traffic.json``. Compiled models are memory-mapped read-only, so every
+    process syncing the same directory shares one copy of the tree arrays in
+    the page cache.
+    """
+
+    def __init__(self, load_fn: Callable[[str, str], ModelVersion]):
+        self.load_fn = load_fn
+        self._versions: Dict[str, ModelVersion] = {}
+        self._traffic: Dict[str, float] = {}
+        self._latest: Optional[str] = None
+        self._signatures: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+        self._sync_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher = None
+
+    def load(self, version: str, model_path: str) -> ModelVersion:
+        """
+        Load a model version, replacing any loaded version of the same name.
+
+        Args:
+            version (str): Version name requests are routed by.
+            model_path (str): Directory holding the model files.
+
+        Returns:
+            ModelVersion: The loaded version.
+        """
+        entry = self.load_fn(version, model_path)
+        with self._lock:
+            previous = self._versions.get(version)
+            versions = {k: v for k, v in self._versions.items() if k != version}
+            versions[version] = entry
+            self._versions = versions
+            self._latest = version
+        if previous is not None:
+            previous.retire()
+        logging.info(f"Model version {version} loaded from {model_path}")
+        return entry
+
+    def unload(self, version: str):
+        """
+        Stop routing to a version and free it once its in-flight requests end.
+        """
+        with self._lock:
+            previous = self._versions.get(version)
+            if previous is None:
+                return
+            self._versions = {k: v for k, v in self._versions.items() if k != version}
+            if self._latest == version:
+                self._latest = next(reversed(self._versions), None)
+        previous.retire()
+
+    def set_traffic(self, traffic: Dict[str, float]):
+        """
+        Split unversioned requests between versions by weight, e.g. ``{"v1": 90, "v2": 10}``.
+        """
+        if any(weight < 0 for weight in traffic.values()):
+            raise ValueError(f"Traffic weights must not be negative: {traffic}")
+        with self._lock:
+            self._traffic = dict(traffic)
+        logging.info(f"Traffic split set to {traffic}")
+
+    def versions(self) -> List[str]:
+        """
+        Names of the loaded versions, in load order.
+        """
+        return list(self._versions)
+
+    def get(self, version: Optional[str] = None) -> ModelVersion:
+        """
+        Look up a version, by default the one loaded last, without routing a request to it.
+        """
+        versions = self._versions
+        version = version or self._latest
+        if version not in versions:
+            raise ValueError(
+                f"Unknown model version {version!r}; loaded: {list(versions)}"
+            )
+        return versions[version]
+
+    def _route(self, version: Optional[str]) -> ModelVersion:
+        if not self._versions:
+            raise RuntimeError("No model version is loaded")
+        if version:
+            return self.get(version)
+        weighted = [
+            (name, weight)
+            for name, weight in self._traffic.items()
+            if name in self._versions and weight > 0
+        ]
+        if not weighted:
+            return self._versions[self._latest]
+        names, weights = zip(*weighted)
+        return self._versions[random.choices(names, weights)[0]]
+
+    @contextlib.contextmanager
+    def use(self, version: Optional[str] = None) -> Iterator[ModelVersion]:
+        """
+        Route a request and hold the chosen version until the request is done.
+
+        Args:
+            version (Optional[str]): Requested version; routed by traffic when empty.
+
+        Yields:
+            ModelVersion: The version serving the request.
+        """
+        with self._lock:
+            entry = self._route(version)
+            entry._acquire()
+        try:
+            yield entry
+        finally:
+            entry._release()
+
+    def sync(self, root: str):
+        """
+        Load new or replaced version directories under root, unload removed ones
+        and apply ``traffic.json``.
+
+        Publish a version by writing it next to the root and renaming it in,
+        so a half-written directory is never loaded. A version that fails to
+        load is logged and skipped, and the versions already loaded keep serving.
+        """
+        with self._sync_lock:
+            found = {}
+            for name in os.listdir(root):
+                path = os.path.join(root, name)
+                if name.startswith((".", "_")) or name.endswith(".tmp"):
+                    continue
+                if not os.path.isfile(os.path.join(path, LABELS_FILE)):
+                    continue
+                stat = os.stat(path)
+                found[name] = (path, (stat.st_ino, stat.st_mtime_ns))
+
+            # Oldest first, so the newest directory ends up as the default version
+            for name, (path, signature) in sorted(
+                found.items(), key=lambda item: item[1][1][1]
+            ):
+                if self._signatures.get(name) == signature:
+                    continue
+                try:
+                    self.load(name, path)
+                    self._signatures[name] = signature
+                except Exception as e:
+                    logging.error(f"Error loading model version {name}: {e}")
+
+            for name in [name for name in self._signatures if name not in found]:
+                self.unload(name)
+                del self._signatures[name]
+
+            traffic_path = os.path.join(root, TRAFFIC_FILE)
+            if os.path.isfile(traffic_path):
+                with open(traffic_path) as f:
+                    traffic = json.load(f)
+                if traffic != self._traffic:
+                    self.set_traffic(traffic)
+            elif self._traffic:
+                self.set_traffic({})
+
+    def watch(self, root: str, interval: float = 30.0):
+        """
+        Sync the registry directory every ``interval`` seconds in a background thread.
+        """
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.sync(root)
+                except Exception as e:
+                    logging.error(f"Error syncing model registry: {e}")
+
+        self._watcher = threading.Thread(
+            target=loop, name="model-registry", daemon=True
+        )
+        self._watcher.start()
+
+    def metrics(self) -> Dict:
+        """
+        Report the default version, traffic split and per-version metrics.
+
+        Returns:
+            Dict: Default version, traffic weights and metrics by version.
+        """
+        return {
+            "default": self._latest,
+            "traffic": dict(self._traffic),
+            "versions": {
+                name: entry.metrics() for name, entry in self._versions.items()
+            },
+        }
+
+    def close(self):
+        """
+        Stop watching and retire every version.
+        """
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+        with self._lock:
+            versions, self._versions = self._versions, {}
+        for entry in versions.values():
+            entry.retire()
@@ -0,0 +1,139 @@
+import time
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List, Sequence, Tuple
+
+# Rough per-entry cost of the key, the dict slot and the row array object
+ENTRY_OVERHEAD_BYTES = 200
+
+
+class PredictionCache:
+    """
+    A class to cache per-row predictions keyed on the feature values and model version.
+
+    Rows are canonicalized to float32 with a single zero and a single NaN bit
+    pattern, then hashed with the model version, so equal feature vectors
+    share one entry and a new model never sees the old model's results.
+    Entries are evicted least recently used first, once their TTL expires, or
+    when the entry or memory cap is reached. Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        model_version: str,
+        max_entries: int = 100000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl_seconds: float = 300.0,
+    ):
+        self.model_version = model_version
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._hasher = hashlib.blake2b(model_version.encode(), digest_size=16)
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    def keys(self, matrix: np.ndarray) -> List[bytes]:
+        """
+        Hash every row of a feature matrix.
+
+        Args:
+            matrix (np.ndarray): (n, features) feature matrix.
+
+        Returns:
+            List[bytes]: One key per row.
+        """
+        canonical = np.ascontiguousarray(matrix, dtype=np.float32) + np.float32(0)
+        canonical[np.isnan(canonical)] = np.nan
+        keys = []
+        for row in canonical:
+            hasher = self._hasher.copy()
+            hasher.update(row.data)
+            keys.append(hasher.digest())
+        return keys
+
+    def get_many(
+        self, keys: Sequence[bytes]
+    ) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """
+        Look up a batch of keys.
+
+        Args:
+            keys (Sequence[bytes]): Row keys from ``keys``.
+
+        Returns:
+            Tuple[Dict[int, np.ndarray], List[int]]: Cached predictions by row
+            position, and the positions that must be predicted.
+        """
+        hits, misses = {}, []
+        now = time.monotonic()
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] < now:
+                    self._remove(key)
+                    self._stats["expirations"] += 1
+                    entry = None
+                if entry is None:
+                    misses.append(i)
+                else:
+                    self._entries.move_to_end(key)
+                    hits[i] = entry[1]
+            self._stats["hits"] += len(hits)
+            self._stats["misses"] += len(misses)
+        return hits, misses
+
+    def put_many(self, keys: Sequence[bytes], predictions: np.ndarray):
+        """
+        Store the predictions of a batch of rows.
+
+        Args:
+            keys (Sequence[bytes]): Row keys from ``keys``.
+            predictions (np.ndarray): (n,) or (n, k) predictions in the same row order.
+        """
+        expires = time.monotonic() + self.ttl_seconds
+        with self._lock:
+            for key, row in zip(keys, predictions):
+                if key in self._entries:
+                    self._remove(key)
+                # Copy, so an entry does not keep the whole batch alive
+                row = np.array(row)
+                self._entries[key] = (expires, row)
+                self._bytes += row.nbytes + ENTRY_OVERHEAD_BYTES
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def _remove(self, key: bytes):
+        _, row = self._entries.pop(key)
+        self._bytes -= row.nbytes + ENTRY_OVERHEAD_BYTES
+
+    def clear(self):
+        """
+        Drop every entry and reset the counters, e.g. after a model reload or warm-up.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._stats = dict.fromkeys(self._stats, 0)
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Report hit/miss counters and the cache size.
+
+        Returns:
+            Dict[str, float]: Counters, hit rate, entries and approximate bytes.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,185 @@
+import json
+import struct
+import numpy as np
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+JSON_CONTENT_TYPE = "application/json"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+FLOAT32_CONTENT_TYPE = "application/x-float32"
+
+# Formats a response can be encoded in, chosen from the request
+ROWS, COLUMNAR, ARROW, FLOAT32 = "rows", "columnar", "arrow", "float32"
+
+# Raw float32 framing: <uint32 little-endian header length><JSON header><payload>
+_HEADER_LENGTH = struct.Struct("<I")
+
+
+def _media_type(content_type: str) -> str:
+    return (content_type or JSON_CONTENT_TYPE).split(";")[0].strip().lower()
+
+
+def _require_feature_names(feature_names: Optional[List[str]], request_format: str):
+    """
+    Named-column formats are matched to the model by feature name.
+    """
+    if feature_names is None:
+        raise ValueError(
+            f"{request_format} requests need a model that records its feature names; "
+            "send row JSON instead"
+        )
+
+
+def _reorder(matrix: np.ndarray, columns: Sequence[str], feature_names: List[str]):
+    """
+    Lay out request columns in model feature order, copying only when they differ.
+    """
+    columns = list(columns)
+    if len(columns) != matrix.shape[1]:
+        raise ValueError(
+            f"{len(columns)} columns given for {matrix.shape[1]} values per row"
+        )
+    if columns == feature_names:
+        return matrix
+    missing = [name for name in feature_names if name not in columns]
+    if missing:
+        raise ValueError(f"Missing features: {missing}")
+    return matrix[:, [columns.index(name) for name in feature_names]]
+
+
+def decode_request(
+    body: Union[bytes, str],
+    content_type: str,
+    feature_names: Optional[List[str]],
+    rows_to_matrix: Callable,
+) -> Tuple[str, np.ndarray]:
+    """
+    Decode a request body into the predict matrix.
+
+    JSON bodies hold either ``{"data": [{feature: value}, ...]}`` rows, decoded by
+    ``rows_to_matrix``, or ``{"columns": [...], "values": [[...], ...]}``. Arrow
+    IPC streams hold one column per feature. Raw float32 bodies hold a
+    length-prefixed JSON header ``{"columns": [...], "shape": [n, f]}``
+    followed by the row-major little-endian matrix, which is used in place.
+
+    Args:
+        body (Union[bytes, str]): The request body.
+        content_type (str): The request Content-Type; JSON when empty.
+        feature_names (Optional[List[str]]): Feature order of the model; None
+            when the model does not record it, which only row JSON supports.
+        rows_to_matrix (Callable): Decoder of the ``data`` rows.
+
+    Returns:
+        Tuple[str, np.ndarray]: The request format and the (n, features) matrix.
+    """
+    media_type = _media_type(content_type)
+
+    if media_type == FLOAT32_CONTENT_TYPE:
+        _require_feature_names(feature_names, FLOAT32)
+        view = memoryview(body)
+        (header_length,) = _HEADER_LENGTH.unpack_from(view)
+        header = json.loads(bytes(view[4 : 4 + header_length]))
+        rows, columns = header["shape"]
+        matrix = np.frombuffer(
+            view, dtype="<f4", count=rows * columns, offset=4 + header_length
+        ).reshape(rows, columns)
+        return FLOAT32, _reorder(
+            matrix, header.get("columns", feature_names), feature_names
+        )
+
+    if media_type == ARROW_CONTENT_TYPE:
+        _require_feature_names(feature_names, ARROW)
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ValueError("Arrow requests need pyarrow installed")
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        missing = [name for name in feature_names if name not in table.column_names]
+        if missing:
+            raise ValueError(f"Missing features: {missing}")
+        # Column buffers are read in place; one copy lays them out row-major
+        matrix = np.empty((table.num_rows, len(feature_names)), dtype=np.float32)
+        for i, name in enumerate(feature_names):
+            matrix[:, i] = table.column(name).to_numpy()
+        return ARROW, matrix
+
+    data = json.loads(body)
+    if "columns" in data:
+        _require_feature_names(feature_names, COLUMNAR)
+        try:
+            matrix = np.array(data["values"], dtype=np.float32)
+        except (TypeError, ValueError):
+            # Null values: let pandas fill them with NaN
+            import pandas as pd
+
+            matrix = pd.DataFrame(data["values"]).to_numpy(np.float32)
+        matrix = matrix.reshape(len(data["values"]), len(data["columns"]))
+        return COLUMNAR, _reorder(matrix, data["columns"], feature_names)
+    return ROWS, rows_to_matrix(data["data"])
+
+
+def encode_response(
+    request_format: str,
+    probabilities: np.ndarray,
+    predicted_classes: np.ndarray,
+    label_array: np.ndarray,
+) -> Tuple[Union[bytes, str], str]:
+    """
+    Encode predictions in the format of the request.
+
+    Row JSON keeps the ``predictions``/``probabilities`` response. Columnar JSON
+    returns ``predictions`` with ``columns`` (the labels) and row-major
+    ``values``. Arrow returns a ``prediction`` column and one probability
+    column per label. Raw float32 returns the header ``{"labels": [...],
+    "shape": [n, k]}``, the int32 predicted class indices and the float32
+    probabilities.
+
+    Args:
+        request_format (str): Format returned by ``decode_request``.
+        probabilities (np.ndarray): (n, k) class probabilities.
+        predicted_classes (np.ndarray): (n,) predicted class indices.
+        label_array (np.ndarray): Class labels indexed by class.
+
+    Returns:
+        Tuple[Union[bytes, str], str]: The response body and its Content-Type.
+    """
+    labels = label_array.tolist()
+
+    if request_format == FLOAT32:
+        header = json.dumps(
+            {"labels": labels, "shape": list(probabilities.shape)}
+        ).encode()
+        body = b"".join(
+            (
+                _HEADER_LENGTH.pack(len(header)),
+                header,
+                predicted_classes.astype("<i4").tobytes(),
+                probabilities.astype("<f4").tobytes(),
+            )
+        )
+        return body, FLOAT32_CONTENT_TYPE
+
+    if request_format == ARROW:
+        import pyarrow as pa
+
+        columns = {"prediction": pa.array(label_array.take(predicted_classes))}
+        for i, label in enumerate(labels):
+            columns[str(label)] = pa.array(probabilities[:, i])
+        table = pa.table(columns)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes(), ARROW_CONTENT_TYPE
+
+    predictions = label_array.take(predicted_classes).tolist()
+    if request_format == COLUMNAR:
+        response = {
+            "predictions": predictions,
+            "columns": labels,
+            "values": probabilities.tolist(),
+        }
+    else:
+        response = {
+            "predictions": predictions,
+            "probabilities": dict(zip(labels, probabilities.T.tolist())),
+        }
+    return json.dumps(response), JSON_CONTENT_TYPE
@@ -1,73 +1,330 @@
 import os
+import time
 import logging
 import json
+import itertools
+import operator
+import functools
+import contextlib
 import numpy as np
-import pandas as pd
-import mlflow.sklearn
+
+from batching import MicroBatcher
+from model_registry import VERSION_HEADER, ModelRegistry, ModelVersion
+from prediction_cache import PredictionCache
+from request_formats import JSON_CONTENT_TYPE, decode_request, encode_response
+from tree_predictor import TreeEnsemblePredictor
+
+# With raw HTTP access run() receives the request and can negotiate formats;
+# without the inference server it is called with the JSON string as before
+try:
+    from azureml.contrib.services.aml_request import rawhttp
+    from azureml.contrib.services.aml_response import AMLResponse
+except ImportError:
+    try:
+        from azureml_inference_server_http.api.aml_request import rawhttp
+        from azureml_inference_server_http.api.aml_response import AMLResponse
+    except ImportError:
+        rawhttp, AMLResponse = None, None
+
+# pandas, lightgbm and mlflow are imported only on the paths that need them,
+# so the compiled model starts without paying for their imports
+
+# Model forms SCORE_PREDICTOR accepts; booster is the MLflow model
+SCORE_PREDICTORS = ("auto", "compiled", "native", "booster")
+
+# Seconds spent in each init phase, logged and kept for startup tracking
+init_timings = {}
+ready = False
+registry = None
+
+
+@contextlib.contextmanager
+def _phase(name, timings=init_timings):
+    start = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - start
+    logging.info(f"phase {name}: {1000 * timings[name]:.1f}ms")
+
+
+def load_model(model_path):
+    """
+    Load the fastest available model form: compiled arrays, native LightGBM model, then MLflow.
+
+    ``SCORE_PREDICTOR`` forces one form: ``compiled``, ``native`` or ``booster``
+    (the MLflow model); ``auto`` (the default) picks the first one present.
+    """
+    compiled_path = os.path.join(model_path, "compiled_model")
+    native_path = os.path.join(model_path, "model.txt")
+    predictor = os.getenv("SCORE_PREDICTOR", "auto")
+    if predictor not in SCORE_PREDICTORS:
+        raise ValueError(
+            f"Unknown SCORE_PREDICTOR {predictor!r}; use one of {SCORE_PREDICTORS}"
+        )
+
+    if predictor == "compiled" or (
+        predictor == "auto" and os.path.isdir(compiled_path)
+    ):
+        # Memory-mapped, so the arrays are paged in on first use and shared
+        return TreeEnsemblePredictor.load(compiled_path, mmap=True)
+    if predictor == "native" or (predictor == "auto" and os.path.isfile(native_path)):
+        import lightgbm
+
+        return lightgbm.Booster(model_file=native_path)
+
+    # booster, or auto when neither of the faster forms was exported
+    import mlflow.sklearn
+
+    return mlflow.sklearn.load_model(model_path)
+
+
+def load_labels(model_path):
+    """
+    Read the class labels, indexed by class code, saved next to the model.
+    """
+    with open(os.path.join(model_path, "unique_labels.json")) as f:
+        return json.load(f)["unique_labels"]
+
+
+def load_version(version, model_path, timings=None):
+    """
+    Load one model version with its labels, micro-batcher and prediction cache, and warm it up.
+    """
+    timings = {} if timings is None else timings
+
+    logging.info(f"Loading model version {version} from: {model_path}")
+    with _phase("load_model", timings):
+        model = load_model(model_path)
+    logging.info(f"Model loaded successfully ({type(model).__name__})")
+
+    # Load unique labels
+    with _phase("load_labels", timings):
+        unique_labels = load_labels(model_path)
+    logging.info(f"Loaded {len(unique_labels)} unique labels")
+    feature_names = model.feature_name() if hasattr(model, "feature_name") else None
+
+    # Concurrent requests share one predict call; MICRO_BATCH_MAX_SIZE=0 disables it
+    max_batch_size = int(os.getenv("MICRO_BATCH_MAX_SIZE", "256"))
+    max_wait_ms = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", "2"))
+    batcher = None
+    if max_batch_size > 0 and feature_names is not None:
+        batcher = MicroBatcher(model.predict, max_batch_size, max_wait_ms)
+        logging.info(f"Micro-batching up to {max_batch_size} rows or {max_wait_ms}ms")
+
+    # Repeated rows are answered from memory; PREDICTION_CACHE_MAX_MB=0 disables it
+    cache_mb = float(os.getenv("PREDICTION_CACHE_MAX_MB", "64"))
+    cache = None
+    if cache_mb > 0 and feature_names is not None:
+        cache = PredictionCache(
+            model_version=version,
+            max_entries=int(os.getenv("PREDICTION_CACHE_MAX_ENTRIES", "100000")),
+            max_bytes=int(cache_mb * 1024 * 1024),
+            ttl_seconds=float(os.getenv("PREDICTION_CACHE_TTL_SECONDS", "300")),
+        )
+
+    entry = ModelVersion(version, model_path, model, unique_labels, batcher, cache)
+
+    # Push a synthetic request through the version so page faults, lazy
+    # allocations and first-call setup happen before traffic reaches it
+    warmup_rows = int(os.getenv("SCORE_WARMUP_ROWS", "8"))
+    if warmup_rows > 0 and feature_names is not None:
+        with _phase("warmup", timings):
+            synthetic = json.dumps(
+                {"data": [dict.fromkeys(feature_names, 0.0)] * warmup_rows}
+            )
+            try:
+                _score_version(entry, synthetic, JSON_CONTENT_TYPE)
+            except Exception as e:
+                entry.retire()
+                raise RuntimeError(f"Warm-up request failed: {e}")
+            if cache is not None:
+                cache.clear()
+    return entry
 
 
 def init():
     """
     Initialize model. This function is called when the container is initialized/started.
+
+    Serves the model in ``$AZUREML_MODEL_DIR/outputs`` as version
+    ``SCORE_MODEL_VERSION``, or with ``MODEL_REGISTRY_DIR`` set, every version
+    directory in it, re-synced every ``MODEL_REGISTRY_POLL_SECONDS``.
     """
-    global model
-    global unique_labels
+    global registry
+    global ready
 
     try:
-        # Get model path
-        model_path = os.getenv("AZUREML_MODEL_DIR")
-        model_path = os.path.join(model_path, "outputs")
-        logging.info(f"Loading model from: {model_path}")
+        init_start = time.perf_counter()
+        ready = False
+        if registry is not None:
+            registry.close()
 
-        # Load the model
-        model = mlflow.sklearn.load_model(model_path)
-        logging.info("Model loaded successfully")
+        registry = ModelRegistry(functools.partial(load_version, timings=init_timings))
+        registry_dir = os.getenv("MODEL_REGISTRY_DIR")
+        if registry_dir:
+            registry.sync(registry_dir)
+            if not registry.versions():
+                raise RuntimeError(
+                    f"No model version could be loaded from {registry_dir}"
+                )
+        else:
+            # Get model path
+            model_path = os.getenv("AZUREML_MODEL_DIR")
+            model_path = os.path.join(model_path, "outputs")
+            registry.load(os.getenv("SCORE_MODEL_VERSION", "default"), model_path)
+
+        # Later loads are hot swaps; their phases are logged, not kept as init timings
+        registry.load_fn = load_version
+        poll_seconds = float(os.getenv("MODEL_REGISTRY_POLL_SECONDS", "30"))
+        if registry_dir and poll_seconds > 0:
+            registry.watch(registry_dir, poll_seconds)
 
-        # Load unique labels
-        labels_path = os.path.join(model_path, "unique_labels.json")
-        with open(labels_path) as f:
-            unique_labels = json.load(f)["unique_labels"]
-        logging.info(f"Loaded {len(unique_labels)} unique labels")
+        init_timings["total"] = time.perf_counter() - init_start
+        ready = True
+        logging.info(
+            f"Ready with model versions {registry.versions()} after "
+            f"{1000 * init_timings['total']:.1f}ms: "
+            + ", ".join(
+                f"{name} {1000 * seconds:.1f}ms"
+                for name, seconds in init_timings.items()
+            )
+        )
 
     except Exception as e:
         logging.error(f"Error in init: {str(e)}")
         raise
 
 
+def _to_matrix(rows, feature_names):
+    """
+    Build one contiguous float32 matrix from a list of row dicts in model feature order.
+    """
+    if feature_names is None:
+        import pandas as pd
+
+        return pd.DataFrame(rows)
+
+    try:
+        # itemgetter/chain/fromiter run in C: no per-row Python lists or DataFrame
+        getter = operator.itemgetter(*feature_names)
+        values = map(getter, rows)
+        if len(feature_names) > 1:
+            values = itertools.chain.from_iterable(values)
+        matrix = np.fromiter(
+            values, dtype=np.float32, count=len(rows) * len(feature_names)
+        )
+        return matrix.reshape(len(rows), len(feature_names))
+    except (KeyError, TypeError, ValueError):
+        # Absent features are an error, as in the other request formats
+        missing = [name for name in feature_names if any(name not in r for r in rows)]
+        if missing:
+            raise ValueError(f"Missing features: {missing}")
+        # Null or non-numeric values: pandas fills nulls with NaN
+        import pandas as pd
+
+        return pd.DataFrame(rows, columns=feature_names).to_numpy(np.float32)
+
+
+def classify(probabilities):
+    """
+    Expand binary scores to two columns and pick the predicted class of every row.
+    """
+    if probabilities.ndim == 1:
+        # Binary case
+        probabilities = np.column_stack([1 - probabilities, probabilities])
+        predicted_classes = (probabilities[:, 1] >= 0.5).astype(np.intp)
+    else:
+        # Multi-class case
+        predicted_classes = np.argmax(probabilities, axis=1)
+    return probabilities, predicted_classes
+
+
+def batching_metrics(version=None):
+    """
+    Queue depth and throughput of a version's micro-batcher, empty when batching is off.
+    """
+    batcher = registry.get(version).batcher
+    return batcher.metrics() if batcher is not None else {}
+
+
+def cache_metrics(version=None):
+    """
+    Hit/miss counters and size of a version's prediction cache, empty when caching is off.
+    """
+    cache = registry.get(version).cache
+    return cache.metrics() if cache is not None else {}
+
+
+def model_metrics():
+    """
+    Default version, traffic split and the batching and cache metrics of every version.
+    """
+    return registry.metrics()
+
+
+def _score_version(entry, body, content_type):
+    request_format, input_matrix = decode_request(
+        body,
+        content_type,
+        entry.feature_names,
+        functools.partial(_to_matrix, feature_names=entry.feature_names),
+    )
+
+    # Get predictions (LightGBM returns probabilities by default for multi-class)
+    probabilities, predicted_classes = classify(entry.predict(input_matrix))
+
+    return encode_response(
+        request_format, probabilities, predicted_classes, entry.label_array
+    )
+
+
+def score_request(body, content_type=JSON_CONTENT_TYPE, version=None):
+    """
+    Score one request body and encode the predictions in the request's format.
+
+    The request goes to ``version`` when given, otherwise to a version picked
+    by the registry's traffic split. Raises on malformed requests and unknown
+    versions; ``run`` turns errors into an error response.
+
+    Returns:
+        Tuple: The response body, its Content-Type and the version that served it.
+    """
+    with registry.use(version) as entry:
+        response, response_type = _score_version(entry, body, content_type)
+    return response, response_type, entry.version
+
+
 def run(raw_data):
     """
     This function is called for every invocation of the endpoint to perform the actual scoring/prediction.
+
+    ``raw_data`` is the JSON string, or with raw HTTP access the request whose
+    Content-Type selects row or columnar JSON, Arrow IPC or raw float32 (see
+    ``request_formats``); the response uses the same format. Its
+    ``x-model-version`` header picks the model version.
     """
+    raw_request = hasattr(raw_data, "get_data")
+    headers = {}
     try:
         # Parse input data
-        data = json.loads(raw_data)
-        input_df = pd.DataFrame(data["data"])
-
-        # Get predictions (LightGBM returns probabilities by default for multi-class)
-        probabilities = model.predict(input_df)
-
-        # Convert to class predictions
-        if probabilities.ndim > 1:
-            # Multi-class case
-            predicted_classes = np.argmax(probabilities, axis=1)
-            class_probabilities = {
-                unique_labels[i]: probabilities[:, i].tolist()
-                for i in range(len(unique_labels))
-            }
+        if raw_request:
+            body = raw_data.get_data()
+            content_type = raw_data.headers.get("Content-Type", JSON_CONTENT_TYPE)
+            version = raw_data.headers.get(VERSION_HEADER)
         else:
-            # Binary case
-            predicted_classes = (probabilities >= 0.5).astype(int)
-            class_probabilities = {
-                unique_labels[0]: (1 - probabilities).tolist(),
-                unique_labels[1]: probabilities.tolist(),
-            }
-
-        # Map numeric predictions to class labels
-        predicted_labels = [unique_labels[idx] for idx in predicted_classes]
-
-        return json.dumps(
-            {"predictions": predicted_labels, "probabilities": class_probabilities}
+            body, content_type, version = raw_data, JSON_CONTENT_TYPE, None
+        response, response_type, served_version = score_request(
+            body, content_type, version
         )
+        headers[VERSION_HEADER] = served_version
 
     except Exception as e:
-        return json.dumps({"error": str(e)})
+        response, response_type = json.dumps({"error": str(e)}), JSON_CONTENT_TYPE
+
+    if raw_request:
+        headers["Content-Type"] = response_type
+        return AMLResponse(response, 200, headers)
+    return response
+
+
+if rawhttp is not None:
+    run = rawhttp(run)
@@ -0,0 +1,372 @@
+import os
+import json
+import time
+import signal
+import asyncio
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+import score
+from model_registry import VERSION_HEADER
+from request_formats import JSON_CONTENT_TYPE
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+# Malformed requests, as opposed to failures of the model or the server
+CLIENT_ERRORS = (ValueError, KeyError, TypeError, IndexError)
+
+
+# Seconds every process worker gets to load the model and answer its warm-up call
+WORKER_STARTUP_TIMEOUT = 600.0
+
+_startup_barrier = None
+
+
+def _init_worker(barrier):
+    global _startup_barrier
+    _startup_barrier = barrier
+    score.init()
+
+
+def _worker_ready() -> Tuple[int, bool]:
+    # Every worker blocks here until all have arrived, so each one answers once
+    _startup_barrier.wait(WORKER_STARTUP_TIMEOUT)
+    return os.getpid(), score.ready
+
+
+class ScoringServer:
+    """
+    A class to serve score.py over HTTP from an asyncio event loop.
+
+    Connections are handled concurrently on the event loop, and every predict
+    runs in a pool of ``workers`` threads (LightGBM and numpy release the GIL)
+    or processes, so one large batch does not hold up the small requests
+    behind it. Once ``max_pending`` requests are queued or running, new ones
+    are answered 503 at once instead of queueing without bound.
+
+    Routes: ``POST /score`` (same request formats and ``x-model-version``
+    header as score.run), ``GET /health`` (the process is up), ``GET /ready``
+    (the model is loaded and warmed up) and ``GET /metrics``.
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 5001,
+        workers: int = 4,
+        max_pending: int = 64,
+        pool: str = "thread",
+        max_body_mb: float = 100.0,
+    ):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pool = pool
+        self.max_body_bytes = int(max_body_mb * 1024 * 1024)
+        self.ready = False
+        self._executor = None
+        self._server = None
+        self._pending = 0
+        self._stats = {"requests": 0, "shed": 0, "errors": 0, "predict_seconds": 0.0}
+
+    async def start(self):
+        """
+        Listen for connections, then load the model without blocking /health.
+        """
+        if self.pool == "process":
+            # Each worker loads the model once; compiled arrays are mmap'd and shared
+            context = multiprocessing.get_context("spawn")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=context,
+                initializer=_init_worker,
+                initargs=(context.Barrier(self.workers),),
+            )
+        else:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="predict"
+            )
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.host, self.port
+        )
+        logging.info(
+            f"Serving on http://{self.host}:{self.port} with {self.workers} "
+            f"{self.pool} workers, shedding load beyond {self.max_pending} requests"
+        )
+        await self._load()
+
+    async def _load(self):
+        loop = asyncio.get_running_loop()
+        if self.pool == "process":
+            # Workers run score.init as they start; report ready once all of them answer
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(self._executor, _worker_ready)
+                    for _ in range(self.workers)
+                ),
+                return_exceptions=True,
+            )
+            errors = [r for r in results if isinstance(r, BaseException)]
+            if errors:
+                raise RuntimeError(f"A predict worker failed to start: {errors[0]!r}")
+            ready = {pid for pid, ok in results if ok}
+            if len(ready) != self.workers:
+                raise RuntimeError(
+                    f"Only {len(ready)} of {self.workers} predict workers loaded the model"
+                )
+        else:
+            await loop.run_in_executor(self._executor, score.init)
+        self.ready = True
+        logging.info("Model loaded, ready for traffic")
+
+    async def stop(self):
+        """
+        Stop accepting connections and wait for running predictions to finish.
+        """
+        self.ready = False
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._executor.shutdown
+            )
+        logging.info("Server stopped")
+
+    async def _read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        request_line = await reader.readline()
+        if not request_line.strip():
+            return None
+        method, path, _ = request_line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body_bytes:
+            raise OverflowError(f"Request body of {length} bytes is too large")
+        body = await reader.readexactly(length) if length else b""
+        return method, path.split("?", 1)[0], headers, body
+
+    @staticmethod
+    def _response(
+        status: int,
+        body,
+        content_type: str = JSON_CONTENT_TYPE,
+        extra_headers: Optional[Dict[str, str]] = None,
+    ) -> bytes:
+        if not isinstance(body, bytes):
+            body = (body if isinstance(body, str) else json.dumps(body)).encode()
+        headers = {
+            "Content-Type": content_type,
+            "Content-Length": str(len(body)),
+            **(extra_headers or {}),
+        }
+        head = f"HTTP/1.1 {status} {REASONS[status]}\r\n" + "".join(
+            f"{name}: {value}\r\n" for name, value in headers.items()
+        )
+        return (head + "\r\n").encode("latin-1") + body
+
+    async def _handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except OverflowError as e:
+                    writer.write(self._response(413, {"error": str(e)}))
+                    await writer.drain()
+                    break
+                except ValueError as e:
+                    writer.write(self._response(400, {"error": str(e)}))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, headers, body = request
+                writer.write(await self._dispatch(method, path, headers, body))
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(
+        self, method: str, path: str, headers: Dict[str, str], body: bytes
+    ) -> bytes:
+        if path == "/health":
+            return self._response(200, {"status": "alive"})
+        if path == "/ready":
+            if self.ready:
+                return self._response(200, {"status": "ready"})
+            return self._response(503, {"status": "loading"})
+        if path == "/metrics":
+            return self._response(200, self.metrics())
+        if path not in ("/score", "/"):
+            return self._response(404, {"error": f"Unknown path {path}"})
+        if method != "POST":
+            return self._response(405, {"error": "Use POST to score"})
+        return await self._score(
+            body,
+            headers.get("content-type", JSON_CONTENT_TYPE),
+            headers.get(VERSION_HEADER),
+        )
+
+    async def _score(
+        self, body: bytes, content_type: str, version: Optional[str]
+    ) -> bytes:
+        self._stats["requests"] += 1
+        if not self.ready or self._pending >= self.max_pending:
+            self._stats["shed"] += 1
+            reason = "Overloaded" if self.ready else "Model is loading"
+            return self._response(
+                503, {"error": reason}, extra_headers={"Retry-After": "1"}
+            )
+
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            (
+                response,
+                response_type,
+                served_version,
+            ) = await asyncio.get_running_loop().run_in_executor(
+                self._executor, score.score_request, body, content_type, version
+            )
+            return self._response(
+                200, response, response_type, {VERSION_HEADER: served_version}
+            )
+        except CLIENT_ERRORS as e:
+            self._stats["errors"] += 1
+            return self._response(400, {"error": str(e)})
+        except Exception as e:
+            self._stats["errors"] += 1
+            logging.error(f"Error in scoring: {e}")
+            return self._response(500, {"error": str(e)})
+        finally:
+            self._pending -= 1
+            self._stats["predict_seconds"] += time.perf_counter() - start
+
+    def metrics(self) -> Dict:
+        """
+        Report admission and latency counters, plus the model versions' metrics in thread mode.
+
+        Returns:
+            Dict: Pending requests, totals, shed count and the score.py model metrics.
+        """
+        served = max(self._stats["requests"] - self._stats["shed"], 1)
+        metrics = {
+            "ready": self.ready,
+            "pending": self._pending,
+            "max_pending": self.max_pending,
+            "requests": self._stats["requests"],
+            "shed": self._stats["shed"],
+            "errors": self._stats["errors"],
+            "avg_predict_ms": 1000.0 * self._stats["predict_seconds"] / served,
+        }
+        if self.pool == "thread" and self.ready:
+            metrics["models"] = score.model_metrics()
+        return metrics
+
+
+async def main(args):
+    server = ScoringServer(
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        max_pending=args.max_pending,
+        pool=args.pool,
+        max_body_mb=args.max_body_mb,
+    )
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            # Windows event loops: Ctrl+C raises KeyboardInterrupt instead
+            pass
+
+    try:
+        await server.start()
+        await stop.wait()
+    except Exception as e:
+        logging.error(f"Error in server: {e}")
+        raise
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("serve")
+    parser.add_argument(
+        "--model_dir",
+        type=str,
+        default=None,
+        help="Model directory (AZUREML_MODEL_DIR), holding outputs/",
+    )
+    parser.add_argument(
+        "--registry_dir",
+        type=str,
+        default=None,
+        help="Directory of model versions (MODEL_REGISTRY_DIR), served instead",
+    )
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=5001, help="Port to listen on")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("SERVE_WORKERS", "4")),
+        help="Concurrent predictions",
+    )
+    parser.add_argument(
+        "--max_pending",
+        type=int,
+        default=int(os.getenv("SERVE_MAX_PENDING", "64")),
+        help="Queued plus running requests before answering 503",
+    )
+    parser.add_argument(
+        "--pool",
+        type=str,
+        choices=["thread", "process"],
+        default=os.getenv("SERVE_POOL", "thread"),
+        help="Run predictions in threads or in worker processes",
+    )
+    parser.add_argument(
+        "--max_body_mb", type=float, default=100.0, help="Largest accepted request"
+    )
+    args = parser.parse_args()
+
+    if args.model_dir is not None:
+        os.environ["AZUREML_MODEL_DIR"] = args.model_dir
+    if args.registry_dir is not None:
+        os.environ["MODEL_REGISTRY_DIR"] = args.registry_dir
+    if not os.getenv("AZUREML_MODEL_DIR") and not os.getenv("MODEL_REGISTRY_DIR"):
+        parser.error("pass --model_dir or --registry_dir")
+
+    asyncio.run(main(args))
@@ -0,0 +1,213 @@
+import os
+import json
+import logging
+import numpy as np
+from typing import Dict
+
+# Arrays of a compiled model, saved as <name>.npy next to meta.json. Node i
+# occupies slots 2i and 2i+1 of the per-node arrays, so "slot + went right"
+# indexes ``children`` directly; ``children`` holds child slots and a leaf
+# points back to itself. Trees are ordered by decreasing depth.
+ARRAY_NAMES = (
+    "split_feature",
+    "threshold",
+    "children",
+    "leaf_value",
+    "default_left",
+    "missing_type",
+    "roots",
+    "tree_depth",
+    "tree_output",
+)
+
+# LightGBM missing value handling of a numerical split
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+
+# LightGBM treats |x| <= kZeroThreshold as zero
+ZERO_THRESHOLD = 1e-35
+
+IDENTITY_OBJECTIVES = (
+    "regression",
+    "regression_l1",
+    "huber",
+    "fair",
+    "quantile",
+    "mape",
+)
+EXP_OBJECTIVES = ("poisson", "gamma", "tweedie")
+
+
+class TreeEnsemblePredictor:
+    """
+    A class to predict with a LightGBM model compiled to flat numpy arrays.
+
+    Every tree is stored in shared node arrays where a leaf points to itself,
+    so all rows walk all trees together one level per vectorized step without
+    Python-level branching. Trees are sorted by depth, so step ``d`` only
+    touches the prefix of trees deeper than ``d``. Only numpy is needed at
+    inference time.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray], meta: Dict):
+        # Plain views of memory-mapped arrays skip np.memmap's per-call overhead
+        self.arrays = {name: np.asarray(array) for name, array in arrays.items()}
+        arrays = self.arrays
+        self.meta = meta
+        self.num_features = meta["num_features"]
+        self.num_tree_per_iteration = meta["num_tree_per_iteration"]
+        self.feature_names = meta["feature_names"]
+        self.objective, self.sigmoid = self._parse_objective(meta["objective"])
+        self._has_zero_missing = bool(np.any(arrays["missing_type"] == MISSING_ZERO))
+
+        # Number of trees still descending at each step
+        depth = np.asarray(arrays["tree_depth"])
+        self._active = [
+            int(np.sum(depth > d)) for d in range(int(depth.max(initial=0)))
+        ]
+        # (trees, outputs) indicator summing leaf values into raw scores
+        self._output_matrix = np.eye(self.num_tree_per_iteration)[arrays["tree_output"]]
+
+    @classmethod
+    def load(cls, model_dir: str, mmap: bool = True) -> "TreeEnsemblePredictor":
+        """
+        Load a compiled model written by ``classification.export.ModelExporter``.
+
+        Args:
+            model_dir (str): Directory holding meta.json and the node arrays.
+            mmap (bool): Memory-map the arrays read-only instead of reading them.
+
+        Returns:
+            TreeEnsemblePredictor: The predictor.
+        """
+        try:
+            with open(os.path.join(model_dir, "meta.json")) as f:
+                meta = json.load(f)
+            arrays = {
+                name: np.load(
+                    os.path.join(model_dir, f"{name}.npy"),
+                    mmap_mode="r" if mmap else None,
+                )
+                for name in ARRAY_NAMES
+            }
+            logging.info(
+                f"Loaded compiled model with {len(arrays['roots'])} trees "
+                f"from {model_dir}"
+            )
+            return cls(arrays, meta)
+        except Exception as e:
+            logging.error(f"Error loading compiled model from {model_dir}: {e}")
+            raise
+
+    @staticmethod
+    def _parse_objective(objective: str):
+        tokens = objective.split()
+        name = tokens[0]
+        sigmoid = 1.0
+        for token in tokens[1:]:
+            if token.startswith("sigmoid:"):
+                sigmoid = float(token.split(":")[1])
+        supported = (
+            ("binary", "multiclass", "multiclassova", "cross_entropy")
+            + IDENTITY_OBJECTIVES
+            + EXP_OBJECTIVES
+        )
+        if name not in supported:
+            raise ValueError(f"Unsupported objective for compiled prediction: {name}")
+        return name, sigmoid
+
+    def feature_name(self):
+        """
+        Feature names in model order, like ``lightgbm.Booster.feature_name``.
+        """
+        return list(self.feature_names)
+
+    def predict_raw(self, data: np.ndarray, chunk_size: int = 16) -> np.ndarray:
+        """
+        Sum the leaf values of every tree per output column.
+
+        Args:
+            data (np.ndarray): (n, num_features) feature matrix.
+            chunk_size (int): Rows traversed at once; small chunks keep the
+                (rows x trees) state in cache.
+
+        Returns:
+            np.ndarray: (n, num_tree_per_iteration) raw scores.
+        """
+        data = np.asarray(data, dtype=np.float64)
+        if data.ndim == 1:
+            data = data.reshape(1, -1)
+        if data.shape[1] != self.num_features:
+            raise ValueError(
+                f"Expected {self.num_features} features, got {data.shape[1]}"
+            )
+
+        split_feature = self.arrays["split_feature"]
+        threshold = self.arrays["threshold"]
+        children = self.arrays["children"]
+        roots = self.arrays["roots"]
+        check_missing = self._has_zero_missing or bool(np.isnan(data).any())
+
+        raw = np.empty((len(data), self.num_tree_per_iteration), dtype=np.float64)
+        for start in range(0, len(data), chunk_size):
+            rows = np.ascontiguousarray(data[start : start + chunk_size])
+            flat = rows.ravel()
+            row_offsets = np.arange(len(rows)) * self.num_features
+
+            # (trees, rows) state, so the trees still descending are a contiguous prefix
+            slots = np.repeat(roots[:, None], len(rows), axis=1)
+            for active in self._active:
+                current = slots[:active]
+                features = split_feature.take(current)
+                if len(rows) > 1:
+                    features += row_offsets
+                values = flat.take(features)
+                go_right = values > threshold.take(current)
+                if check_missing:
+                    go_right = self._missing_decision(values, go_right, current)
+                slots[:active] = children.take(current + go_right)
+
+            raw[start : start + len(rows)] = (
+                self.arrays["leaf_value"].take(slots).T @ self._output_matrix
+            )
+
+        if self.meta.get("average_output"):
+            raw /= max(len(roots) // self.num_tree_per_iteration, 1)
+        return raw
+
+    def _missing_decision(self, values, go_right, slots):
+        # Mirrors LightGBM's NumericalDecision: NaN counts as zero unless the
+        # split tracks NaN, and missing values follow the default direction
+        node_missing = self.arrays["missing_type"].take(slots)
+        is_nan = np.isnan(values)
+        values = np.where(is_nan & (node_missing != MISSING_NAN), 0.0, values)
+        is_missing = (
+            (node_missing == MISSING_ZERO) & (np.abs(values) <= ZERO_THRESHOLD)
+        ) | ((node_missing == MISSING_NAN) & is_nan)
+        go_right = np.where(
+            is_nan, values > self.arrays["threshold"].take(slots), go_right
+        )
+        return np.where(is_missing, ~self.arrays["default_left"].take(slots), go_right)
+
+    def predict(self, data: np.ndarray, raw_score: bool = False) -> np.ndarray:
+        """
+        Predict like ``lightgbm.Booster.predict`` at the exported iteration.
+
+        Args:
+            data (np.ndarray): (n, num_features) feature matrix.
+            raw_score (bool): Return raw scores without the objective's transform.
+
+        Returns:
+            np.ndarray: (n,) for single-output models, else (n, num_class).
+        """
+        raw = self.predict_raw(data)
+        if not raw_score:
+            if self.objective == "multiclass":
+                raw = np.exp(raw - raw.max(axis=1, keepdims=True))
+                raw /= raw.sum(axis=1, keepdims=True)
+            elif self.objective in ("binary", "multiclassova"):
+                raw = 1.0 / (1.0 + np.exp(-self.sigmoid * raw))
+            elif self.objective == "cross_entropy":
+                raw = 1.0 / (1.0 + np.exp(-raw))
+            elif self.objective in EXP_OBJECTIVES:
+                raw = np.exp(raw)
+        return raw[:, 0] if raw.shape[1] == 1 else raw
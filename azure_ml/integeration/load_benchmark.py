@@ -0,0 +1,348 @@
+# load_benchmark.py
+import os
+import sys
+import ssl
+import json
+import time
+import random
+import asyncio
+import argparse
+import threading
+from urllib.parse import urlsplit
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+"""
+Benchmark the scoring service under concurrent load.
+
+Against score.py hosted locally (model files under <model_dir>/outputs):
+
+python ./integeration/load_benchmark.py `
+    --model_dir <model directory> `
+    --rps 200 --concurrency 16 --batch_size 8 --duration 30 `
+    --output results/load_benchmark.json `
+    --baseline results/load_benchmark_baseline.json
+
+Against a deployed endpoint, pass --score_uri and --score_key instead of --model_dir.
+The process exits with status 1 when the run regresses against the baseline.
+"""
+
+DEPLOY_DIR = os.path.join(os.path.dirname(__file__), "..", "deploy_model")
+
+
+class LocalScoringServer:
+    """
+    A class to host score.init/score.run behind a local HTTP endpoint.
+
+    Requests are served from a thread pool like the inference server's
+    workers, with keep-alive connections, on POST /score.
+    """
+
+    def __init__(self, model_dir: str, host: str = "127.0.0.1", port: int = 0):
+        os.environ["AZUREML_MODEL_DIR"] = model_dir
+        sys.path.insert(0, os.path.abspath(DEPLOY_DIR))
+        import score
+
+        score.init()
+        self.score = score
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are written separately; do not wait on delayed ACKs
+            disable_nagle_algorithm = True
+
+            def do_POST(handler):
+                length = int(handler.headers.get("Content-Length", 0))
+                body = score.run(handler.rfile.read(length).decode()).encode()
+                handler.send_response(200)
+                handler.send_header("Content-Type", "application/json")
+                handler.send_header("Content-Length", str(len(body)))
+                handler.end_headers()
+                handler.wfile.write(body)
+
+            def log_message(handler, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.uri = f"http://{host}:{self.server.server_address[1]}/score"
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class LoadGenerator:
+    """
+    A class to drive a scoring endpoint with concurrent asyncio HTTP clients.
+
+    Requests are released on an open-loop schedule of ``rps`` per second
+    (as fast as possible when ``rps`` is 0) to ``concurrency`` clients, each
+    holding one keep-alive connection. Latency is measured from the scheduled
+    send time, so queueing behind a slow server is counted.
+    """
+
+    def __init__(
+        self,
+        score_uri: str,
+        payloads: list,
+        score_key: str = None,
+        rps: float = 100.0,
+        concurrency: int = 8,
+        duration: float = 10.0,
+        timeout: float = 30.0,
+    ):
+        self.url = urlsplit(score_uri)
+        self.payloads = payloads
+        self.score_key = score_key
+        self.rps = rps
+        self.concurrency = concurrency
+        self.duration = duration
+        self.timeout = timeout
+
+    def _request_bytes(self, body: bytes) -> bytes:
+        headers = [
+            f"POST {self.url.path or '/'} HTTP/1.1",
+            f"Host: {self.url.netloc}",
+            "Content-Type: application/json",
+            f"Content-Length: {len(body)}",
+        ]
+        if self.score_key:
+            headers.append(f"Authorization: Bearer {self.score_key}")
+        return ("\r\n".join(headers) + "\r\n\r\n").encode() + body
+
+    async def _connect(self):
+        secure = self.url.scheme == "https"
+        port = self.url.port or (443 if secure else 80)
+        return await asyncio.open_connection(
+            self.url.hostname,
+            port,
+            ssl=ssl.create_default_context() if secure else None,
+        )
+
+    @staticmethod
+    async def _read_response(reader) -> tuple:
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError("Connection closed by server")
+        status = int(status_line.split()[1])
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode().partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        return status, await reader.readexactly(length)
+
+    async def _client(self, schedule: asyncio.Queue, results: list):
+        reader, writer = None, None
+        while True:
+            item = await schedule.get()
+            if item is None:
+                break
+            scheduled, body = item
+            ok = False
+            try:
+                if writer is None:
+                    reader, writer = await self._connect()
+                writer.write(self._request_bytes(body))
+                status, response = await asyncio.wait_for(
+                    self._read_response(reader), self.timeout
+                )
+                ok = status == 200 and b'"error"' not in response[:64]
+            except Exception:
+                if writer is not None:
+                    writer.close()
+                reader, writer = None, None
+            results.append((time.perf_counter() - scheduled, ok))
+        if writer is not None:
+            writer.close()
+
+    async def _run(self) -> tuple:
+        schedule = asyncio.Queue()
+        results = []
+        clients = [
+            asyncio.create_task(self._client(schedule, results))
+            for _ in range(self.concurrency)
+        ]
+        start = time.perf_counter()
+        sent = 0
+        while time.perf_counter() - start < self.duration:
+            if self.rps > 0:
+                scheduled = start + sent / self.rps
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                    # Timer overshoot of the dispatcher is not server latency
+                    scheduled = time.perf_counter()
+            else:
+                # Closed loop: keep one request queued per client
+                while schedule.qsize() >= self.concurrency:
+                    await asyncio.sleep(0)
+                scheduled = time.perf_counter()
+            await schedule.put((scheduled, random.choice(self.payloads)))
+            sent += 1
+        for _ in clients:
+            await schedule.put(None)
+        await asyncio.gather(*clients)
+        return results, time.perf_counter() - start
+
+    def run(self) -> dict:
+        """
+        Run the load and summarize it.
+
+        Returns:
+            dict: Request counts, error rate, throughput and latency percentiles in ms.
+        """
+        results, elapsed = asyncio.run(self._run())
+        latencies = sorted(1000 * latency for latency, ok in results if ok)
+        errors = len(results) - len(latencies)
+        return {
+            "requests": len(results),
+            "errors": errors,
+            "error_rate": errors / max(len(results), 1),
+            "duration_s": elapsed,
+            "throughput_rps": len(latencies) / elapsed,
+            "latency_ms": {
+                "p50": percentile(latencies, 50),
+                "p95": percentile(latencies, 95),
+                "p99": percentile(latencies, 99),
+                "mean": sum(latencies) / len(latencies) if latencies else float("nan"),
+                "max": latencies[-1] if latencies else float("nan"),
+            },
+        }
+
+
+def percentile(values: list, q: float) -> float:
+    """Linearly interpolated percentile of sorted values"""
+    if not values:
+        return float("nan")
+    position = (len(values) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def load_payloads(data_file: str, batch_size: int, count: int = 64) -> list:
+    """Build request bodies of batch_size rows sampled from a test.json-style file"""
+    with open(data_file) as f:
+        rows = json.load(f)["data"]
+    rng = random.Random(0)
+    return [
+        json.dumps({"data": [rng.choice(rows) for _ in range(batch_size)]}).encode()
+        for _ in range(count)
+    ]
+
+
+def compare_to_baseline(
+    report: dict, baseline: dict, tolerance: float, max_error_rate: float
+) -> list:
+    """Return the regressions of a report against a baseline report"""
+    failures = []
+    for key in ("p50", "p95", "p99"):
+        limit = baseline["latency_ms"][key] * (1 + tolerance)
+        if report["latency_ms"][key] > limit:
+            failures.append(
+                f"{key} latency {report['latency_ms'][key]:.2f}ms > {limit:.2f}ms"
+            )
+    limit = baseline["throughput_rps"] * (1 - tolerance)
+    if report["throughput_rps"] < limit:
+        failures.append(
+            f"throughput {report['throughput_rps']:.1f} rps < {limit:.1f} rps"
+        )
+    if report["error_rate"] > max_error_rate:
+        failures.append(f"error rate {report['error_rate']:.3f} > {max_error_rate:.3f}")
+    return failures
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser("load_benchmark")
+    parser.add_argument(
+        "--model_dir",
+        type=str,
+        default=None,
+        help="Host score.py locally with this AZUREML_MODEL_DIR",
+    )
+    parser.add_argument(
+        "--score_uri", type=str, default=None, help="Deployed endpoint to benchmark"
+    )
+    parser.add_argument("--score_key", type=str, default=None, help="Endpoint key")
+    parser.add_argument(
+        "--data_file",
+        type=str,
+        default=os.path.join(os.path.dirname(__file__), "test.json"),
+        help="JSON file with request rows under 'data'",
+    )
+    parser.add_argument(
+        "--rps", type=float, default=100.0, help="Target requests/s (0: unthrottled)"
+    )
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--batch_size", type=int, default=1, help="Rows per request")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load")
+    parser.add_argument(
+        "--output", type=str, default="load_benchmark.json", help="Report JSON path"
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="Report JSON to gate against"
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.1,
+        help="Allowed relative regression of latency and throughput",
+    )
+    parser.add_argument(
+        "--max_error_rate", type=float, default=0.0, help="Allowed error rate"
+    )
+    args = parser.parse_args()
+
+    if (args.model_dir is None) == (args.score_uri is None):
+        parser.error("pass exactly one of --model_dir or --score_uri")
+
+    payloads = load_payloads(args.data_file, args.batch_size)
+    config = {
+        "target": args.score_uri or "local",
+        "rps": args.rps,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+        "duration_s": args.duration,
+    }
+
+    def benchmark(score_uri):
+        generator = LoadGenerator(
+            score_uri,
+            payloads,
+            score_key=args.score_key,
+            rps=args.rps,
+            concurrency=args.concurrency,
+            duration=args.duration,
+        )
+        return generator.run()
+
+    if args.model_dir is not None:
+        with LocalScoringServer(args.model_dir) as server:
+            report = benchmark(server.uri)
+    else:
+        report = benchmark(args.score_uri)
+    report = {"config": config, **report}
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        failures = compare_to_baseline(
+            report, baseline, args.tolerance, args.max_error_rate
+        )
+        for failure in failures:
+            print(f"REGRESSION: {failure}")
+        sys.exit(1 if failures else 0)
@@ -0,0 +1,530 @@
+import os
+import sys
+import json
+import time
+import argparse
+import logging
+import platform
+import tempfile
+import statistics
+import lightgbm
+import numpy as np
+import pandas as pd
+import yaml
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from classification.classifier import DataSplitter, ModelTrainer
+from classification.export import ModelExporter
+from classification.loader import TypedCSVLoader
+from classification.profiling import StageProfiler
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEPLOY_DIR = os.path.join(REPO_ROOT, "azure_ml", "deploy_model")
+
+# CSV path, label column and non-feature columns of the bundled datasets
+DATASETS = {
+    "fruit": (os.path.join(REPO_ROOT, "data", "Date_Fruit_Datasets.csv"), "Class", []),
+    "insurance": (os.path.join(REPO_ROOT, "data", "insurance.csv"), "target", ["id"]),
+}
+SYNTHETIC = "synthetic"
+LABEL_COLUMN = "Class"
+
+# Row, feature and class counts of each preset; the bundled datasets keep
+# their own features and classes and are resampled to each row count
+PRESETS = {
+    "small": {"rows": [1000, 10000, 100000], "features": [34], "classes": [2, 7]},
+    "full": {
+        "rows": [1000, 10000, 100000, 1000000, 10000000],
+        "features": [10, 34, 100],
+        "classes": [2, 7, 20],
+    },
+}
+
+
+def synthetic_frame(
+    rows: int, features: int, classes: int, seed: int = 0, chunk_rows: int = 1000000
+) -> pd.DataFrame:
+    """
+    Generate Gaussian class clusters as float32 features and a categorical label.
+
+    Args:
+        rows (int): Number of rows.
+        features (int): Number of feature columns.
+        classes (int): Number of classes.
+        seed (int): Random seed.
+        chunk_rows (int): Rows generated at a time, bounding temporary memory.
+
+    Returns:
+        pd.DataFrame: Features ``f0..`` and the ``Class`` label.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(0.0, 1.0, size=(classes, features)).astype(np.float32)
+    labels = rng.integers(0, classes, size=rows)
+    matrix = np.empty((rows, features), dtype=np.float32)
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        matrix[start:stop] = centers[labels[start:stop]]
+        matrix[start:stop] += rng.standard_normal(
+            (stop - start, features), dtype=np.float32
+        )
+    frame = pd.DataFrame(matrix, columns=[f"f{i}" for i in range(features)])
+    frame[LABEL_COLUMN] = pd.Categorical.from_codes(
+        labels, categories=[f"class_{k}" for k in range(classes)]
+    )
+    return frame
+
+
+def resampled_frame(
+    dataset: str, rows: int, seed: int = 0, chunk_rows: int = 1000000
+) -> pd.DataFrame:
+    """
+    Resample a bundled dataset to a row count, jittering features by 1% of their std.
+
+    Args:
+        dataset (str): Key of ``DATASETS``.
+        rows (int): Number of rows.
+        seed (int): Random seed.
+        chunk_rows (int): Rows jittered at a time, bounding temporary memory.
+
+    Returns:
+        pd.DataFrame: Float32 features and the label renamed to ``Class``.
+    """
+    path, label_column, dropped = DATASETS[dataset]
+    source = TypedCSVLoader(label_column=label_column).load(path)
+    labels = source[label_column]
+    features = source.drop(columns=[label_column, *dropped]).astype(np.float32)
+
+    rng = np.random.default_rng(seed)
+    index = rng.integers(0, len(source), size=rows)
+    matrix = features.to_numpy()[index]
+    scale = (features.std().to_numpy() * 0.01).astype(np.float32)
+    for start in range(0, rows, chunk_rows):
+        stop = min(start + chunk_rows, rows)
+        matrix[start:stop] += (
+            rng.standard_normal((stop - start, matrix.shape[1]), dtype=np.float32)
+            * scale
+        )
+    frame = pd.DataFrame(matrix, columns=features.columns)
+    frame[LABEL_COLUMN] = pd.Categorical(labels.to_numpy()[index].astype(str))
+    return frame
+
+
+def training_parameters(base: Dict, classes: int) -> Dict:
+    """
+    Adapt the training parameters to a binary or multiclass cell.
+
+    Args:
+        base (Dict): Parameters from ``algo_parms.yaml``.
+        classes (int): Number of classes of the cell.
+
+    Returns:
+        Dict: Parameters with a matching objective and metric.
+    """
+    parameters = {k: v for k, v in base.items() if k not in ("num_class", "metric")}
+    parameters["verbose"] = -1
+    if classes == 2:
+        parameters.update(objective="binary", metric="binary_logloss")
+    else:
+        parameters.update(
+            objective="multiclass", metric="multi_logloss", num_class=classes
+        )
+    return parameters
+
+
+def matrix_cells(
+    preset: Dict, datasets: List[str]
+) -> Iterator[Tuple[str, int, Optional[int], Optional[int]]]:
+    """
+    Enumerate (dataset, rows, features, classes) cells; bundled datasets use
+    their own features and classes, shown as None.
+    """
+    for dataset in datasets:
+        for rows in preset["rows"]:
+            if dataset != SYNTHETIC:
+                yield dataset, rows, None, None
+                continue
+            for features in preset["features"]:
+                for classes in preset["classes"]:
+                    yield dataset, rows, features, classes
+
+
+class BenchmarkSuite:
+    """
+    A class to benchmark splitting, training, evaluation and scoring on one data cell.
+
+    Every case runs ``repeat`` times, or until ``max_case_seconds`` is spent,
+    and reports the median time, the throughput in rows per second and the
+    peak RSS and its growth over the RSS at the start of the case. Training
+    runs a fixed number of rounds, so its time does not depend on early
+    stopping. Scoring goes through ``score.run`` with the prediction cache
+    disabled, so repeated rows are predicted again.
+    """
+
+    CASES = ("split", "train", "evaluate", "score")
+
+    def __init__(
+        self,
+        cases: Tuple[str, ...] = CASES,
+        repeat: int = 3,
+        max_case_seconds: float = 60.0,
+        rounds: int = 50,
+        score_batch: int = 100,
+        score_requests: int = 50,
+    ):
+        unknown = set(cases) - set(self.CASES)
+        if unknown:
+            raise ValueError(f"Unknown benchmark cases {sorted(unknown)}")
+        self.cases = cases
+        self.repeat = repeat
+        self.max_case_seconds = max_case_seconds
+        self.rounds = rounds
+        self.score_batch = score_batch
+        self.score_requests = score_requests
+
+    def _measure(
+        self,
+        name: str,
+        fn: Callable,
+        rows: int,
+        setup: Optional[Callable] = None,
+    ) -> Tuple[Dict, object]:
+        """
+        Time ``fn(setup())`` repeatedly; setup runs outside the timed span.
+
+        Returns:
+            Tuple[Dict, object]: The measurements and the last result of ``fn``.
+        """
+        seconds, peaks, growths = [], [], []
+        result = None
+        spent = 0.0
+        for _ in range(self.repeat):
+            argument = setup() if setup is not None else None
+            profiler = StageProfiler()
+            with profiler.stage(name) as span:
+                result = fn(argument) if setup is not None else fn()
+            seconds.append(span["wall_s"])
+            peaks.append(span["peak_rss_mb"])
+            growths.append(span["peak_rss_mb"] - span["start_rss_mb"])
+            spent += span["wall_s"]
+            if spent >= self.max_case_seconds:
+                break
+        median = statistics.median(seconds)
+        return {
+            "seconds": median,
+            "min_seconds": min(seconds),
+            "runs": len(seconds),
+            "rows_per_s": rows / median if median > 0 else float("inf"),
+            "peak_rss_mb": max(peaks),
+            "rss_growth_mb": max(growths),
+        }, result
+
+    def run(self, frame: pd.DataFrame, parameters: Dict) -> Dict[str, Dict]:
+        """
+        Run the cases on one data cell.
+
+        Args:
+            frame (pd.DataFrame): Features and the ``Class`` label.
+            parameters (Dict): LightGBM training parameters.
+
+        Returns:
+            Dict[str, Dict]: Measurements by case.
+        """
+        results = {}
+        splitter = DataSplitter(label_column=LABEL_COLUMN, parameters=parameters)
+        trainer = ModelTrainer(
+            parameters, num_boost_round=self.rounds, early_stopping_rounds=self.rounds
+        )
+
+        results["split"], data = self._measure(
+            "split", lambda: splitter.split(frame), len(frame)
+        )
+        valid_rows = len(data[1].data)
+        if set(self.cases) & {"train", "evaluate", "score"}:
+            # Every run bins a freshly split Dataset, as the pipeline does
+            results["train"], model = self._measure(
+                "train",
+                trainer.train,
+                len(frame) - valid_rows,
+                setup=lambda: splitter.split(frame),
+            )
+        if "evaluate" in self.cases:
+            results["evaluate"], _ = self._measure(
+                "evaluate", lambda: ModelTrainer.evaluate(model, data), valid_rows
+            )
+        if "score" in self.cases:
+            results["score"] = self._score(model, data)
+        return {case: results[case] for case in self.cases if case in results}
+
+    def _score(self, model: lightgbm.Booster, data) -> Dict:
+        """
+        Time ``score.run`` on JSON requests of validation rows.
+        """
+        if DEPLOY_DIR not in sys.path:
+            sys.path.insert(0, DEPLOY_DIR)
+        os.environ.setdefault("PREDICTION_CACHE_MAX_MB", "0")
+        import score
+        from tree_predictor import TreeEnsemblePredictor
+
+        valid = data[1].data
+        batches = max(1, min(self.score_requests, len(valid) // self.score_batch))
+        payloads = [
+            json.dumps(
+                {
+                    "data": valid.iloc[
+                        i * self.score_batch : (i + 1) * self.score_batch
+                    ].to_dict(orient="records")
+                }
+            )
+            for i in range(batches)
+        ]
+        rows = min(len(valid), batches * self.score_batch)
+
+        with tempfile.TemporaryDirectory() as model_dir:
+            outputs = os.path.join(model_dir, "outputs")
+            os.makedirs(outputs)
+            model.save_model(os.path.join(outputs, "model.txt"))
+            with open(os.path.join(outputs, "unique_labels.json"), "w") as f:
+                json.dump({"unique_labels": [str(v) for v in data[2]]}, f)
+            try:
+                ModelExporter(predictor=TreeEnsemblePredictor).export(
+                    model, os.path.join(outputs, "compiled_model"), sample=valid
+                )
+            except ValueError as e:
+                logging.warning(f"Scoring the Booster without a compiled model: {e}")
+            os.environ["AZUREML_MODEL_DIR"] = model_dir
+            score.init()
+
+            def score_all():
+                for payload in payloads:
+                    response = json.loads(score.run(payload))
+                    if "error" in response:
+                        raise RuntimeError(f"score.run failed: {response['error']}")
+
+            try:
+                measured, _ = self._measure("score", score_all, rows)
+            finally:
+                score.registry.close()
+        measured["ms_per_request"] = measured["seconds"] * 1000 / len(payloads)
+        return measured
+
+
+def cell_id(dataset: str, rows: int, features: int, classes: int) -> str:
+    return f"{dataset}/rows={rows}/features={features}/classes={classes}"
+
+
+def environment() -> Dict:
+    """
+    Describe the machine and library versions the results were measured with.
+    """
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "lightgbm": lightgbm.__version__,
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+    }
+
+
+def compare_to_baseline(
+    results: Dict,
+    baseline: Dict,
+    tolerance: float,
+    memory_tolerance: float,
+    min_seconds: float = 0.005,
+    min_mb: float = 10.0,
+) -> List[str]:
+    """
+    Return the regressions of the results against a baseline results file.
+
+    Cases missing from either side are not compared. Differences smaller
+    than ``min_seconds`` or ``min_mb`` are treated as noise.
+
+    Args:
+        results (Dict): Results of this run, keyed by case id.
+        baseline (Dict): Baseline results, keyed by case id.
+        tolerance (float): Allowed relative slowdown.
+        memory_tolerance (float): Allowed relative growth of the RSS growth.
+        min_seconds (float): Smallest slowdown reported.
+        min_mb (float): Smallest memory growth reported.
+
+    Returns:
+        List[str]: One message per regression.
+    """
+    failures = []
+    for key, measured in results.items():
+        reference = baseline.get(key)
+        if reference is None:
+            continue
+        limit = reference["seconds"] * (1 + tolerance)
+        if (
+            measured["seconds"] > limit
+            and measured["seconds"] - reference["seconds"] > min_seconds
+        ):
+            failures.append(
+                f"{key}: {measured['seconds']:.4f}s > {limit:.4f}s "
+                f"(baseline {reference['seconds']:.4f}s)"
+            )
+        limit = reference["rss_growth_mb"] * (1 + memory_tolerance)
+        if (
+            measured["rss_growth_mb"] > limit
+            and measured["rss_growth_mb"] - reference["rss_growth_mb"] > min_mb
+        ):
+            failures.append(
+                f"{key}: RSS growth {measured['rss_growth_mb']:.1f} MB > {limit:.1f} MB"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser("benchmarks")
+    parser.add_argument(
+        "--preset",
+        type=str,
+        default="small",
+        choices=sorted(PRESETS),
+        help="Row, feature and class counts to benchmark",
+    )
+    parser.add_argument(
+        "--rows", type=str, default=None, help="Comma-separated row counts (overrides)"
+    )
+    parser.add_argument(
+        "--features",
+        type=str,
+        default=None,
+        help="Comma-separated synthetic feature counts (overrides)",
+    )
+    parser.add_argument(
+        "--classes",
+        type=str,
+        default=None,
+        help="Comma-separated synthetic class counts (overrides)",
+    )
+    parser.add_argument(
+        "--datasets",
+        type=str,
+        default=",".join([*DATASETS, SYNTHETIC]),
+        help="Comma-separated datasets: fruit, insurance, synthetic",
+    )
+    parser.add_argument(
+        "--cases",
+        type=str,
+        default=",".join(BenchmarkSuite.CASES),
+        help="Comma-separated cases: split, train, evaluate, score",
+    )
+    parser.add_argument(
+        "--parameters_file",
+        type=str,
+        default=os.path.join(REPO_ROOT, "yml_files", "algo_parms.yaml"),
+        help="YAML file with the training parameters",
+    )
+    parser.add_argument("--rounds", type=int, default=50, help="Boosting rounds")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case")
+    parser.add_argument(
+        "--max_case_seconds",
+        type=float,
+        default=60.0,
+        help="Stop repeating a case after this many seconds",
+    )
+    parser.add_argument(
+        "--score_batch", type=int, default=100, help="Rows per score.run request"
+    )
+    parser.add_argument(
+        "--score_requests", type=int, default=50, help="score.run requests per run"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Data generation seed")
+    parser.add_argument(
+        "--output",
+        type=str,
+        default="benchmark_results.json",
+        help="Results JSON path",
+    )
+    parser.add_argument(
+        "--baseline", type=str, default=None, help="Results JSON to gate against"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="Allowed relative slowdown"
+    )
+    parser.add_argument(
+        "--memory_tolerance",
+        type=float,
+        default=0.2,
+        help="Allowed relative growth of the RSS growth of a case",
+    )
+    args = parser.parse_args()
+
+    preset = dict(PRESETS[args.preset])
+    for key in ("rows", "features", "classes"):
+        if getattr(args, key):
+            preset[key] = [int(v) for v in getattr(args, key).split(",")]
+    datasets = args.datasets.split(",")
+    unknown = set(datasets) - {*DATASETS, SYNTHETIC}
+    if unknown:
+        parser.error(f"unknown datasets {sorted(unknown)}")
+
+    with open(args.parameters_file, errors="ignore") as f:
+        base_parameters = yaml.safe_load(f)["training"]
+    suite = BenchmarkSuite(
+        cases=tuple(args.cases.split(",")),
+        repeat=args.repeat,
+        max_case_seconds=args.max_case_seconds,
+        rounds=args.rounds,
+        score_batch=args.score_batch,
+        score_requests=args.score_requests,
+    )
+
+    results = {}
+    started = time.time()
+    for dataset, rows, features, classes in matrix_cells(preset, datasets):
+        if dataset == SYNTHETIC:
+            frame = synthetic_frame(rows, features, classes, seed=args.seed)
+        else:
+            frame = resampled_frame(dataset, rows, seed=args.seed)
+            features = frame.shape[1] - 1
+            classes = frame[LABEL_COLUMN].nunique()
+        cell = cell_id(dataset, rows, features, classes)
+        logging.info(f"Benchmarking {cell}")
+        measured = suite.run(frame, training_parameters(base_parameters, classes))
+        for case, values in measured.items():
+            results[f"{cell}/{case}"] = values
+            logging.info(
+                f"{cell}/{case}: {values['seconds']:.4f}s, "
+                f"{values['rows_per_s']:.0f} rows/s, "
+                f"RSS +{values['rss_growth_mb']:.1f} MB"
+            )
+        del frame
+
+    report = {
+        "environment": environment(),
+        "config": {**vars(args), **preset},
+        "duration_s": time.time() - started,
+        "results": results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Benchmark results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != report["environment"]:
+            logging.warning(
+                "The baseline was measured in another environment: "
+                f"{baseline.get('environment')}"
+            )
+        failures = compare_to_baseline(
+            results, baseline["results"], args.tolerance, args.memory_tolerance
+        )
+        for failure in failures:
+            logging.error(f"REGRESSION: {failure}")
+        sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import os
+import logging
+import numpy as np
+from joblib import Parallel, delayed
+from typing import Dict, Sequence, Tuple
+
+from classification.metrics import as_class_scores
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def _weighted_auc(counts: np.ndarray, scores: np.ndarray, positive: np.ndarray):
+    """
+    AUC of one class under every resample at once.
+
+    A bootstrap resample is a vector of row multiplicities, so the rank-sum AUC
+    becomes a weighted sum over groups of tied scores, which is computed for
+    all resamples with one sort of the scores.
+
+    Args:
+        counts (np.ndarray): (B, n) row multiplicities of B resamples.
+        scores (np.ndarray): (n,) scores of the class.
+        positive (np.ndarray): (n,) mask of rows belonging to the class.
+
+    Returns:
+        np.ndarray: (B,) AUC per resample.
+    """
+    order = np.argsort(scores, kind="stable")
+    sorted_scores = scores[order]
+    starts = np.flatnonzero(np.r_[True, sorted_scores[1:] != sorted_scores[:-1]])
+
+    weights = counts[:, order]
+    is_positive = positive[order]
+    group_pos = np.add.reduceat(weights * is_positive, starts, axis=1)
+    group_neg = np.add.reduceat(weights * ~is_positive, starts, axis=1)
+    negatives_below = np.cumsum(group_neg, axis=1) - group_neg
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (group_pos * (negatives_below + 0.5 * group_neg)).sum(axis=1) / (
+            group_pos.sum(axis=1) * group_neg.sum(axis=1)
+        )
+
+
+def _bootstrap_chunk(
+    probabilities: np.ndarray,
+    labels: np.ndarray,
+    unique_labels: Sequence,
+    n_resamples: int,
+    seed: np.random.SeedSequence,
+    n_bins: int = 15,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute every metric for a chunk of resamples, vectorized over the resamples.
+
+    Returns:
+        Dict[str, np.ndarray]: (n_resamples,) values per metric key.
+    """
+    n = len(labels)
+    rng = np.random.default_rng(seed)
+    # Row multiplicities of each resample, i.e. a bincount of n draws with replacement
+    draws = rng.integers(0, n, size=(n_resamples, n))
+    draws += (np.arange(n_resamples) * n)[:, None]
+    counts = np.bincount(draws.ravel(), minlength=n_resamples * n)
+    counts = counts.reshape(n_resamples, n).astype(np.float64)
+
+    binary = probabilities.ndim == 1
+    scores = as_class_scores(probabilities)
+    num_classes = scores.shape[1]
+    rows = np.arange(n)
+    if binary:
+        predicted = (probabilities >= 0.5).astype(np.int64)
+    else:
+        predicted = np.argmax(scores, axis=1)
+    correct = (predicted == labels).astype(np.float64)
+    true_onehot = np.eye(num_classes)[labels]
+    predicted_onehot = np.eye(num_classes)[predicted]
+
+    resampled = {"accuracy": counts @ correct / n}
+
+    if binary:
+        resampled["auc"] = _weighted_auc(counts, probabilities, labels == 1)
+    else:
+        aucs = []
+        for i in range(num_classes):
+            aucs.append(_weighted_auc(counts, scores[:, i], labels == i))
+            resampled[f"auc_class_{unique_labels[i]}"] = aucs[-1]
+        resampled["auc_macro"] = np.nanmean(np.stack(aucs), axis=0)
+
+    true_positives = counts @ (true_onehot * correct[:, None])
+    support = counts @ true_onehot
+    predicted_count = counts @ predicted_onehot
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f1 = np.nan_to_num(2 * true_positives / (support + predicted_count))
+    resampled["f1_macro"] = f1.mean(axis=1)
+    resampled["f1_weighted"] = (f1 * support).sum(axis=1) / support.sum(axis=1)
+
+    if binary:
+        true_proba = np.where(labels == 1, probabilities, 1 - probabilities)
+    else:
+        true_proba = probabilities[rows, labels]
+    negative_log = -np.log(np.clip(true_proba, 1e-15, 1 - 1e-15))
+    resampled["logloss"] = counts @ negative_log / n
+
+    top = np.argmax(scores, axis=1)
+    confidence = scores[rows, top].astype(np.float64)
+    bin_onehot = np.eye(n_bins)[
+        np.minimum((confidence * n_bins).astype(np.int64), n_bins - 1)
+    ]
+    top_correct = (top == labels).astype(np.float64)
+    confidence_sums = counts @ (bin_onehot * confidence[:, None])
+    correct_sums = counts @ (bin_onehot * top_correct[:, None])
+    resampled["calibration_error"] = (
+        np.abs(correct_sums - confidence_sums).sum(axis=1) / n
+    )
+    return resampled
+
+
+class BootstrapEvaluator:
+    """
+    A class to compute bootstrap confidence intervals of the evaluation metrics.
+
+    Validation rows are resampled with replacement while the prediction matrix
+    is computed once and reused. Each resample is expressed as row
+    multiplicities, so a chunk of resamples is evaluated with a few matrix
+    products, and chunks run in parallel worker processes.
+    """
+
+    def __init__(
+        self,
+        n_resamples: int = 1000,
+        confidence: float = 0.95,
+        n_jobs: int = -1,
+        random_state: int = 0,
+        max_chunk_cells: int = 20_000_000,
+    ):
+        self.n_resamples = n_resamples
+        self.confidence = confidence
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.max_chunk_cells = max_chunk_cells
+
+    def run(
+        self,
+        probabilities: np.ndarray,
+        labels: np.ndarray,
+        unique_labels: Sequence,
+    ) -> Dict[str, Tuple[float, float]]:
+        """
+        Compute confidence intervals for every metric of ``classification_metrics``.
+
+        Args:
+            probabilities (np.ndarray): (n,) positive-class scores or (n, k) class probabilities.
+            labels (np.ndarray): (n,) integer class codes.
+            unique_labels (Sequence): Class names indexed by class code.
+
+        Returns:
+            Dict[str, Tuple[float, float]]: Lower and upper bound per metric key.
+        """
+        try:
+            labels = np.asarray(labels, dtype=np.int64)
+            n = len(labels)
+            # Bound the (resamples x rows) multiplicity matrix held by each worker
+            chunk_size = int(max(1, min(100, self.max_chunk_cells // max(n, 1))))
+            sizes = [
+                min(chunk_size, self.n_resamples - start)
+                for start in range(0, self.n_resamples, chunk_size)
+            ]
+            seeds = np.random.SeedSequence(self.random_state).spawn(len(sizes))
+            n_jobs = min(len(sizes), self.n_jobs if self.n_jobs > 0 else os.cpu_count())
+
+            chunks = Parallel(n_jobs=n_jobs)(
+                delayed(_bootstrap_chunk)(
+                    probabilities, labels, list(unique_labels), size, seed
+                )
+                for size, seed in zip(sizes, seeds)
+            )
+
+            alpha = (1 - self.confidence) / 2
+            intervals = {}
+            for key in chunks[0]:
+                values = np.concatenate([chunk[key] for chunk in chunks])
+                lower, upper = np.nanquantile(values, [alpha, 1 - alpha])
+                intervals[key] = (float(lower), float(upper))
+            logging.info(
+                f"Bootstrap intervals from {self.n_resamples} resamples of {n} rows: "
+                f"accuracy {intervals['accuracy'][0]:.4f}-{intervals['accuracy'][1]:.4f}"
+            )
+            return intervals
+        except Exception as e:
+            logging.error(f"Error computing bootstrap intervals: {e}")
+            raise
+
+    @staticmethod
+    def flatten(intervals: Dict[str, Tuple[float, float]]) -> Dict[str, float]:
+        """
+        Flatten intervals into MLflow metric names next to the point estimates.
+
+        Args:
+            intervals (Dict[str, Tuple[float, float]]): Output of ``BootstrapEvaluator.run``.
+
+        Returns:
+            Dict[str, float]: ``<metric>_ci_lower`` and ``<metric>_ci_upper`` values.
+        """
+        flat = {}
+        for key, (lower, upper) in intervals.items():
+            flat[f"{key}_ci_lower"] = lower
+            flat[f"{key}_ci_upper"] = upper
+        return flat
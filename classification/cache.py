@@ -0,0 +1,350 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import lightgbm
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+# LightGBM parameters (and their aliases) that change how a Dataset is binned
+BINNING_PARAMS = (
+    "max_bin",
+    "max_bins",
+    "max_bin_by_feature",
+    "min_data_in_bin",
+    "bin_construct_sample_cnt",
+    "subsample_for_bin",
+    "data_random_seed",
+    "data_seed",
+    "feature_pre_filter",
+    "min_data_in_leaf",
+    "min_data",
+    "min_data_per_leaf",
+    "min_child_samples",
+    "use_missing",
+    "zero_as_missing",
+    "categorical_feature",
+    "categorical_column",
+    "cat_feature",
+    "categorical_features",
+    "linear_tree",
+    "enable_bundle",
+    "is_enable_bundle",
+    "bundle",
+    "forcedbins_filename",
+)
+
+# Passed on to Datasets with the binning parameters, but they only set the log level
+LOG_PARAMS = ("verbose", "verbosity")
+
+
+def binning_params(parameters: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Select the training parameters that affect Dataset construction.
+
+    Args:
+        parameters (Dict[str, Any]): Full LightGBM training parameters.
+
+    Returns:
+        Dict[str, Any]: The subset of parameters relevant to binning, plus the log level.
+    """
+    return {
+        k: v for k, v in parameters.items() if k in BINNING_PARAMS or k in LOG_PARAMS
+    }
+
+
+def file_digest(path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
+    """
+    Compute a content hash of a file by streaming it in fixed-size chunks.
+
+    Args:
+        path (str): Path of the file to hash.
+        chunk_size (int): Number of bytes read per iteration.
+
+    Returns:
+        str: Hex digest of the file content.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    # Category values of numeric categorical columns are numpy scalars
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class DataCache:
+    """
+    A class to cache parsed CSV inputs in a columnar binary format.
+
+    The first load of a source file parses the CSV and writes the resulting
+    dataframe next to a small JSON manifest. Later loads reuse the binary copy
+    as long as the source is unchanged: a matching size and mtime is trusted
+    directly, otherwise the content hash decides.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+        self.format = self._select_format()
+        self.hits = 0
+        self.misses = 0
+        self.time_saved = 0.0
+
+    @staticmethod
+    def _select_format() -> str:
+        """
+        Pick Parquet when a Parquet engine is installed, else fall back to pickle.
+
+        Returns:
+            str: Either "parquet" or "pickle".
+        """
+        try:
+            import pyarrow  # noqa: F401
+
+            return "parquet"
+        except ImportError:
+            return "pickle"
+
+    def _paths(self, source: str, variant: str) -> Dict[str, str]:
+        """
+        Build the manifest and data paths of a cache entry.
+
+        Args:
+            source (str): Path of the source CSV file.
+            variant (str): Extra key distinguishing different readers of one source.
+
+        Returns:
+            Dict[str, str]: Paths of the manifest and the cached data file.
+        """
+        key = f"{os.path.abspath(source)}|{variant}"
+        name = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        extension = "parquet" if self.format == "parquet" else "pkl"
+        return {
+            "manifest": os.path.join(self.cache_dir, f"{name}.json"),
+            "data": os.path.join(self.cache_dir, f"{name}.{extension}"),
+        }
+
+    @staticmethod
+    def _read_manifest(path: str) -> Optional[Dict]:
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _is_fresh(self, source: str, manifest: Optional[Dict], data_path: str) -> bool:
+        """
+        Check whether a cache entry still matches its source file.
+
+        Args:
+            source (str): Path of the source CSV file.
+            manifest (Optional[Dict]): Stored manifest, if any.
+            data_path (str): Path of the cached data file.
+
+        Returns:
+            bool: True when the cached data can be reused.
+        """
+        if manifest is None or not os.path.exists(data_path):
+            return False
+        if manifest.get("format") != self.format:
+            return False
+
+        stat = os.stat(source)
+        if stat.st_size != manifest["size"]:
+            return False
+        if stat.st_mtime_ns == manifest["mtime_ns"]:
+            return True
+
+        # Same size but touched since: only the content hash can tell
+        return file_digest(source) == manifest["hash"]
+
+    def load(
+        self,
+        source: str,
+        reader: Callable[[str], pd.DataFrame] = pd.read_csv,
+        variant: str = "",
+    ) -> pd.DataFrame:
+        """
+        Load a CSV file, reusing the cached binary copy when the source is unchanged.
+
+        Args:
+            source (str): Path of the source CSV file.
+            reader (Callable[[str], pd.DataFrame]): Function parsing the source on a miss.
+            variant (str): Extra key for readers producing different frames from one source.
+
+        Returns:
+            pd.DataFrame: The loaded dataframe.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        paths = self._paths(source, variant)
+        manifest = self._read_manifest(paths["manifest"])
+
+        if self._is_fresh(source, manifest, paths["data"]):
+            start = time.perf_counter()
+            if self.format == "parquet":
+                df = pd.read_parquet(paths["data"])
+            else:
+                df = pd.read_pickle(paths["data"])
+            elapsed = time.perf_counter() - start
+            saved = max(manifest["parse_seconds"] - elapsed, 0.0)
+            self.hits += 1
+            self.time_saved += saved
+            logging.info(
+                f"Data cache hit for {source}: loaded in {elapsed:.3f}s, "
+                f"saved {saved:.3f}s of parsing (hits={self.hits}, misses={self.misses})."
+            )
+            return df
+
+        start = time.perf_counter()
+        df = reader(source)
+        parse_seconds = time.perf_counter() - start
+        self.misses += 1
+        logging.info(
+            f"Data cache miss for {source}: parsed in {parse_seconds:.3f}s "
+            f"(hits={self.hits}, misses={self.misses})."
+        )
+
+        try:
+            stat = os.stat(source)
+            tmp_path = f"{paths['data']}.tmp"
+            if self.format == "parquet":
+                df.to_parquet(tmp_path, index=False)
+            else:
+                df.to_pickle(tmp_path)
+            os.replace(tmp_path, paths["data"])
+
+            manifest = {
+                "source": os.path.abspath(source),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "hash": file_digest(source),
+                "format": self.format,
+                "parse_seconds": parse_seconds,
+            }
+            with open(paths["manifest"], "w") as f:
+                json.dump(manifest, f)
+        except Exception as e:
+            # A failed cache write must never fail the training job
+            logging.warning(f"Could not write data cache for {source}: {e}")
+
+        return df
+
+
+class DatasetCache:
+    """
+    A class to persist constructed (binned) LightGBM training Datasets.
+
+    Entries are stored in LightGBM's binary format and keyed by a hash of the
+    input frame, the split settings and the binning parameters, so repeated
+    runs and parameter sweeps load the bins instead of recomputing them.
+    The binary format does not keep the category lists of pandas categorical
+    columns, so they are saved next to it as JSON and restored on load;
+    without them the trained model would not record its category mapping.
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(
+        data_df: pd.DataFrame, split_settings: Dict[str, Any], parameters: Dict
+    ) -> str:
+        """
+        Build the cache key of a training Dataset.
+
+        Args:
+            data_df (pd.DataFrame): The full input dataframe.
+            split_settings (Dict[str, Any]): Label column, test size and split seed.
+            parameters (Dict): LightGBM training parameters.
+
+        Returns:
+            str: Hex key identifying the binned Dataset.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(",".join(map(str, data_df.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(data_df, index=False).values.tobytes())
+        binning = {k: v for k, v in parameters.items() if k in BINNING_PARAMS}
+        settings = {"split": split_settings, "binning": binning}
+        digest.update(json.dumps(settings, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.train.bin")
+
+    def _categories_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.categories.json")
+
+    def load(self, key: str, parameters: Dict) -> Optional[lightgbm.Dataset]:
+        """
+        Load a cached training Dataset.
+
+        Args:
+            key (str): Cache key from ``DatasetCache.key``.
+            parameters (Dict): LightGBM training parameters.
+
+        Returns:
+            Optional[lightgbm.Dataset]: The constructed Dataset, or None on a miss.
+        """
+        path = self._path(key)
+        categories_path = self._categories_path(key)
+        if not (os.path.exists(path) and os.path.exists(categories_path)):
+            logging.info(f"Dataset cache miss for key {key}.")
+            return None
+
+        start = time.perf_counter()
+        try:
+            with open(categories_path) as f:
+                pandas_categorical = json.load(f)["pandas_categorical"]
+            dataset = lightgbm.Dataset(path, params=binning_params(parameters))
+            dataset.construct()
+        except Exception as e:
+            # A truncated or corrupt entry is rebuilt, never a failed training job
+            logging.warning(f"Could not read dataset cache entry {key}: {e}")
+            return None
+        # Passed on to the Booster and used to code the validation frame
+        dataset.pandas_categorical = pandas_categorical
+        logging.info(
+            f"Dataset cache hit for key {key}: loaded binned training data "
+            f"in {time.perf_counter() - start:.3f}s."
+        )
+        return dataset
+
+    def save(self, key: str, dataset: lightgbm.Dataset):
+        """
+        Construct a training Dataset and save it in LightGBM's binary format.
+
+        Args:
+            key (str): Cache key from ``DatasetCache.key``.
+            dataset (lightgbm.Dataset): The training Dataset to persist.
+        """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            dataset.construct()
+            tmp_path = f"{self._path(key)}.tmp"
+            dataset.save_binary(tmp_path)
+            os.replace(tmp_path, self._path(key))
+            # Written last: an entry without its categories is a miss
+            tmp_path = f"{self._categories_path(key)}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    {"pandas_categorical": dataset.pandas_categorical},
+                    f,
+                    default=_json_default,
+                )
+            os.replace(tmp_path, self._categories_path(key))
+            logging.info(f"Saved binned training data to the dataset cache ({key}).")
+        except Exception as e:
+            logging.warning(f"Could not write dataset cache entry {key}: {e}")
@@ -0,0 +1,229 @@
+import os
+import glob
+import json
+import time
+import hashlib
+import logging
+import lightgbm
+from lightgbm.callback import EarlyStopException
+from typing import Any, Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+STATE_FILE = "checkpoint_state.json"
+
+
+class ResumableEarlyStopping:
+    """
+    A class to stop boosting when no validation metric improves, with restorable state.
+
+    Behaves like ``lightgbm.callback.early_stopping``: training stops once a
+    metric has not improved for ``stopping_rounds`` rounds, or at the last
+    round, with the best iteration of that metric. Its progress is a plain
+    dict, saved with every checkpoint and passed back on resume, so a resumed
+    run stops at the same round as an uninterrupted one.
+    """
+
+    order = 30
+    before_iteration = False
+
+    def __init__(self, stopping_rounds: int, state: Optional[Dict] = None):
+        self.stopping_rounds = stopping_rounds
+        state = state or {}
+        self.best_score: List[float] = state.get("best_score", [])
+        self.best_iter: List[int] = state.get("best_iter", [])
+        self.best_score_list: List[List] = state.get("best_score_list", [])
+
+    def state(self) -> Dict[str, Any]:
+        """
+        Best score, iteration and evaluation results of every metric so far.
+        """
+        return {
+            "best_score": self.best_score,
+            "best_iter": self.best_iter,
+            "best_score_list": self.best_score_list,
+        }
+
+    def __call__(self, env):
+        results = env.evaluation_result_list
+        if not results:
+            raise ValueError("Early stopping needs at least one validation set")
+        if not self.best_score:
+            self.best_score = [None] * len(results)
+            self.best_iter = [0] * len(results)
+            self.best_score_list = [None] * len(results)
+
+        for i, (_, _, score, higher_better) in enumerate(results):
+            best = self.best_score[i]
+            if best is None or (score > best if higher_better else score < best):
+                self.best_score[i] = score
+                self.best_iter[i] = env.iteration
+                self.best_score_list[i] = [list(result) for result in results]
+            elif env.iteration - self.best_iter[i] >= self.stopping_rounds:
+                logging.info(
+                    f"Early stopping, best iteration is {self.best_iter[i] + 1}"
+                )
+                raise EarlyStopException(self.best_iter[i], self.best_score_list[i])
+            if env.iteration == env.end_iteration - 1:
+                raise EarlyStopException(self.best_iter[i], self.best_score_list[i])
+
+
+class TrainingCheckpoint:
+    """
+    A class to checkpoint boosting progress so a preempted training run can resume.
+
+    Used as a LightGBM callback, it writes the model and a JSON state (rounds
+    done, early-stopping progress, run key) every ``every_rounds`` rounds or
+    ``every_seconds`` seconds, whichever comes first. Model files are named by
+    round and the state file is replaced last, so an interruption while
+    writing leaves the previous checkpoint intact. A checkpoint is only
+    resumed by a run with the same key, built from the training parameters
+    and the input data.
+
+    Resuming continues the same boosting through ``init_model``; row and
+    feature sampling restarts its random draws, so the model can differ
+    slightly from an uninterrupted run.
+    """
+
+    order = 40
+    before_iteration = False
+
+    def __init__(
+        self,
+        checkpoint_dir: str,
+        run_key: str,
+        every_rounds: int = 50,
+        every_seconds: float = 600.0,
+    ):
+        self.checkpoint_dir = checkpoint_dir
+        self.run_key = run_key
+        self.every_rounds = every_rounds
+        self.every_seconds = every_seconds
+        self.early_stopping: Optional[ResumableEarlyStopping] = None
+        self._last_round = 0
+        self._last_time = time.monotonic()
+
+    @staticmethod
+    def key(parameters: Dict, **settings) -> str:
+        """
+        Build the run key of a training run.
+
+        Args:
+            parameters (Dict): LightGBM training parameters.
+            **settings: Anything else that changes the model, e.g. the input digest.
+
+        Returns:
+            str: Hex key identifying the run.
+        """
+        digest = hashlib.blake2b(digest_size=16)
+        digest.update(
+            json.dumps(
+                {"parameters": parameters, "settings": settings},
+                sort_keys=True,
+                default=str,
+            ).encode()
+        )
+        return digest.hexdigest()
+
+    def _state_path(self) -> str:
+        return os.path.join(self.checkpoint_dir, STATE_FILE)
+
+    def load(self) -> Optional[Dict]:
+        """
+        Read the latest checkpoint of this run.
+
+        Returns:
+            Optional[Dict]: The state, with ``model_path`` the model to resume
+            from, or None when there is no matching checkpoint.
+        """
+        try:
+            with open(self._state_path()) as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logging.warning(f"Ignoring unreadable checkpoint state: {e}")
+            return None
+
+        if state.get("run_key") != self.run_key:
+            logging.info(
+                "Ignoring checkpoint of a run with other parameters or input data."
+            )
+            return None
+        state["model_path"] = os.path.join(self.checkpoint_dir, state["model_file"])
+        if not os.path.exists(state["model_path"]):
+            logging.warning(f"Checkpoint model {state['model_path']} is missing.")
+            return None
+        self._last_round = state["iteration"]
+        return state
+
+    def save(self, model: lightgbm.Booster, iteration: int):
+        """
+        Write a checkpoint after ``iteration`` boosting rounds.
+
+        Args:
+            model (lightgbm.Booster): The model being trained.
+            iteration (int): Number of boosting rounds done.
+        """
+        try:
+            start = time.perf_counter()
+            os.makedirs(self.checkpoint_dir, exist_ok=True)
+            model_file = f"checkpoint_{iteration:06d}.txt"
+            model_path = os.path.join(self.checkpoint_dir, model_file)
+            # Every tree, not only up to the best iteration, so boosting can continue
+            model.save_model(f"{model_path}.tmp", num_iteration=-1)
+            os.replace(f"{model_path}.tmp", model_path)
+
+            state = {
+                "run_key": self.run_key,
+                "iteration": iteration,
+                "model_file": model_file,
+                "early_stopping": (
+                    self.early_stopping.state() if self.early_stopping else None
+                ),
+                "saved_at": time.time(),
+            }
+            with open(f"{self._state_path()}.tmp", "w") as f:
+                json.dump(state, f)
+            os.replace(f"{self._state_path()}.tmp", self._state_path())
+
+            for path in glob.glob(
+                os.path.join(self.checkpoint_dir, "checkpoint_*.txt")
+            ):
+                if os.path.basename(path) != model_file:
+                    os.remove(path)
+            logging.info(
+                f"Checkpoint saved after {iteration} rounds "
+                f"in {time.perf_counter() - start:.2f}s."
+            )
+        except Exception as e:
+            # A failed checkpoint must not fail the training run
+            logging.warning(f"Could not save checkpoint: {e}")
+
+    def __call__(self, env):
+        rounds = env.iteration + 1
+        if rounds >= env.end_iteration:
+            # The run is finishing; its model is saved by the pipeline
+            return
+        due_rounds = self.every_rounds > 0 and (
+            rounds - self._last_round >= self.every_rounds
+        )
+        due_time = self.every_seconds > 0 and (
+            time.monotonic() - self._last_time >= self.every_seconds
+        )
+        if due_rounds or due_time:
+            self.save(env.model, rounds)
+            self._last_round = rounds
+            self._last_time = time.monotonic()
+
+    def clear(self):
+        """
+        Delete the checkpoint files once the run's outputs are saved.
+        """
+        for path in glob.glob(os.path.join(self.checkpoint_dir, "checkpoint_*")):
+            os.remove(path)
+        if os.path.isdir(self.checkpoint_dir) and not os.listdir(self.checkpoint_dir):
+            os.rmdir(self.checkpoint_dir)
@@ -1,13 +1,16 @@
+import os
+import json
 import numpy as np
 import pandas as pd
-from sklearn import metrics
 from sklearn.model_selection import train_test_split
 import lightgbm
 import logging
-from lightgbm.callback import early_stopping
-from typing import Tuple, Dict
+from typing import Iterable, List, Sequence, Tuple, Dict, Optional
 
-from sklearn.preprocessing import label_binarize
+from classification.bootstrap import BootstrapEvaluator
+from classification.cache import DatasetCache, binning_params
+from classification.checkpoint import ResumableEarlyStopping, TrainingCheckpoint
+from classification.metrics import StreamingMetrics, classification_metrics
 
 # Configure logging
 logging.basicConfig(
@@ -20,8 +23,21 @@ class DataSplitter:
     A class to handle splitting data into training and validation sets.
     """
 
-    @staticmethod
-    def split(data_df: pd.DataFrame) -> Tuple[lightgbm.Dataset, lightgbm.Dataset]:
+    def __init__(
+        self,
+        label_column: str = "Class",
+        test_size: float = 0.2,
+        random_state: int = 0,
+        parameters: Optional[Dict] = None,
+        dataset_cache: Optional[DatasetCache] = None,
+    ):
+        self.label_column = label_column
+        self.test_size = test_size
+        self.random_state = random_state
+        self.parameters = parameters or {}
+        self.dataset_cache = dataset_cache
+
+    def split(self, data_df: pd.DataFrame) -> Tuple[lightgbm.Dataset, lightgbm.Dataset]:
         """
         Split a dataframe into training and validation datasets.
 
@@ -32,23 +48,47 @@ class DataSplitter:
             Tuple[lightgbm.Dataset, lightgbm.Dataset]: Training and validation datasets for LightGBM.
         """
         try:
+            labels, unique_labels = pd.factorize(data_df[self.label_column])
+            feature_positions = [
+                i for i, c in enumerate(data_df.columns) if c != self.label_column
+            ]
 
-            # features = data_df.drop(['target', 'id'], axis=1)
-            # labels = np.array(data_df['target'])
+            # Split row positions rather than frames so the features are copied
+            # once per subset instead of first dropping the label into a full copy
+            train_idx, valid_idx = train_test_split(
+                np.arange(len(data_df)),
+                test_size=self.test_size,
+                random_state=self.random_state,
+            )
+            train_data, cache_key = None, None
+            if self.dataset_cache is not None:
+                split_settings = {
+                    "label_column": self.label_column,
+                    "test_size": self.test_size,
+                    "random_state": self.random_state,
+                }
+                cache_key = self.dataset_cache.key(
+                    data_df, split_settings, self.parameters
+                )
+                train_data = self.dataset_cache.load(cache_key, self.parameters)
 
-            features = data_df.drop(["Class"], axis=1)
-            labels = np.array(data_df["Class"])
-            labels, unique_labels = pd.factorize(labels)
+            if train_data is None:
+                features_train = data_df.iloc[train_idx, feature_positions]
+                train_data = lightgbm.Dataset(
+                    features_train,
+                    label=labels[train_idx],
+                    params=binning_params(self.parameters),
+                )
+                if cache_key is not None:
+                    self.dataset_cache.save(cache_key, train_data)
 
-            (
-                features_train,
-                features_valid,
-                labels_train,
-                labels_valid,
-            ) = train_test_split(features, labels, test_size=0.2, random_state=0)
-            train_data = lightgbm.Dataset(features_train, label=labels_train)
+            # Validation rows are binned with the training bin mappers
+            features_valid = data_df.iloc[valid_idx, feature_positions]
             valid_data = lightgbm.Dataset(
-                features_valid, label=labels_valid, free_raw_data=False
+                features_valid,
+                label=labels[valid_idx],
+                reference=train_data,
+                free_raw_data=False,
             )
             logging.info("Data split successfully into training and validation sets.")
             return train_data, valid_data, unique_labels
@@ -60,10 +100,26 @@ class DataSplitter:
 class ModelTrainer:
     """
     A class to handle model training and evaluation.
+
+    With a ``TrainingCheckpoint``, training saves its progress periodically
+    and resumes from the run's latest checkpoint instead of starting over.
+    Extra LightGBM ``callbacks`` run every boosting round, e.g. to track the
+    validation curve.
     """
 
-    def __init__(self, parameters: Dict):
+    def __init__(
+        self,
+        parameters: Dict,
+        num_boost_round: int = 500,
+        early_stopping_rounds: int = 20,
+        checkpoint: Optional[TrainingCheckpoint] = None,
+        callbacks: Optional[List] = None,
+    ):
         self.parameters = parameters
+        self.num_boost_round = num_boost_round
+        self.early_stopping_rounds = early_stopping_rounds
+        self.checkpoint = checkpoint
+        self.callbacks = callbacks or []
 
     def train(
         self, data: Tuple[lightgbm.Dataset, lightgbm.Dataset]
@@ -79,12 +135,31 @@ class ModelTrainer:
         """
         try:
             train_data, valid_data, _ = data
+            state = self.checkpoint.load() if self.checkpoint is not None else None
+            stopper = ResumableEarlyStopping(
+                self.early_stopping_rounds,
+                state=state["early_stopping"] if state is not None else None,
+            )
+            callbacks = [stopper, *self.callbacks]
+            init_model, num_boost_round = None, self.num_boost_round
+            if state is not None:
+                init_model = state["model_path"]
+                num_boost_round -= state["iteration"]
+                logging.info(
+                    f"Resuming training after {state['iteration']} rounds "
+                    f"from {init_model}."
+                )
+            if self.checkpoint is not None:
+                self.checkpoint.early_stopping = stopper
+                callbacks.append(self.checkpoint)
+
             model = lightgbm.train(
                 self.parameters,
                 train_data,
                 valid_sets=[valid_data],
-                num_boost_round=500,
-                callbacks=[early_stopping(stopping_rounds=20)],
+                num_boost_round=num_boost_round,
+                init_model=init_model,
+                callbacks=callbacks,
             )
             logging.info("Model training completed.")
             return model
@@ -94,61 +169,42 @@ class ModelTrainer:
 
     @staticmethod
     def evaluate(
-        model: lightgbm.Booster, data: Tuple[lightgbm.Dataset, lightgbm.Dataset]
+        model: lightgbm.Booster,
+        data: Tuple[lightgbm.Dataset, lightgbm.Dataset],
+        confusion_matrix_path: Optional[str] = None,
+        bootstrap: Optional[BootstrapEvaluator] = None,
     ) -> Dict[str, float]:
         """
-        Evaluate metrics for the trained model, including accuracy and AUC.
+        Evaluate metrics for the trained model, including accuracy, AUC, F1,
+        log loss and calibration error.
         Supports both binary and multi-class classification.
 
         Args:
             model (lightgbm.Booster): The trained LightGBM model.
             data (Tuple[lightgbm.Dataset, lightgbm.Dataset]): Training and validation datasets.
+            confusion_matrix_path (Optional[str]): Where to write the confusion matrix as JSON.
+            bootstrap (Optional[BootstrapEvaluator]): Adds ``<metric>_ci_lower`` and
+                ``<metric>_ci_upper`` bootstrap bounds for every metric when given.
 
         Returns:
-            Dict[str, float]: A dictionary containing accuracy and AUC metrics.
+            Dict[str, float]: A dictionary containing the evaluation metrics.
         """
         try:
             # Get predictions and true labels
-
             predictions_proba = model.predict(data[1].data)
-            true_labels = data[1].label
+            true_labels = np.asarray(data[1].label, dtype=np.int64)
             unique_labels = data[2]
-            # Determine predicted classes
-            if predictions_proba.ndim == 1:
-                # Binary classification
-                predicted_classes = (predictions_proba >= 0.5).astype(int)
-            else:
-                # Multi-class classification
-                predicted_classes = np.argmax(predictions_proba, axis=1)
-
-            # Calculate accuracy
-            accuracy = metrics.accuracy_score(true_labels, predicted_classes)
-
-            # Get number of unique classes
-            num_classes = len(np.unique(true_labels))
-            model_metrics = {"accuracy": accuracy}
-
-            if num_classes == 2:
-                # Binary classification case
-                fpr, tpr, thresholds = metrics.roc_curve(true_labels, predictions_proba)
-                auc_score = metrics.auc(fpr, tpr)
-                model_metrics["auc"] = auc_score
-            else:
-                # Multi-class case
-                binary_labels = label_binarize(true_labels, classes=range(num_classes))
-
-                # Calculate AUC for each class
-                for i in range(num_classes):
-                    class_predictions = predictions_proba[:, i]  # Fixed for multi-class
-                    fpr, tpr, _ = metrics.roc_curve(
-                        binary_labels[:, i], class_predictions
-                    )
-                    auc_score = metrics.auc(fpr, tpr)
-                    model_metrics[f"auc_class_{unique_labels[i]}"] = auc_score
-
-                # Calculate macro-average AUC
-                model_metrics["auc_macro"] = np.mean(
-                    [v for k, v in model_metrics.items() if "auc_class_" in k]
+
+            model_metrics, confusion = classification_metrics(
+                predictions_proba, true_labels, unique_labels
+            )
+            if bootstrap is not None:
+                intervals = bootstrap.run(predictions_proba, true_labels, unique_labels)
+                model_metrics.update(BootstrapEvaluator.flatten(intervals))
+
+            if confusion_matrix_path is not None:
+                ModelTrainer._write_confusion_matrix(
+                    confusion, unique_labels, confusion_matrix_path
                 )
 
             logging.info(f"Model metrics: {model_metrics}")
@@ -157,3 +213,60 @@ class ModelTrainer:
         except Exception as e:
             logging.error(f"Error calculating model metrics: {e}")
             raise
+
+    @staticmethod
+    def evaluate_batches(
+        model: lightgbm.Booster,
+        batches: Iterable[Tuple[np.ndarray, np.ndarray]],
+        unique_labels: Sequence,
+        confusion_matrix_path: Optional[str] = None,
+    ) -> Dict[str, float]:
+        """
+        Evaluate the model on validation data predicted batch by batch.
+
+        Memory stays constant in the number of validation rows, so the
+        validation Dataset does not need to keep its raw data. AUC is
+        approximated from score histograms.
+
+        Args:
+            model (lightgbm.Booster): The trained LightGBM model.
+            batches (Iterable[Tuple[np.ndarray, np.ndarray]]): (features, label codes) batches.
+            unique_labels (Sequence): Class names indexed by label code.
+            confusion_matrix_path (Optional[str]): Where to write the confusion matrix as JSON.
+
+        Returns:
+            Dict[str, float]: The metrics, keyed like ``ModelTrainer.evaluate``.
+        """
+        try:
+            accumulator = StreamingMetrics(unique_labels)
+            for features, labels in batches:
+                accumulator.update(model.predict(features), labels)
+            model_metrics, confusion = accumulator.result()
+
+            if confusion_matrix_path is not None:
+                ModelTrainer._write_confusion_matrix(
+                    confusion, unique_labels, confusion_matrix_path
+                )
+
+            logging.info(
+                f"Model metrics over {accumulator.rows} streamed rows: {model_metrics}"
+            )
+            return model_metrics
+
+        except Exception as e:
+            logging.error(f"Error calculating streamed model metrics: {e}")
+            raise
+
+    @staticmethod
+    def _write_confusion_matrix(
+        confusion: np.ndarray, unique_labels: Sequence, path: str
+    ):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(
+                {
+                    "labels": [str(label) for label in unique_labels],
+                    "matrix": confusion.tolist(),
+                },
+                f,
+            )
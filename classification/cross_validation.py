@@ -0,0 +1,235 @@
+import os
+import shutil
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+import lightgbm
+from lightgbm.callback import early_stopping
+from sklearn.model_selection import StratifiedKFold
+from typing import Any, Dict, List, Optional, Tuple
+
+from classification.cache import binning_params
+from classification.classifier import ModelTrainer
+from classification.parallel import (
+    WORKER_STATE,
+    load_shared_datasets,
+    process_pool,
+    save_dataset,
+    thread_budget,
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def feature_matrix(
+    data_df: pd.DataFrame, feature_names: List[str]
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    Build the float32 feature matrix of a frame, with categorical columns as their codes.
+
+    The codes follow the categories of the whole frame, so every fold sees the
+    same mapping; missing values become NaN.
+
+    Args:
+        data_df (pd.DataFrame): The input dataframe.
+        feature_names (List[str]): Feature columns, in matrix order.
+
+    Returns:
+        Tuple[np.ndarray, List[str]]: The matrix and the categorical feature names.
+    """
+    features = np.empty((len(data_df), len(feature_names)), dtype=np.float32)
+    categorical = []
+    for position, name in enumerate(feature_names):
+        column = data_df[name]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy().astype(np.float32)
+            codes[codes < 0] = np.nan
+            features[:, position] = codes
+            categorical.append(name)
+        else:
+            features[:, position] = column.to_numpy(np.float32)
+    return features, categorical
+
+
+def _init_worker(
+    dataset_path: str, features_path: str, parameters: Dict, unique_labels: List
+):
+    """
+    Load the shared binned Dataset and the memory-mapped raw features once per worker.
+    """
+    base_data, _ = load_shared_datasets(dataset_path, None, parameters)
+    WORKER_STATE["base_data"] = base_data
+    WORKER_STATE["features"] = np.load(features_path, mmap_mode="r")
+    WORKER_STATE["labels"] = base_data.get_label()
+    WORKER_STATE["unique_labels"] = unique_labels
+
+
+def _run_fold(
+    fold: int,
+    train_idx: np.ndarray,
+    valid_idx: np.ndarray,
+    parameters: Dict,
+    num_boost_round: int,
+    early_stopping_rounds: int,
+) -> Dict[str, float]:
+    """
+    Train and evaluate one fold on subsets of the worker's base Dataset.
+
+    Returns:
+        Dict[str, float]: The fold metrics, keyed like ``ModelTrainer.evaluate``.
+    """
+    base_data = WORKER_STATE["base_data"]
+    # Subsets share the bin mappers of the base Dataset, so nothing is re-binned
+    train_data = base_data.subset(train_idx.tolist())
+    valid_data = base_data.subset(valid_idx.tolist())
+    model = lightgbm.train(
+        parameters,
+        train_data,
+        valid_sets=[valid_data],
+        num_boost_round=num_boost_round,
+        callbacks=[
+            early_stopping(stopping_rounds=early_stopping_rounds, verbose=False)
+        ],
+    )
+
+    # ModelTrainer.evaluate reads the raw validation rows from the Dataset
+    raw_valid = lightgbm.Dataset(
+        np.asarray(WORKER_STATE["features"][valid_idx]),
+        label=WORKER_STATE["labels"][valid_idx],
+    )
+    fold_metrics = ModelTrainer.evaluate(
+        model, (train_data, raw_valid, WORKER_STATE["unique_labels"])
+    )
+    fold_metrics["best_iteration"] = model.best_iteration
+    logging.info(f"Fold {fold} completed: accuracy={fold_metrics['accuracy']:.4f}")
+    return {k: float(v) for k, v in fold_metrics.items()}
+
+
+class CrossValidator:
+    """
+    A class to run stratified k-fold cross-validation with folds trained in parallel.
+
+    The full dataset is binned once into a base LightGBM Dataset; every fold
+    trains on subsets of it in its own worker process. Categorical features
+    are passed as their category codes. The shared files are written to
+    ``work_dir``, or to a temporary directory removed when the run ends.
+    """
+
+    def __init__(
+        self,
+        parameters: Dict,
+        n_splits: int = 5,
+        label_column: str = "Class",
+        random_state: int = 0,
+        num_boost_round: int = 500,
+        early_stopping_rounds: int = 20,
+        n_workers: Optional[int] = None,
+        work_dir: Optional[str] = None,
+    ):
+        self.parameters = parameters
+        self.n_splits = n_splits
+        self.label_column = label_column
+        self.random_state = random_state
+        self.num_boost_round = num_boost_round
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_workers = n_workers or min(n_splits, os.cpu_count() or 1)
+        self.work_dir = work_dir
+
+    def run(self, data_df: pd.DataFrame) -> Dict[str, Any]:
+        """
+        Cross-validate the model on a dataframe.
+
+        Args:
+            data_df (pd.DataFrame): The input dataframe containing features and class.
+
+        Returns:
+            Dict[str, Any]: Per-fold metrics and their mean and standard deviation.
+        """
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix="lgb_cv_")
+        try:
+            labels, unique_labels = pd.factorize(data_df[self.label_column])
+            feature_names = [c for c in data_df.columns if c != self.label_column]
+            features, categorical = feature_matrix(data_df, feature_names)
+
+            dataset_params = binning_params(self.parameters)
+            base_data = lightgbm.Dataset(
+                features,
+                label=labels,
+                feature_name=feature_names,
+                categorical_feature=categorical or "auto",
+                params=dataset_params,
+            )
+            dataset_path = save_dataset(base_data, os.path.join(work_dir, "base.bin"))
+            features_path = os.path.join(work_dir, "features.npy")
+            np.save(features_path, features)
+            del base_data, features
+
+            parameters = dict(self.parameters)
+            parameters["num_threads"] = thread_budget(self.n_workers)
+            parameters["verbose"] = -1
+
+            folds = StratifiedKFold(
+                n_splits=self.n_splits, shuffle=True, random_state=self.random_state
+            ).split(np.zeros(len(labels)), labels)
+
+            with process_pool(
+                self.n_workers,
+                _init_worker,
+                (dataset_path, features_path, dataset_params, list(unique_labels)),
+            ) as pool:
+                futures = [
+                    pool.submit(
+                        _run_fold,
+                        fold,
+                        train_idx,
+                        valid_idx,
+                        parameters,
+                        self.num_boost_round,
+                        self.early_stopping_rounds,
+                    )
+                    for fold, (train_idx, valid_idx) in enumerate(folds)
+                ]
+                fold_metrics = [future.result() for future in futures]
+
+            keys = fold_metrics[0].keys()
+            results = {
+                "folds": fold_metrics,
+                "mean": {k: float(np.mean([m[k] for m in fold_metrics])) for k in keys},
+                "std": {k: float(np.std([m[k] for m in fold_metrics])) for k in keys},
+            }
+            logging.info(
+                f"Cross-validation accuracy: {results['mean']['accuracy']:.4f} "
+                f"± {results['std']['accuracy']:.4f} over {self.n_splits} folds."
+            )
+            return results
+        except Exception as e:
+            logging.error(f"Error during cross-validation: {e}")
+            raise
+        finally:
+            if self.work_dir is None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    @staticmethod
+    def flatten(results: Dict[str, Any], prefix: str = "cv_") -> Dict[str, float]:
+        """
+        Flatten cross-validation results into MLflow metric names.
+
+        Args:
+            results (Dict[str, Any]): Output of ``CrossValidator.run``.
+            prefix (str): Prefix of every metric name.
+
+        Returns:
+            Dict[str, float]: Per-fold, mean and standard deviation metrics.
+        """
+        flat = {}
+        for fold, fold_metrics in enumerate(results["folds"]):
+            for k, v in fold_metrics.items():
+                flat[f"{prefix}fold{fold}_{k}"] = v
+        for k in results["mean"]:
+            flat[f"{prefix}{k}_mean"] = results["mean"][k]
+            flat[f"{prefix}{k}_std"] = results["std"][k]
+        return flat
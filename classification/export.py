@@ -0,0 +1,174 @@
+import os
+import json
+import shutil
+import logging
+import numpy as np
+import lightgbm
+from typing import Callable, Dict, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Missing value codes of a numerical split, as read by the deployment's
+# tree_predictor.py, which ships on its own with the scoring code
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+
+
+class ModelExporter:
+    """
+    A class to compile a trained LightGBM model into flat node arrays.
+
+    The arrays are read by ``TreeEnsemblePredictor`` in the deployment code,
+    which needs only numpy; see ``ARRAY_NAMES`` there for the layout.
+    Categorical splits and linear trees are not supported. The training
+    package does not import the deployment code, so the check against the
+    Booster runs with the predictor class the caller passes as ``predictor``.
+    """
+
+    def __init__(self, atol: float = 1e-6, predictor: Optional[Callable] = None):
+        self.atol = atol
+        self.predictor = predictor
+
+    @staticmethod
+    def flatten(model: lightgbm.Booster) -> Dict:
+        """
+        Flatten every tree of the model into shared node arrays.
+
+        Args:
+            model (lightgbm.Booster): The trained model, exported at its best iteration.
+
+        Returns:
+            Dict: ``arrays`` with the node arrays and ``meta`` with the model settings.
+        """
+        dump = model.dump_model()
+        k = dump["num_tree_per_iteration"]
+        split_feature, threshold, children = [], [], []
+        leaf_value, default_left, missing_type = [], [], []
+        roots, tree_depth, tree_output = [], [], []
+
+        def new_node() -> int:
+            split_feature.append(0)
+            threshold.append(0.0)
+            children.extend((0, 0))
+            leaf_value.append(0.0)
+            default_left.append(False)
+            missing_type.append(MISSING_NONE)
+            return len(split_feature) - 1
+
+        for tree in dump["tree_info"]:
+            if tree.get("num_cat", 0) > 0 or tree.get("is_linear", False):
+                raise ValueError(
+                    f"Tree {tree['tree_index']} uses categorical splits or linear "
+                    f"leaves, which the compiled predictor does not support"
+                )
+            roots.append(new_node())
+            tree_output.append(tree["tree_index"] % k)
+            depth_reached = 0
+            # Depth-first walk; every node gets its index when first reached
+            stack = [(tree["tree_structure"], roots[-1], 0)]
+            while stack:
+                node, index, depth = stack.pop()
+                if "leaf_value" in node:
+                    if "leaf_coeff" in node:
+                        raise ValueError("Linear trees are not supported")
+                    # A leaf points to itself so extra traversal steps stay put
+                    children[2 * index] = children[2 * index + 1] = 2 * index
+                    leaf_value[index] = node["leaf_value"]
+                    depth_reached = max(depth_reached, depth)
+                    continue
+                if node["decision_type"] != "<=":
+                    raise ValueError(
+                        f"Unsupported decision type {node['decision_type']}"
+                    )
+                split_feature[index] = node["split_feature"]
+                threshold[index] = node["threshold"]
+                default_left[index] = node["default_left"]
+                missing_type[index] = MISSING_TYPES[node["missing_type"]]
+                for side, offset in (("left_child", 0), ("right_child", 1)):
+                    child = new_node()
+                    children[2 * index + offset] = 2 * child
+                    stack.append((node[side], child, depth + 1))
+            tree_depth.append(depth_reached)
+
+        # Deepest trees first, so each traversal step works on a prefix of trees
+        order = np.argsort(tree_depth, kind="stable")[::-1]
+        arrays = {
+            "split_feature": np.repeat(np.asarray(split_feature, dtype=np.int64), 2),
+            "threshold": np.repeat(np.asarray(threshold, dtype=np.float64), 2),
+            "children": np.asarray(children, dtype=np.int64),
+            "leaf_value": np.repeat(np.asarray(leaf_value, dtype=np.float64), 2),
+            "default_left": np.repeat(np.asarray(default_left, dtype=bool), 2),
+            "missing_type": np.repeat(np.asarray(missing_type, dtype=np.int8), 2),
+            "roots": 2 * np.asarray(roots, dtype=np.int64)[order],
+            "tree_depth": np.asarray(tree_depth, dtype=np.int32)[order],
+            "tree_output": np.asarray(tree_output, dtype=np.int64)[order],
+        }
+        meta = {
+            "objective": dump["objective"],
+            "num_class": dump["num_class"],
+            "num_tree_per_iteration": dump["num_tree_per_iteration"],
+            "num_features": dump["max_feature_idx"] + 1,
+            "feature_names": dump["feature_names"],
+            "average_output": dump["average_output"],
+        }
+        return {"arrays": arrays, "meta": meta}
+
+    def export(
+        self,
+        model: lightgbm.Booster,
+        output_dir: str,
+        sample: Optional[np.ndarray] = None,
+    ) -> str:
+        """
+        Write the compiled model to a directory, checking it against the Booster.
+
+        Args:
+            model (lightgbm.Booster): The trained model.
+            output_dir (str): Directory for meta.json and the node arrays; replaced if present.
+            sample (Optional[np.ndarray]): Rows on which the compiled predictions must match
+                ``model.predict`` within ``atol``; needs ``predictor``.
+
+        Returns:
+            str: The output directory.
+        """
+        try:
+            compiled = self.flatten(model)
+            if sample is not None and self.predictor is None:
+                logging.warning("No predictor given: compiled model not checked.")
+            elif sample is not None:
+                sample = np.asarray(sample, dtype=np.float64)
+                expected = model.predict(sample)
+                actual = self.predictor(compiled["arrays"], compiled["meta"]).predict(
+                    sample
+                )
+                error = float(np.max(np.abs(expected - actual)))
+                if error > self.atol:
+                    raise ValueError(
+                        f"Compiled predictions differ from the Booster by {error:.3g}"
+                    )
+                logging.info(
+                    f"Compiled predictions match the Booster on {len(sample)} rows "
+                    f"(max abs error {error:.3g})"
+                )
+
+            # Write next to the target and swap in, so readers never see a partial model
+            staging_dir = f"{output_dir}.tmp"
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            os.makedirs(staging_dir)
+            for name, array in compiled["arrays"].items():
+                np.save(os.path.join(staging_dir, f"{name}.npy"), array)
+            with open(os.path.join(staging_dir, "meta.json"), "w") as f:
+                json.dump(compiled["meta"], f)
+            shutil.rmtree(output_dir, ignore_errors=True)
+            os.replace(staging_dir, output_dir)
+
+            logging.info(
+                f"Exported {len(compiled['arrays']['roots'])} trees to {output_dir}"
+            )
+            return output_dir
+        except Exception as e:
+            logging.error(f"Error exporting compiled model: {e}")
+            raise
@@ -0,0 +1,311 @@
+import os
+import json
+import logging
+import lightgbm
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from typing import Dict, List, Optional, Tuple
+
+from classification.cache import binning_params
+from classification.checkpoint import ResumableEarlyStopping
+from classification.classifier import ModelTrainer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+REFERENCE_FILE = "reference.bin"
+
+
+def save_reference(
+    train_data: lightgbm.Dataset, path: str, max_rows: int = 1000, seed: int = 0
+):
+    """
+    Save a small binned sample of a training Dataset to carry its bin mappers.
+
+    Args:
+        train_data (lightgbm.Dataset): The constructed training Dataset.
+        path (str): Where to write the LightGBM binary file.
+        max_rows (int): Rows kept; the bin mappers do not depend on it.
+        seed (int): Seed of the row sample.
+    """
+    try:
+        train_data.construct()
+        rows = train_data.num_data()
+        rng = np.random.default_rng(seed)
+        indices = np.sort(rng.choice(rows, size=min(rows, max_rows), replace=False))
+        tmp_path = f"{path}.tmp"
+        train_data.subset(indices.tolist()).save_binary(tmp_path)
+        os.replace(tmp_path, path)
+        logging.info(f"Saved the bin mappers of {rows} training rows to {path}.")
+    except Exception as e:
+        logging.warning(f"Could not save the bin mapper reference: {e}")
+
+
+class IncrementalTrainer:
+    """
+    A class to update a trained model with a new batch of labelled data only.
+
+    ``boost`` adds up to ``num_boost_round`` trees fitted to the new rows on
+    top of the base model's predictions. The new rows are binned with the bin
+    mappers stored in the base model's ``reference.bin``, so new splits use
+    the same bin boundaries as the old trees. ``refit`` keeps every tree and
+    re-estimates the leaf values from the new rows, blended with the old ones
+    by ``decay_rate``. Either way the cost grows with the new batch, not with
+    all the data seen so far.
+    """
+
+    MODES = ("boost", "refit")
+
+    def __init__(
+        self,
+        parameters: Dict,
+        mode: str = "boost",
+        num_boost_round: int = 100,
+        early_stopping_rounds: int = 20,
+        decay_rate: float = 0.9,
+        test_size: float = 0.2,
+        random_state: int = 0,
+        callbacks: Optional[List] = None,
+    ):
+        if mode not in self.MODES:
+            raise ValueError(
+                f"Unknown incremental mode {mode!r}; use one of {self.MODES}"
+            )
+        self.parameters = parameters
+        self.mode = mode
+        self.num_boost_round = num_boost_round
+        self.early_stopping_rounds = early_stopping_rounds
+        self.decay_rate = decay_rate
+        self.test_size = test_size
+        self.random_state = random_state
+        self.callbacks = callbacks or []
+
+    @staticmethod
+    def load_base(
+        model_dir: str,
+    ) -> Tuple[lightgbm.Booster, List, Optional[lightgbm.Dataset]]:
+        """
+        Load the base model, its class labels and its bin mapper reference.
+
+        Args:
+            model_dir (str): Output directory of the base training run.
+
+        Returns:
+            Tuple[lightgbm.Booster, List, Optional[lightgbm.Dataset]]: The
+            model, the labels indexed by class code, and the reference Dataset
+            (None when the run did not save one).
+        """
+        try:
+            model = lightgbm.Booster(model_file=os.path.join(model_dir, "model.txt"))
+            with open(os.path.join(model_dir, "unique_labels.json")) as f:
+                unique_labels = json.load(f)["unique_labels"]
+
+            reference = None
+            reference_path = os.path.join(model_dir, REFERENCE_FILE)
+            if os.path.exists(reference_path):
+                reference = lightgbm.Dataset(reference_path).construct()
+            else:
+                logging.warning(
+                    f"No {REFERENCE_FILE} in {model_dir}: new rows are binned afresh."
+                )
+            logging.info(
+                f"Loaded base model with {model.current_iteration()} rounds from {model_dir}."
+            )
+            return model, unique_labels, reference
+        except Exception as e:
+            logging.error(f"Error loading base model from {model_dir}: {e}")
+            raise
+
+    def split(
+        self,
+        data_df: pd.DataFrame,
+        label_column: str,
+        unique_labels: List,
+        reference: Optional[lightgbm.Dataset] = None,
+    ) -> Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray]:
+        """
+        Split a new batch into training and validation Datasets binned like the base model.
+
+        Labels are coded with the base model's classes; a class the base
+        model has never seen needs a full retrain.
+
+        Args:
+            data_df (pd.DataFrame): The new batch with features and class.
+            label_column (str): Name of the label column.
+            unique_labels (List): The base model's labels indexed by class code.
+            reference (Optional[lightgbm.Dataset]): Dataset holding the bin mappers.
+
+        Returns:
+            Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray]: Training and
+            validation Datasets and the unique labels, like ``DataSplitter.split``.
+        """
+        try:
+            labels = pd.Categorical(
+                data_df[label_column], categories=unique_labels
+            ).codes
+            if (labels < 0).any():
+                unknown = sorted(
+                    set(data_df[label_column][labels < 0].astype(str).unique())
+                )
+                raise ValueError(
+                    f"Classes {unknown} are not in the base model; retrain fully"
+                )
+
+            features = data_df.drop(columns=[label_column])
+            train_idx, valid_idx = train_test_split(
+                np.arange(len(data_df)),
+                test_size=self.test_size,
+                random_state=self.random_state,
+            )
+            train_data = lightgbm.Dataset(
+                features.iloc[train_idx],
+                label=labels[train_idx],
+                reference=reference,
+                free_raw_data=False,
+            )
+            valid_data = lightgbm.Dataset(
+                features.iloc[valid_idx],
+                label=labels[valid_idx],
+                reference=train_data,
+                free_raw_data=False,
+            )
+            logging.info(
+                f"New batch split into {len(train_idx)} training and "
+                f"{len(valid_idx)} validation rows."
+            )
+            return train_data, valid_data, np.asarray(unique_labels, dtype=object)
+        except Exception as e:
+            logging.error(f"Error in incremental data splitting: {e}")
+            raise
+
+    def update(
+        self,
+        base_model: lightgbm.Booster,
+        data: Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray],
+    ) -> lightgbm.Booster:
+        """
+        Update the base model with the new training rows.
+
+        Args:
+            base_model (lightgbm.Booster): The model to start from.
+            data (Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray]): From ``split``.
+
+        Returns:
+            lightgbm.Booster: The updated model.
+        """
+        try:
+            train_data, valid_data, _ = data
+            if self.mode == "refit":
+                model = base_model.refit(
+                    train_data.data,
+                    train_data.label,
+                    decay_rate=self.decay_rate,
+                )
+            else:
+                model = lightgbm.train(
+                    self.parameters,
+                    train_data,
+                    valid_sets=[valid_data],
+                    num_boost_round=self.num_boost_round,
+                    init_model=base_model,
+                    callbacks=[
+                        ResumableEarlyStopping(self.early_stopping_rounds),
+                        *self.callbacks,
+                    ],
+                )
+            logging.info(
+                f"Incremental {self.mode} completed: {base_model.current_iteration()} "
+                f"-> {model.current_iteration()} rounds."
+            )
+            return model
+        except Exception as e:
+            logging.error(f"Error during incremental training: {e}")
+            raise
+
+    def full_retrain(
+        self,
+        previous_df: pd.DataFrame,
+        label_column: str,
+        data: Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray],
+        num_boost_round: int = 500,
+    ) -> Tuple[lightgbm.Booster, Tuple]:
+        """
+        Train from scratch on the previous data plus the new training rows.
+
+        The new batch's validation rows are left out, so the retrained and the
+        incremental model are scored on the same unseen rows.
+
+        Args:
+            previous_df (pd.DataFrame): The data the base model was trained on.
+            label_column (str): Name of the label column.
+            data (Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray]): From ``split``.
+            num_boost_round (int): Maximum rounds, like ``ModelTrainer``.
+
+        Returns:
+            Tuple[lightgbm.Booster, Tuple]: The retrained model and its data
+            tuple, whose validation rows are the new batch's.
+        """
+        try:
+            train_data, valid_data, unique_labels = data
+            labels = pd.Categorical(
+                previous_df[label_column], categories=list(unique_labels)
+            ).codes
+            if (labels < 0).any():
+                raise ValueError("The previous data has classes the base model lacks")
+            features = previous_df.drop(columns=[label_column])[
+                list(train_data.data.columns)
+            ]
+            full_train = lightgbm.Dataset(
+                pd.concat([features, train_data.data], ignore_index=True),
+                label=np.concatenate([labels, train_data.label]),
+                params=binning_params(self.parameters),
+            )
+            full_valid = lightgbm.Dataset(
+                valid_data.data,
+                label=valid_data.label,
+                reference=full_train,
+                free_raw_data=False,
+            )
+            full_data = (full_train, full_valid, unique_labels)
+            model = ModelTrainer(
+                self.parameters,
+                num_boost_round=num_boost_round,
+                early_stopping_rounds=self.early_stopping_rounds,
+            ).train(full_data)
+            logging.info(
+                f"Full retrain on {full_train.num_data()} rows for comparison."
+            )
+            return model, full_data
+        except Exception as e:
+            logging.error(f"Error during the comparison retrain: {e}")
+            raise
+
+    @staticmethod
+    def compare(
+        metrics: Dict[str, Dict[str, float]],
+        keys: Tuple[str, ...] = ("logloss", "accuracy", "auc_macro"),
+    ) -> Dict[str, float]:
+        """
+        Differences of the incremental model's validation metrics against the other models.
+
+        Args:
+            metrics (Dict[str, Dict[str, float]]): Metrics of ``incremental``
+                and of ``base`` and/or ``full`` (a full retrain), on the same rows.
+            keys (Tuple[str, ...]): Metrics to compare.
+
+        Returns:
+            Dict[str, float]: ``incremental_delta_<metric>_vs_<model>`` values.
+        """
+        deltas = {}
+        for other in ("base", "full"):
+            if other not in metrics:
+                continue
+            for key in keys:
+                if key in metrics["incremental"] and key in metrics[other]:
+                    deltas[f"incremental_delta_{key}_vs_{other}"] = (
+                        metrics["incremental"][key] - metrics[other][key]
+                    )
+        return deltas
@@ -0,0 +1,152 @@
+import logging
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional
+
+from classification.utils import peak_rss_mb
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class TypedCSVLoader:
+    """
+    A class to load CSV data with compact dtypes and only the columns needed.
+
+    Numeric columns are downcast to float32/int32, the label column is read as a
+    categorical and feature columns can be projected at parse time, so pandas
+    never materializes the full float64/object frame.
+    """
+
+    def __init__(
+        self,
+        label_column: str = "Class",
+        feature_columns: Optional[List[str]] = None,
+        schema: Optional[Dict[str, str]] = None,
+        downcast: bool = True,
+        sample_rows: int = 10000,
+    ):
+        self.label_column = label_column
+        self.feature_columns = feature_columns
+        self.schema = schema
+        self.downcast = downcast
+        self.sample_rows = sample_rows
+
+    @property
+    def cache_key(self) -> str:
+        """
+        Describe the loader settings that change the loaded frame.
+
+        Returns:
+            str: A key distinguishing frames produced with different settings.
+        """
+        features = ",".join(self.feature_columns) if self.feature_columns else "*"
+        schema = ",".join(f"{k}:{v}" for k, v in sorted((self.schema or {}).items()))
+        return f"typed|{self.label_column}|{features}|{schema}|{self.downcast}"
+
+    def _usecols(self) -> Optional[List[str]]:
+        if self.feature_columns is None:
+            return None
+        return list(self.feature_columns) + [self.label_column]
+
+    @staticmethod
+    def _compact_dtype(dtype: np.dtype) -> str:
+        """
+        Map a pandas-inferred dtype to its compact counterpart.
+
+        Args:
+            dtype (np.dtype): The dtype inferred from a sample of rows.
+
+        Returns:
+            str: The dtype name to parse the column with.
+        """
+        if pd.api.types.is_float_dtype(dtype):
+            return "float32"
+        if pd.api.types.is_integer_dtype(dtype):
+            return "int32"
+        if pd.api.types.is_bool_dtype(dtype):
+            return "bool"
+        return "category"
+
+    def infer_schema(self, path: str) -> Dict[str, str]:
+        """
+        Infer compact column dtypes from the first rows of a CSV file.
+
+        Args:
+            path (str): Path of the CSV file.
+
+        Returns:
+            Dict[str, str]: Mapping of column name to dtype name.
+        """
+        sample = pd.read_csv(path, usecols=self._usecols(), nrows=self.sample_rows)
+        schema = {}
+        for column, dtype in sample.dtypes.items():
+            if column == self.label_column:
+                schema[column] = "category"
+            elif self.downcast:
+                schema[column] = self._compact_dtype(dtype)
+        return schema
+
+    def load(self, path: str) -> pd.DataFrame:
+        """
+        Load a CSV file with the configured schema and column projection.
+
+        Args:
+            path (str): Path of the CSV file.
+
+        Returns:
+            pd.DataFrame: The loaded dataframe.
+        """
+        try:
+            rss_before = peak_rss_mb()
+            schema = dict(self.schema) if self.schema else self.infer_schema(path)
+            schema.setdefault(self.label_column, "category")
+
+            try:
+                df = pd.read_csv(path, usecols=self._usecols(), dtype=schema)
+            except (ValueError, OverflowError) as e:
+                # Rows past the inferred sample do not fit the compact dtypes
+                logging.warning(f"Schema did not fit the full file ({e}), re-reading.")
+                df = pd.read_csv(path, usecols=self._usecols())
+                df = self._downcast_frame(df)
+
+            logging.info(
+                f"Loaded {df.shape[0]} rows x {df.shape[1]} columns "
+                f"({df.memory_usage(deep=True).sum() / 1024 ** 2:.1f} MB in memory). "
+                f"Peak RSS {rss_before:.1f} MB before load, {peak_rss_mb():.1f} MB after."
+            )
+            return df
+        except Exception as e:
+            logging.error(f"Error loading typed CSV data: {e}")
+            raise
+
+    def _downcast_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Downcast an already parsed frame column by column.
+
+        Columns get the same dtypes as a schema read would give them, so the
+        cache keys and Dataset dtypes do not depend on which path loaded a file.
+
+        Args:
+            df (pd.DataFrame): A frame parsed with default dtypes.
+
+        Returns:
+            pd.DataFrame: The same frame with compact dtypes.
+        """
+        int32 = np.iinfo(np.int32)
+        for column in df.columns:
+            if column == self.label_column:
+                df[column] = df[column].astype("category")
+            elif not self.downcast:
+                continue
+            else:
+                dtype = self._compact_dtype(df[column].dtype)
+                if dtype == "int32" and (
+                    df[column].min() < int32.min or df[column].max() > int32.max
+                ):
+                    # Casting to int32 would wrap these values around
+                    dtype = "float32"
+                df[column] = df[column].astype(dtype)
+        return df
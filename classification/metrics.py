@@ -0,0 +1,321 @@
+import numpy as np
+from typing import Dict, Sequence, Tuple
+
+
+def as_class_scores(probabilities: np.ndarray) -> np.ndarray:
+    """
+    Expand binary scores into a two-column matrix so every case shares one code path.
+
+    Args:
+        probabilities (np.ndarray): (n,) positive-class scores or (n, k) class probabilities.
+
+    Returns:
+        np.ndarray: (n, k) class scores.
+    """
+    if probabilities.ndim == 1:
+        return np.stack([1 - probabilities, probabilities], axis=1)
+    return probabilities
+
+
+def _rank_sum_auc(sorted_scores: np.ndarray, positive_scores: np.ndarray) -> float:
+    """
+    AUC of one class from the rank sum (Mann-Whitney U) of its positive rows.
+
+    Args:
+        sorted_scores (np.ndarray): (n,) contiguous, sorted scores of all rows.
+        positive_scores (np.ndarray): Scores of the rows belonging to the class.
+
+    Returns:
+        float: The AUC, NaN when the class has no positive or no negative rows.
+    """
+    n, n_pos = len(sorted_scores), len(positive_scores)
+    n_neg = n - n_pos
+    if n_pos == 0 or n_neg == 0:
+        return float("nan")
+
+    # Sorted queries keep numpy's binary search cache-friendly
+    positive_scores = np.sort(positive_scores)
+    below = np.searchsorted(sorted_scores, positive_scores, side="left")
+    up_to = np.searchsorted(sorted_scores, positive_scores, side="right")
+    # Tied scores share the average of the ranks they span
+    rank_sum = (below.sum() + up_to.sum() + n_pos) / 2.0
+    return float((rank_sum - n_pos * (n_pos + 1) / 2.0) / (n_pos * n_neg))
+
+
+def roc_auc_ovr(probabilities: np.ndarray, labels: np.ndarray) -> np.ndarray:
+    """
+    One-vs-rest ROC AUC of every class from a single sort of the score matrix.
+
+    All columns are sorted at once and the rank of each positive row is found
+    by binary search in its class column, so no per-class ROC curve is built
+    and the probabilities are never converted to float64.
+
+    Args:
+        probabilities (np.ndarray): (n,) positive-class scores or (n, k) class probabilities.
+        labels (np.ndarray): (n,) integer class codes.
+
+    Returns:
+        np.ndarray: (k,) AUC per class, NaN for classes absent from or covering all labels.
+    """
+    labels = np.asarray(labels)
+    if probabilities.ndim == 1:
+        # The negative class AUC on 1 - p equals the positive class AUC on p
+        auc = _rank_sum_auc(np.sort(probabilities), probabilities[labels == 1])
+        return np.array([auc, auc])
+
+    sorted_scores = np.sort(probabilities, axis=0)
+    return np.array(
+        [
+            _rank_sum_auc(
+                np.ascontiguousarray(sorted_scores[:, i]), probabilities[labels == i, i]
+            )
+            for i in range(probabilities.shape[1])
+        ]
+    )
+
+
+def confusion_matrix(
+    labels: np.ndarray, predicted: np.ndarray, num_classes: int
+) -> np.ndarray:
+    """
+    Confusion matrix with true classes as rows and predicted classes as columns.
+
+    Args:
+        labels (np.ndarray): (n,) true class codes.
+        predicted (np.ndarray): (n,) predicted class codes.
+        num_classes (int): Number of classes.
+
+    Returns:
+        np.ndarray: (k, k) matrix of counts.
+    """
+    flat = np.asarray(labels, dtype=np.int64) * num_classes + predicted
+    counts = np.bincount(flat, minlength=num_classes * num_classes)
+    return counts.reshape(num_classes, num_classes)
+
+
+def f1_scores(matrix: np.ndarray) -> Tuple[float, float]:
+    """
+    Macro and support-weighted F1 scores from a confusion matrix.
+
+    Args:
+        matrix (np.ndarray): (k, k) confusion matrix.
+
+    Returns:
+        Tuple[float, float]: Macro F1 and weighted F1.
+    """
+    true_positives = np.diag(matrix).astype(np.float64)
+    support = matrix.sum(axis=1)
+    predicted = matrix.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        f1 = np.nan_to_num(2 * true_positives / (support + predicted))
+    return float(f1.mean()), float(np.average(f1, weights=support))
+
+
+def log_loss(
+    probabilities: np.ndarray, labels: np.ndarray, eps: float = 1e-15
+) -> float:
+    """
+    Mean negative log-likelihood of the true classes.
+
+    Args:
+        probabilities (np.ndarray): (n,) positive-class scores or (n, k) class probabilities.
+        labels (np.ndarray): (n,) integer class codes.
+        eps (float): Probabilities are clipped to [eps, 1 - eps].
+
+    Returns:
+        float: The log loss.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    if probabilities.ndim == 1:
+        true_proba = np.where(labels == 1, probabilities, 1 - probabilities)
+    else:
+        true_proba = probabilities[np.arange(len(labels)), labels]
+    return float(-np.mean(np.log(np.clip(true_proba, eps, 1 - eps))))
+
+
+def expected_calibration_error(
+    probabilities: np.ndarray, labels: np.ndarray, n_bins: int = 15
+) -> float:
+    """
+    Expected calibration error of the top-class confidence over equal-width bins.
+
+    Args:
+        probabilities (np.ndarray): (n,) positive-class scores or (n, k) class probabilities.
+        labels (np.ndarray): (n,) integer class codes.
+        n_bins (int): Number of confidence bins.
+
+    Returns:
+        float: The calibration error.
+    """
+    scores = as_class_scores(probabilities)
+    predicted = np.argmax(scores, axis=1)
+    confidence = scores[np.arange(len(predicted)), predicted]
+    correct = predicted == labels
+
+    bins = np.minimum((confidence * n_bins).astype(np.int64), n_bins - 1)
+    counts = np.bincount(bins, minlength=n_bins)
+    confidence_sums = np.bincount(bins, weights=confidence, minlength=n_bins)
+    correct_sums = np.bincount(bins, weights=correct, minlength=n_bins)
+    return float(np.abs(correct_sums - confidence_sums).sum() / max(counts.sum(), 1))
+
+
+def classification_metrics(
+    probabilities: np.ndarray, labels: np.ndarray, unique_labels: Sequence
+) -> Tuple[Dict[str, float], np.ndarray]:
+    """
+    Compute all evaluation metrics of a classifier from its predicted probabilities.
+
+    The returned keys match those of ``ModelTrainer.evaluate``: ``accuracy``, then
+    ``auc`` for binary models or ``auc_class_<label>`` and ``auc_macro`` for
+    multi-class models, followed by F1, log loss and calibration error.
+
+    Args:
+        probabilities (np.ndarray): (n,) positive-class scores or (n, k) class probabilities.
+        labels (np.ndarray): (n,) integer class codes.
+        unique_labels (Sequence): Class names indexed by class code.
+
+    Returns:
+        Tuple[Dict[str, float], np.ndarray]: Scalar metrics and the confusion matrix.
+    """
+    labels = np.asarray(labels, dtype=np.int64)
+    scores = as_class_scores(probabilities)
+    num_classes = scores.shape[1]
+    if probabilities.ndim == 1:
+        predicted = (probabilities >= 0.5).astype(np.int64)
+    else:
+        predicted = np.argmax(scores, axis=1)
+
+    matrix = confusion_matrix(labels, predicted, num_classes)
+    model_metrics = {"accuracy": float(np.trace(matrix) / max(len(labels), 1))}
+
+    auc = roc_auc_ovr(probabilities, labels)
+    if probabilities.ndim == 1:
+        model_metrics["auc"] = float(auc[1])
+    else:
+        for i in range(num_classes):
+            model_metrics[f"auc_class_{unique_labels[i]}"] = float(auc[i])
+        model_metrics["auc_macro"] = float(np.nanmean(auc))
+
+    f1_macro, f1_weighted = f1_scores(matrix)
+    model_metrics["f1_macro"] = f1_macro
+    model_metrics["f1_weighted"] = f1_weighted
+    model_metrics["logloss"] = log_loss(probabilities, labels)
+    model_metrics["calibration_error"] = expected_calibration_error(
+        probabilities, labels
+    )
+    return model_metrics, matrix
+
+
+class StreamingMetrics:
+    """
+    A class to accumulate evaluation metrics over batches of predictions.
+
+    Memory is constant in the number of rows: accuracy and F1 come from a
+    running confusion matrix, log loss from a running sum, calibration error
+    from per-bin sums, and the one-vs-rest AUC from per-class score histograms
+    of positive and negative rows (scores sharing a bin count as ties).
+    """
+
+    def __init__(self, unique_labels: Sequence, n_bins: int = 1024, ece_bins: int = 15):
+        self.unique_labels = unique_labels
+        self.n_bins = n_bins
+        self.ece_bins = ece_bins
+        self.binary = None
+        self.num_classes = None
+        self.rows = 0
+        self.log_loss_sum = 0.0
+
+    def _allocate(self, num_classes: int):
+        self.num_classes = num_classes
+        self.confusion = np.zeros((num_classes, num_classes), dtype=np.int64)
+        self.histogram_all = np.zeros((num_classes, self.n_bins), dtype=np.int64)
+        self.histogram_pos = np.zeros((num_classes, self.n_bins), dtype=np.int64)
+        self.ece_counts = np.zeros(self.ece_bins)
+        self.ece_confidence = np.zeros(self.ece_bins)
+        self.ece_correct = np.zeros(self.ece_bins)
+
+    def update(self, probabilities: np.ndarray, labels: np.ndarray):
+        """
+        Add one batch of predictions.
+
+        Args:
+            probabilities (np.ndarray): (n,) positive-class scores or (n, k) class probabilities.
+            labels (np.ndarray): (n,) integer class codes.
+        """
+        labels = np.asarray(labels, dtype=np.int64)
+        scores = as_class_scores(probabilities)
+        if self.num_classes is None:
+            self.binary = probabilities.ndim == 1
+            self._allocate(scores.shape[1])
+        k, rows = self.num_classes, np.arange(len(labels))
+
+        if self.binary:
+            predicted = (probabilities >= 0.5).astype(np.int64)
+        else:
+            predicted = np.argmax(scores, axis=1)
+        self.confusion += confusion_matrix(labels, predicted, k)
+
+        bins = np.minimum((scores * self.n_bins).astype(np.int64), self.n_bins - 1)
+        offsets = np.arange(k) * self.n_bins
+        self.histogram_all += np.bincount(
+            (bins + offsets).ravel(), minlength=k * self.n_bins
+        ).reshape(k, self.n_bins)
+        self.histogram_pos += np.bincount(
+            bins[rows, labels] + offsets[labels], minlength=k * self.n_bins
+        ).reshape(k, self.n_bins)
+
+        self.log_loss_sum += log_loss(probabilities, labels) * len(labels)
+        top = np.argmax(scores, axis=1)
+        confidence = scores[rows, top]
+        ece_bins = np.minimum(
+            (confidence * self.ece_bins).astype(np.int64), self.ece_bins - 1
+        )
+        self.ece_counts += np.bincount(ece_bins, minlength=self.ece_bins)
+        self.ece_confidence += np.bincount(
+            ece_bins, weights=confidence, minlength=self.ece_bins
+        )
+        self.ece_correct += np.bincount(
+            ece_bins, weights=top == labels, minlength=self.ece_bins
+        )
+        self.rows += len(labels)
+
+    def _histogram_auc(self) -> np.ndarray:
+        positives = self.histogram_pos.astype(np.float64)
+        negatives = (self.histogram_all - self.histogram_pos).astype(np.float64)
+        negatives_below = np.cumsum(negatives, axis=1) - negatives
+        n_pos, n_neg = positives.sum(axis=1), negatives.sum(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            auc = (positives * (negatives_below + 0.5 * negatives)).sum(axis=1) / (
+                n_pos * n_neg
+            )
+        auc[(n_pos == 0) | (n_neg == 0)] = np.nan
+        return auc
+
+    def result(self) -> Tuple[Dict[str, float], np.ndarray]:
+        """
+        Compute the metrics of all batches seen so far.
+
+        Returns:
+            Tuple[Dict[str, float], np.ndarray]: Scalar metrics, keyed like
+            ``classification_metrics``, and the confusion matrix.
+        """
+        if self.rows == 0:
+            raise ValueError("No predictions were added")
+
+        model_metrics = {"accuracy": float(np.trace(self.confusion) / self.rows)}
+        auc = self._histogram_auc()
+        if self.binary:
+            model_metrics["auc"] = float(auc[1])
+        else:
+            for i in range(self.num_classes):
+                model_metrics[f"auc_class_{self.unique_labels[i]}"] = float(auc[i])
+            model_metrics["auc_macro"] = float(np.nanmean(auc))
+
+        f1_macro, f1_weighted = f1_scores(self.confusion)
+        model_metrics["f1_macro"] = f1_macro
+        model_metrics["f1_weighted"] = f1_weighted
+        model_metrics["logloss"] = self.log_loss_sum / self.rows
+        model_metrics["calibration_error"] = float(
+            np.abs(self.ece_correct - self.ece_confidence).sum() / self.rows
+        )
+        return model_metrics, self.confusion
@@ -0,0 +1,94 @@
+import os
+import logging
+import lightgbm
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Per-process state of pool workers, filled once by the pool initializer
+WORKER_STATE: Dict = {}
+
+
+def thread_budget(n_workers: int) -> int:
+    """
+    Split the available cores between concurrent LightGBM workers.
+
+    Args:
+        n_workers (int): Number of worker processes sharing the machine.
+
+    Returns:
+        int: Number of threads each worker may use.
+    """
+    return max(1, (os.cpu_count() or 1) // max(1, n_workers))
+
+
+def process_pool(
+    n_workers: int, initializer: Callable, initargs: Tuple
+) -> ProcessPoolExecutor:
+    """
+    Create a process pool for LightGBM work.
+
+    Workers are spawned rather than forked: forking a parent that already ran
+    OpenMP regions (Dataset construction does) can deadlock the children.
+
+    Args:
+        n_workers (int): Number of worker processes.
+        initializer (Callable): Function run once in every worker.
+        initargs (Tuple): Arguments of the initializer.
+
+    Returns:
+        ProcessPoolExecutor: The process pool.
+    """
+    return ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=initializer,
+        initargs=initargs,
+    )
+
+
+def save_dataset(dataset: lightgbm.Dataset, path: str) -> str:
+    """
+    Construct a Dataset and save it in LightGBM's binary format for worker processes.
+
+    Args:
+        dataset (lightgbm.Dataset): The Dataset to share.
+        path (str): Destination of the binary file.
+
+    Returns:
+        str: The path of the binary file.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    dataset.construct()
+    if os.path.exists(path):
+        os.remove(path)
+    dataset.save_binary(path)
+    return path
+
+
+def load_shared_datasets(
+    train_path: str, valid_path: Optional[str], parameters: Dict
+) -> Tuple[lightgbm.Dataset, Optional[lightgbm.Dataset]]:
+    """
+    Load the binary Datasets shared by a pool into the current worker.
+
+    Args:
+        train_path (str): Binary file of the training Dataset.
+        valid_path (Optional[str]): Binary file of the validation Dataset, if any.
+        parameters (Dict): Parameters used to construct the Datasets.
+
+    Returns:
+        Tuple[lightgbm.Dataset, Optional[lightgbm.Dataset]]: The constructed Datasets.
+    """
+    train_data = lightgbm.Dataset(train_path, params=parameters, free_raw_data=False)
+    train_data.construct()
+    valid_data = None
+    if valid_path is not None:
+        valid_data = lightgbm.Dataset(valid_path, reference=train_data)
+        valid_data.construct()
+    return train_data, valid_data
@@ -0,0 +1,148 @@
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import logging
+import contextlib
+from typing import Dict, Iterator, List, Optional
+
+from classification.utils import current_rss_mb, peak_rss_mb, reset_peak_rss
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class StageProfiler:
+    """
+    A class to time the stages of a training run.
+
+    Every stage records its wall time, the CPU time of the whole process
+    (including LightGBM's worker threads) and its peak RSS. On Linux the
+    peak is reset when a stage starts, so it is the stage's own peak;
+    elsewhere it is the process peak at the end of the stage. Stages nest,
+    and an outer stage's peak includes its inner stages.
+
+    With ``profile_dir``, each outermost stage also runs under cProfile and
+    its stats are written there as ``<stage>.prof`` (for snakeviz or pstats)
+    and ``<stage>.txt`` (the top functions by cumulative time).
+    """
+
+    def __init__(self, profile_dir: Optional[str] = None, top: int = 30):
+        self.profile_dir = profile_dir
+        self.top = top
+        self.spans: List[Dict] = []
+        self._open: List[Dict] = []
+        self._origin = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[Dict]:
+        """
+        Time a pipeline stage.
+
+        Args:
+            name (str): Stage name, used in metric names and the trace.
+
+        Yields:
+            Dict: The span being recorded.
+        """
+        # The enclosing stages keep the peak reached so far before it is reset
+        current_peak = peak_rss_mb()
+        for span in self._open:
+            span["peak_rss_mb"] = max(span["peak_rss_mb"], current_peak)
+        reset_peak_rss()
+
+        span = {
+            "name": name,
+            "depth": len(self._open),
+            "start_s": time.perf_counter() - self._origin,
+            "start_rss_mb": current_rss_mb(),
+            "peak_rss_mb": peak_rss_mb(),
+        }
+        profiler = None
+        if self.profile_dir and not self._open:
+            profiler = cProfile.Profile()
+        self._open.append(span)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        if profiler is not None:
+            profiler.enable()
+        try:
+            yield span
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            span["wall_s"] = time.perf_counter() - wall_start
+            span["cpu_s"] = time.process_time() - cpu_start
+            span["peak_rss_mb"] = max(span["peak_rss_mb"], peak_rss_mb())
+            self._open.pop()
+            for parent in self._open:
+                parent["peak_rss_mb"] = max(parent["peak_rss_mb"], span["peak_rss_mb"])
+            self.spans.append(span)
+            logging.info(
+                f"Stage {name}: {span['wall_s']:.3f}s wall, {span['cpu_s']:.3f}s CPU, "
+                f"peak RSS {span['peak_rss_mb']:.1f} MB."
+            )
+            if profiler is not None:
+                self._save_profile(name, profiler)
+
+    def _save_profile(self, name: str, profiler: cProfile.Profile):
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+            summary = io.StringIO()
+            pstats.Stats(profiler, stream=summary).sort_stats("cumulative").print_stats(
+                self.top
+            )
+            with open(os.path.join(self.profile_dir, f"{name}.txt"), "w") as f:
+                f.write(summary.getvalue())
+        except Exception as e:
+            logging.warning(f"Could not save the profile of stage {name}: {e}")
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Flatten the recorded stages into MLflow metrics.
+
+        Returns:
+            Dict[str, float]: ``stage_<name>_wall_s``, ``stage_<name>_cpu_s`` and
+            ``stage_<name>_peak_rss_mb`` per stage, summed over repeated stages
+            (peaks take the maximum).
+        """
+        flat: Dict[str, float] = {}
+        for span in self.spans:
+            prefix = f"stage_{span['name']}"
+            for key in ("wall_s", "cpu_s"):
+                flat[f"{prefix}_{key}"] = flat.get(f"{prefix}_{key}", 0.0) + span[key]
+            flat[f"{prefix}_peak_rss_mb"] = max(
+                flat.get(f"{prefix}_peak_rss_mb", 0.0), span["peak_rss_mb"]
+            )
+        return flat
+
+    def save_trace(self, path: str):
+        """
+        Write the stages as a Chrome trace, viewable in chrome://tracing or Perfetto.
+
+        Args:
+            path (str): Output JSON path.
+        """
+        events = [
+            {
+                "name": span["name"],
+                "ph": "X",
+                "ts": span["start_s"] * 1e6,
+                "dur": span["wall_s"] * 1e6,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {
+                    "cpu_s": span["cpu_s"],
+                    "peak_rss_mb": span["peak_rss_mb"],
+                },
+            }
+            for span in sorted(self.spans, key=lambda s: (s["start_s"], s["depth"]))
+        ]
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+        logging.info(f"Stage trace written to {path}")
@@ -0,0 +1,246 @@
+import os
+import shutil
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+import lightgbm
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+class MemmapSequence(lightgbm.Sequence):
+    """
+    A LightGBM Sequence reading rows from an on-disk float32 matrix.
+
+    LightGBM samples random rows from it to find the feature bins and then
+    pulls contiguous batches of ``batch_size`` rows to fill the Dataset, so
+    only one batch is resident at a time.
+    """
+
+    def __init__(self, array: np.ndarray, batch_size: int):
+        self.array = array
+        self.batch_size = batch_size
+
+    def __getitem__(self, idx):
+        # LightGBM's sampling and row pushing expect float64 rows
+        return np.asarray(self.array[idx], dtype=np.float64)
+
+    def __len__(self) -> int:
+        return self.array.shape[0]
+
+
+def check_numeric(chunk: pd.DataFrame, features: List[str]):
+    """
+    Reject feature columns that cannot be streamed as float32.
+
+    Chunks are parsed independently, so string or categorical codes would
+    not be consistent across chunks.
+
+    Args:
+        chunk (pd.DataFrame): A chunk of the input.
+        features (List[str]): Feature columns.
+    """
+    non_numeric = [
+        column
+        for column in features
+        if not pd.api.types.is_numeric_dtype(chunk[column])
+        or isinstance(chunk[column].dtype, pd.CategoricalDtype)
+    ]
+    if non_numeric:
+        raise ValueError(
+            f"--stream needs numeric features; {non_numeric} are not numeric. "
+            f"Load the input without --stream to train on categorical features."
+        )
+
+
+class StreamingDataSplitter:
+    """
+    A class to split a CSV file that does not fit in memory into LightGBM datasets.
+
+    The file is read in fixed-size chunks and every row is assigned to the
+    training or validation set as it streams past. Rows are appended to
+    float32 files on disk, which LightGBM then reads back through memory maps,
+    so peak memory is bounded by the chunk size rather than the file size.
+    Every feature must be numeric.
+    """
+
+    def __init__(
+        self,
+        label_column: str = "Class",
+        feature_columns: Optional[List[str]] = None,
+        test_size: float = 0.2,
+        random_state: int = 0,
+        chunk_size: int = 100000,
+        work_dir: Optional[str] = None,
+    ):
+        self.label_column = label_column
+        self.feature_columns = feature_columns
+        self.test_size = test_size
+        self.random_state = random_state
+        self.chunk_size = chunk_size
+        self.work_dir = work_dir or tempfile.mkdtemp(prefix="lgb_stream_")
+
+    def _write_chunks(
+        self, path: str
+    ) -> Tuple[List[str], Dict[str, int], Dict[str, int]]:
+        """
+        Stream the CSV file once, writing train and validation rows to disk.
+
+        Args:
+            path (str): Path of the CSV file.
+
+        Returns:
+            Tuple[List[str], Dict[str, int], Dict[str, int]]: Feature names, label
+            codes in order of first appearance and row counts per subset.
+        """
+        os.makedirs(self.work_dir, exist_ok=True)
+        usecols = None
+        if self.feature_columns is not None:
+            usecols = list(self.feature_columns) + [self.label_column]
+
+        rng = np.random.default_rng(self.random_state)
+        label_codes: Dict[str, int] = {}
+        counts = {"train": 0, "valid": 0}
+        features = None
+        files = {
+            name: {
+                "x": open(os.path.join(self.work_dir, f"{name}_features.f32"), "wb"),
+                "y": open(os.path.join(self.work_dir, f"{name}_labels.i32"), "wb"),
+            }
+            for name in counts
+        }
+
+        try:
+            for chunk in pd.read_csv(path, usecols=usecols, chunksize=self.chunk_size):
+                if features is None:
+                    features = [c for c in chunk.columns if c != self.label_column]
+                check_numeric(chunk, features)
+
+                labels = chunk[self.label_column]
+                for value in labels.unique():
+                    label_codes.setdefault(value, len(label_codes))
+                codes = labels.map(label_codes).to_numpy(np.int32)
+                matrix = np.ascontiguousarray(chunk[features].to_numpy(np.float32))
+
+                is_valid = rng.random(len(chunk)) < self.test_size
+                for name, mask in (("train", ~is_valid), ("valid", is_valid)):
+                    files[name]["x"].write(matrix[mask].tobytes())
+                    files[name]["y"].write(codes[mask].tobytes())
+                    counts[name] += int(mask.sum())
+        finally:
+            for handles in files.values():
+                handles["x"].close()
+                handles["y"].close()
+
+        if features is None or counts["train"] == 0 or counts["valid"] == 0:
+            raise ValueError(f"Not enough rows in {path} to build both subsets")
+        return features, label_codes, counts
+
+    def _open(
+        self, name: str, rows: int, num_features: int
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        features = np.memmap(
+            os.path.join(self.work_dir, f"{name}_features.f32"),
+            dtype=np.float32,
+            mode="r",
+            shape=(rows, num_features),
+        )
+        labels = np.fromfile(
+            os.path.join(self.work_dir, f"{name}_labels.i32"), dtype=np.int32
+        )
+        return features, labels
+
+    def split(self, path: str) -> Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray]:
+        """
+        Split a CSV file into training and validation datasets without loading it whole.
+
+        Args:
+            path (str): Path of the CSV file containing features and class.
+
+        Returns:
+            Tuple[lightgbm.Dataset, lightgbm.Dataset, np.ndarray]: Training and
+            validation datasets for LightGBM and the unique labels.
+        """
+        try:
+            features, label_codes, counts = self._write_chunks(path)
+            unique_labels = np.array(list(label_codes), dtype=object)
+
+            train_x, train_y = self._open("train", counts["train"], len(features))
+            valid_x, valid_y = self._open("valid", counts["valid"], len(features))
+
+            train_data = lightgbm.Dataset(
+                MemmapSequence(train_x, batch_size=self.chunk_size),
+                label=train_y,
+                feature_name=features,
+            )
+            valid_data = lightgbm.Dataset(
+                valid_x, label=valid_y, feature_name=features, reference=train_data
+            )
+            self._valid = (valid_x, valid_y)
+            logging.info(
+                f"Streamed {path} into {counts['train']} training and "
+                f"{counts['valid']} validation rows."
+            )
+            return train_data, valid_data, unique_labels
+        except Exception as e:
+            logging.error(f"Error in streaming data splitting: {e}")
+            raise
+
+    def iter_valid_batches(self) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Read the validation rows back from disk one chunk at a time.
+
+        Returns:
+            Iterator[Tuple[np.ndarray, np.ndarray]]: (features, label codes) batches.
+        """
+        valid_x, valid_y = self._valid
+        for start in range(0, len(valid_y), self.chunk_size):
+            stop = start + self.chunk_size
+            yield np.asarray(valid_x[start:stop]), valid_y[start:stop]
+
+    def cleanup(self):
+        """
+        Remove the on-disk row files once the datasets are no longer needed.
+        """
+        shutil.rmtree(self.work_dir, ignore_errors=True)
+
+
+def iter_csv_batches(
+    path: str,
+    label_column: str,
+    unique_labels: List,
+    feature_columns: Optional[List[str]] = None,
+    chunk_size: int = 100000,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Read a labelled CSV file as (features, label codes) batches for evaluation.
+
+    Args:
+        path (str): Path of the CSV file.
+        label_column (str): Name of the label column.
+        unique_labels (List): Class names in the order of the model's label codes.
+        feature_columns (Optional[List[str]]): Feature columns in model order (all others when not set).
+        chunk_size (int): Rows per batch.
+
+    Returns:
+        Iterator[Tuple[np.ndarray, np.ndarray]]: Batches of float32 features and label codes.
+    """
+    label_codes = {label: code for code, label in enumerate(unique_labels)}
+    usecols = None
+    if feature_columns is not None:
+        usecols = list(feature_columns) + [label_column]
+
+    for chunk in pd.read_csv(path, usecols=usecols, chunksize=chunk_size):
+        features = feature_columns or [c for c in chunk.columns if c != label_column]
+        check_numeric(chunk, features)
+        codes = chunk[label_column].map(label_codes)
+        if codes.isna().any():
+            raise ValueError(
+                f"Unknown labels in {path}: {chunk[label_column][codes.isna()].unique()}"
+            )
+        yield chunk[features].to_numpy(np.float32), codes.to_numpy(np.int64)
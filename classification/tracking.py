@@ -0,0 +1,199 @@
+import time
+import queue
+import logging
+import threading
+from mlflow.entities import Metric, Param
+from mlflow.tracking import MlflowClient
+from typing import Dict, List, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Per-request limits of the MLflow log_batch API
+MAX_METRICS_PER_BATCH = 1000
+MAX_PARAMS_PER_BATCH = 100
+
+_STOP = object()
+
+
+class AsyncMlflowLogger:
+    """
+    A class to log params, metrics and artifacts of an MLflow run from a background thread.
+
+    Logging calls only enqueue, so training never waits on the tracking
+    server. The worker thread collects what is queued for up to
+    ``flush_interval`` seconds and sends params and metrics together in
+    ``log_batch`` requests, so a burst of metrics costs one round-trip
+    instead of one per metric.
+    Artifacts are uploaded one by one in queue order. A failed request is
+    logged and dropped, so tracking errors do not fail the run; ``close``
+    flushes the queue and must be called before the run ends.
+    """
+
+    def __init__(
+        self,
+        run_id: str,
+        client: Optional[MlflowClient] = None,
+        flush_interval: float = 1.0,
+        max_queue: int = 100000,
+    ):
+        self.run_id = run_id
+        self.client = client or MlflowClient()
+        self.flush_interval = flush_interval
+        self.errors = 0
+        self.requests = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._worker = threading.Thread(
+            target=self._run, name="mlflow-logger", daemon=True
+        )
+        self._worker.start()
+
+    def log_params(self, params: Dict):
+        """
+        Queue run parameters.
+        """
+        for key, value in params.items():
+            self._queue.put(("param", Param(key, str(value))))
+
+    def log_metrics(self, metrics: Dict[str, float], step: Optional[int] = None):
+        """
+        Queue metric values, timestamped now.
+
+        Args:
+            metrics (Dict[str, float]): Metric values by name.
+            step (Optional[int]): Training step, e.g. the boosting round.
+        """
+        timestamp = int(time.time() * 1000)
+        for key, value in metrics.items():
+            self._queue.put(("metric", Metric(key, float(value), timestamp, step or 0)))
+
+    def log_artifact(self, local_path: str, artifact_path: Optional[str] = None):
+        """
+        Queue a file upload; the file must stay in place until it is flushed.
+        """
+        self._queue.put(("artifact", (local_path, artifact_path)))
+
+    def log_artifacts(self, local_dir: str, artifact_path: Optional[str] = None):
+        """
+        Queue a directory upload; the files must stay in place until they are flushed.
+        """
+        self._queue.put(("artifacts", (local_dir, artifact_path)))
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            items = [self._queue.get()]
+            # Whatever is queued within the interval goes into the same requests
+            deadline = time.monotonic() + self.flush_interval
+            while items[-1][0] is not _STOP and len(items) < MAX_METRICS_PER_BATCH:
+                try:
+                    items.append(
+                        self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                    )
+                except queue.Empty:
+                    break
+
+            params, metrics = [], []
+            for kind, payload in items:
+                if kind is _STOP:
+                    stopping = True
+                elif kind == "param":
+                    params.append(payload)
+                elif kind == "metric":
+                    metrics.append(payload)
+                else:
+                    # Params and metrics queued before an artifact are sent first
+                    self._send(params, metrics)
+                    params, metrics = [], []
+                    self._upload(kind, *payload)
+            self._send(params, metrics)
+
+            for _ in items:
+                self._queue.task_done()
+
+    def _send(self, params: List[Param], metrics: List[Metric]):
+        while params or metrics:
+            batch_params = params[:MAX_PARAMS_PER_BATCH]
+            batch_metrics = metrics[: MAX_METRICS_PER_BATCH - len(batch_params)]
+            params = params[len(batch_params) :]
+            metrics = metrics[len(batch_metrics) :]
+            try:
+                self.client.log_batch(
+                    self.run_id, metrics=batch_metrics, params=batch_params
+                )
+                self.requests += 1
+            except Exception as e:
+                self.errors += 1
+                logging.error(
+                    f"Error logging {len(batch_params)} params and "
+                    f"{len(batch_metrics)} metrics to MLflow: {e}"
+                )
+
+    def _upload(self, kind: str, local_path: str, artifact_path: Optional[str]):
+        try:
+            if kind == "artifact":
+                self.client.log_artifact(self.run_id, local_path, artifact_path)
+            else:
+                self.client.log_artifacts(self.run_id, local_path, artifact_path)
+            self.requests += 1
+        except Exception as e:
+            self.errors += 1
+            logging.error(f"Error logging artifact {local_path} to MLflow: {e}")
+
+    def flush(self):
+        """
+        Wait until everything queued so far has been sent.
+        """
+        self._queue.join()
+
+    def close(self):
+        """
+        Flush the queue and stop the worker thread.
+        """
+        if not self._worker.is_alive():
+            return
+        start = time.perf_counter()
+        self._queue.put((_STOP, None))
+        self._queue.join()
+        self._worker.join()
+        logging.info(
+            f"MLflow logging flushed in {time.perf_counter() - start:.2f}s: "
+            f"{self.requests} requests, {self.errors} errors."
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class IterationMetricsLogger:
+    """
+    A class to record the validation metrics of every boosting round as MLflow metrics.
+
+    Used as a LightGBM callback. Each round's results are queued on an
+    ``AsyncMlflowLogger`` under ``<dataset>_<metric>`` with the round as the
+    step, and reach the tracking server in batches, so the training curve
+    costs a few requests rather than one per round.
+    """
+
+    order = 20
+    before_iteration = False
+
+    def __init__(self, logger: AsyncMlflowLogger, period: int = 1):
+        self.logger = logger
+        self.period = period
+
+    def __call__(self, env):
+        if self.period <= 0 or (env.iteration + 1) % self.period:
+            return
+        self.logger.log_metrics(
+            {
+                f"{data_name}_{eval_name}": result
+                for data_name, eval_name, result, *_ in env.evaluation_result_list
+            },
+            step=env.iteration + 1,
+        )
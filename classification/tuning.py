@@ -0,0 +1,362 @@
+import os
+import math
+import shutil
+import time
+import logging
+import tempfile
+import itertools
+import numpy as np
+import lightgbm
+import mlflow
+import yaml
+from lightgbm.callback import early_stopping
+from typing import Any, Dict, List, Optional, Tuple
+
+from classification.cache import BINNING_PARAMS, binning_params
+from classification.parallel import (
+    WORKER_STATE,
+    load_shared_datasets,
+    process_pool,
+    save_dataset,
+    thread_budget,
+)
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# LightGBM metrics where a larger value is better
+HIGHER_IS_BETTER = ("auc", "auc_mu", "ndcg", "map", "average_precision")
+
+
+def _metric_name(parameters: Dict) -> str:
+    metric = parameters.get("metric", "multi_logloss")
+    if isinstance(metric, (list, tuple)):
+        metric = metric[0]
+    return metric
+
+
+class SearchSpace:
+    """
+    A class describing the hyperparameters to search over.
+
+    Each entry is either ``{"values": [...]}`` for a discrete choice or
+    ``{"low": a, "high": b}`` for a range, optionally with ``type: int`` and
+    ``log: true``. Ranges are discretized into ``grid_points`` values for grid search.
+    """
+
+    def __init__(self, space: Dict[str, Dict[str, Any]], grid_points: int = 3):
+        binned = sorted(set(space) & set(BINNING_PARAMS))
+        if binned:
+            # Trials share one binned Dataset, so they cannot change the binning
+            raise ValueError(f"Binning parameters cannot be searched: {binned}")
+        self.space = space
+        self.grid_points = grid_points
+
+    @staticmethod
+    def _cast(spec: Dict[str, Any], value: float) -> Any:
+        if spec.get("type") == "int":
+            return int(round(value))
+        return float(value)
+
+    def sample(self, rng: np.random.Generator) -> Dict[str, Any]:
+        """
+        Draw one random configuration.
+
+        Args:
+            rng (np.random.Generator): Random number generator.
+
+        Returns:
+            Dict[str, Any]: Parameter values of the configuration.
+        """
+        params = {}
+        for name, spec in self.space.items():
+            if "values" in spec:
+                params[name] = spec["values"][rng.integers(len(spec["values"]))]
+            elif spec.get("log"):
+                value = math.exp(
+                    rng.uniform(math.log(spec["low"]), math.log(spec["high"]))
+                )
+                params[name] = self._cast(spec, value)
+            else:
+                params[name] = self._cast(spec, rng.uniform(spec["low"], spec["high"]))
+        return params
+
+    def grid(self) -> List[Dict[str, Any]]:
+        """
+        Enumerate every configuration of the discretized space.
+
+        Returns:
+            List[Dict[str, Any]]: All parameter combinations.
+        """
+        axes = []
+        for name, spec in self.space.items():
+            if "values" in spec:
+                values = list(spec["values"])
+            else:
+                spacing = np.geomspace if spec.get("log") else np.linspace
+                points = spacing(spec["low"], spec["high"], self.grid_points)
+                values = sorted({self._cast(spec, v) for v in points})
+            axes.append([(name, v) for v in values])
+        return [dict(combination) for combination in itertools.product(*axes)]
+
+
+def _init_worker(train_path: str, valid_path: str, parameters: Dict):
+    """
+    Load the shared binned Datasets once per worker process.
+    """
+    train_data, valid_data = load_shared_datasets(train_path, valid_path, parameters)
+    WORKER_STATE["train_data"] = train_data
+    WORKER_STATE["valid_data"] = valid_data
+
+
+def _run_trial(
+    trial_id: int,
+    parameters: Dict,
+    num_boost_round: int,
+    early_stopping_rounds: int,
+) -> Dict[str, Any]:
+    """
+    Train one configuration on the worker's shared Datasets.
+
+    Returns:
+        Dict[str, Any]: Trial id, parameters, score, best iteration and duration.
+    """
+    start = time.perf_counter()
+    model = lightgbm.train(
+        parameters,
+        WORKER_STATE["train_data"],
+        valid_sets=[WORKER_STATE["valid_data"]],
+        num_boost_round=num_boost_round,
+        callbacks=[
+            early_stopping(stopping_rounds=early_stopping_rounds, verbose=False)
+        ],
+    )
+    return {
+        "trial_id": trial_id,
+        "score": model.best_score["valid_0"][_metric_name(parameters)],
+        "best_iteration": model.best_iteration,
+        "num_boost_round": num_boost_round,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+class HyperparameterSearch:
+    """
+    A class to tune ModelTrainer parameters with trials running in parallel processes.
+
+    Supports random search, grid search, successive halving and Hyperband.
+    All trials train on one binned Dataset that every worker loads once, each
+    trial is capped to its share of the cores, and poor configurations are
+    stopped early by LightGBM's early stopping on the validation metric and,
+    for halving/Hyperband, dropped between rungs. The shared Datasets are
+    written to ``work_dir``, or to a temporary directory removed when the
+    search ends.
+    """
+
+    STRATEGIES = ("random", "grid", "halving", "hyperband")
+
+    def __init__(
+        self,
+        parameters: Dict,
+        search_space: SearchSpace,
+        strategy: str = "random",
+        n_trials: int = 20,
+        max_rounds: int = 500,
+        min_rounds: int = 20,
+        eta: int = 3,
+        early_stopping_rounds: int = 20,
+        n_workers: Optional[int] = None,
+        seed: int = 0,
+        work_dir: Optional[str] = None,
+    ):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"Unknown search strategy: {strategy}")
+        self.parameters = parameters
+        self.search_space = search_space
+        self.strategy = strategy
+        self.n_trials = n_trials
+        self.max_rounds = max_rounds
+        self.min_rounds = min_rounds
+        self.eta = eta
+        self.early_stopping_rounds = early_stopping_rounds
+        self.n_workers = n_workers or min(4, os.cpu_count() or 1)
+        self.rng = np.random.default_rng(seed)
+        self.work_dir = work_dir
+        self.metric = _metric_name(parameters)
+        self.higher_is_better = self.metric in HIGHER_IS_BETTER
+        self.trials: List[Dict[str, Any]] = []
+        self._next_trial_id = 0
+        self._pool = None
+
+    def _trial_parameters(self, config: Dict[str, Any]) -> Dict:
+        parameters = dict(self.parameters)
+        parameters.update(config)
+        parameters["num_threads"] = thread_budget(self.n_workers)
+        parameters["verbose"] = -1
+        return parameters
+
+    def _evaluate(
+        self, configs: List[Dict[str, Any]], num_boost_round: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Train a batch of configurations concurrently and log every trial to MLflow.
+
+        Args:
+            configs (List[Dict[str, Any]]): Configurations to train.
+            num_boost_round (int): Boosting round budget of each trial.
+
+        Returns:
+            List[Dict[str, Any]]: Trial results in the order of ``configs``.
+        """
+        futures = []
+        for config in configs:
+            futures.append(
+                (
+                    config,
+                    self._pool.submit(
+                        _run_trial,
+                        self._next_trial_id,
+                        self._trial_parameters(config),
+                        num_boost_round,
+                        self.early_stopping_rounds,
+                    ),
+                )
+            )
+            self._next_trial_id += 1
+
+        results = []
+        for config, future in futures:
+            result = future.result()
+            result["params"] = config
+            results.append(result)
+            self.trials.append(result)
+
+            with mlflow.start_run(run_name=f"trial_{result['trial_id']}", nested=True):
+                mlflow.log_params(config)
+                mlflow.log_metrics(
+                    {
+                        self.metric: result["score"],
+                        "best_iteration": result["best_iteration"],
+                        "num_boost_round": num_boost_round,
+                        "trial_seconds": result["seconds"],
+                    }
+                )
+            logging.info(
+                f"Trial {result['trial_id']} ({num_boost_round} rounds): "
+                f"{self.metric}={result['score']:.5f} with {config}"
+            )
+        return results
+
+    def _rank(self, results: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return sorted(results, key=lambda r: r["score"], reverse=self.higher_is_better)
+
+    def _successive_halving(
+        self, configs: List[Dict[str, Any]], min_rounds: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Train configurations on growing budgets, keeping the best 1/eta at each rung.
+
+        Args:
+            configs (List[Dict[str, Any]]): Configurations of the first rung.
+            min_rounds (int): Boosting round budget of the first rung.
+
+        Returns:
+            List[Dict[str, Any]]: Results of the last rung.
+        """
+        rounds = min_rounds
+        while True:
+            results = self._evaluate(configs, min(rounds, self.max_rounds))
+            keep = len(configs) // self.eta
+            if keep < 1 or rounds >= self.max_rounds:
+                return results
+            configs = [r["params"] for r in self._rank(results)[:keep]]
+            rounds *= self.eta
+
+    def _hyperband(self) -> None:
+        """
+        Run successive halving brackets trading number of configurations against budget.
+        """
+        s_max = max(0, int(math.log(self.max_rounds / self.min_rounds, self.eta)))
+        for s in range(s_max, -1, -1):
+            n = int(math.ceil((s_max + 1) / (s + 1) * self.eta**s))
+            rounds = max(self.min_rounds, int(self.max_rounds * self.eta ** (-s)))
+            configs = [self.search_space.sample(self.rng) for _ in range(n)]
+            self._successive_halving(configs, rounds)
+
+    def run(
+        self, data: Tuple[lightgbm.Dataset, lightgbm.Dataset, Any]
+    ) -> Dict[str, Any]:
+        """
+        Run the search on the training and validation datasets from DataSplitter.
+
+        Args:
+            data (Tuple[lightgbm.Dataset, lightgbm.Dataset, Any]): Output of ``DataSplitter.split``.
+
+        Returns:
+            Dict[str, Any]: The best parameter set, its score and best iteration,
+            and all trial results.
+        """
+        work_dir = self.work_dir or tempfile.mkdtemp(prefix="lgb_search_")
+        try:
+            train_data, valid_data, _ = data
+            dataset_params = binning_params(self.parameters)
+            train_data.params = {**(train_data.params or {}), **dataset_params}
+            train_path = save_dataset(train_data, os.path.join(work_dir, "train.bin"))
+            valid_path = save_dataset(valid_data, os.path.join(work_dir, "valid.bin"))
+
+            with process_pool(
+                self.n_workers, _init_worker, (train_path, valid_path, dataset_params)
+            ) as self._pool:
+                if self.strategy == "grid":
+                    self._evaluate(self.search_space.grid(), self.max_rounds)
+                elif self.strategy == "random":
+                    configs = [
+                        self.search_space.sample(self.rng) for _ in range(self.n_trials)
+                    ]
+                    self._evaluate(configs, self.max_rounds)
+                elif self.strategy == "halving":
+                    configs = [
+                        self.search_space.sample(self.rng) for _ in range(self.n_trials)
+                    ]
+                    self._successive_halving(configs, self.min_rounds)
+                else:
+                    self._hyperband()
+
+            best = self._rank(self.trials)[0]
+            best_parameters = dict(self.parameters)
+            best_parameters.update(best["params"])
+            logging.info(
+                f"Best trial {best['trial_id']}: {self.metric}={best['score']:.5f} "
+                f"with {best['params']}"
+            )
+            return {
+                "params": best_parameters,
+                "score": best["score"],
+                "best_iteration": best["best_iteration"],
+                "trials": self.trials,
+            }
+        except Exception as e:
+            logging.error(f"Error during hyperparameter search: {e}")
+            raise
+        finally:
+            self._pool = None
+            if self.work_dir is None:
+                shutil.rmtree(work_dir, ignore_errors=True)
+
+    def save_best(self, result: Dict[str, Any], path: str) -> str:
+        """
+        Write the best parameters in the layout of ``algo_parms.yaml``.
+
+        Args:
+            result (Dict[str, Any]): Output of ``HyperparameterSearch.run``.
+            path (str): Destination YAML file.
+
+        Returns:
+            str: The path of the written file.
+        """
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            yaml.safe_dump({"training": result["params"]}, f, sort_keys=False)
+        return path
@@ -0,0 +1,47 @@
+import sys
+import resource
+
+
+def peak_rss_mb() -> float:
+    """
+    Return the peak resident set size of the current process in megabytes.
+
+    Returns:
+        float: Peak RSS in MB since the process started or the last ``reset_peak_rss``.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and in kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def current_rss_mb() -> float:
+    """
+    Return the current resident set size of the process in megabytes.
+
+    Returns:
+        float: Current RSS in MB, or the peak RSS where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            resident_pages = int(f.read().split()[1])
+        return resident_pages * resource.getpagesize() / (1024 * 1024)
+    except OSError:
+        return peak_rss_mb()
+
+
+def reset_peak_rss() -> bool:
+    """
+    Reset the peak resident set size to the current one, so ``peak_rss_mb``
+    reports the peak from here on. Only supported on Linux.
+
+    Returns:
+        bool: Whether the peak was reset.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
@@ -7,8 +7,25 @@ import pandas as pd
 import joblib
 import mlflow
 import mlflow.sklearn
+import shutil
+import contextlib
+from classification.bootstrap import BootstrapEvaluator
+from classification.cache import DataCache, DatasetCache
+from classification.checkpoint import TrainingCheckpoint
 from classification.classifier import DataSplitter, ModelTrainer
-from typing import Dict
+from classification.cross_validation import CrossValidator
+from classification.export import ModelExporter
+from classification.incremental import (
+    REFERENCE_FILE,
+    IncrementalTrainer,
+    save_reference,
+)
+from classification.loader import TypedCSVLoader
+from classification.profiling import StageProfiler
+from classification.tracking import AsyncMlflowLogger, IterationMetricsLogger
+from classification.streaming import StreamingDataSplitter
+from azure_ml.deploy_model.tree_predictor import TreeEnsemblePredictor
+from typing import Dict, List, Optional
 
 # Configure logging
 logging.basicConfig(
@@ -28,13 +45,62 @@ class TrainingPipeline:
         output_dir: str,
         model_output: str,
         parameters_file: str = "yml_files/algo_parms.yaml",
+        cache_dir: Optional[str] = None,
+        label_column: str = "Class",
+        feature_columns: Optional[List[str]] = None,
+        stream: bool = False,
+        chunk_size: int = 100000,
+        dataset_cache_dir: Optional[str] = None,
+        cv_folds: int = 0,
+        bootstrap_resamples: int = 1000,
+        checkpoint_dir: Optional[str] = None,
+        checkpoint_every_rounds: int = 50,
+        checkpoint_every_seconds: float = 600.0,
+        incremental_from: Optional[str] = None,
+        incremental_mode: str = "boost",
+        incremental_rounds: int = 100,
+        previous_data: Optional[str] = None,
+        rebuild_tolerance: float = 0.01,
+        profile: bool = False,
     ):
+        if incremental_from and stream:
+            raise ValueError("Incremental training does not support --stream")
+        if cv_folds > 1 and (stream or incremental_from):
+            raise ValueError(
+                "--cv_folds needs the input in memory; "
+                "it does not support --stream or --incremental_from"
+            )
         self.input_data = input_data
         self.model_name = model_name
         self.output_dir = output_dir
         self.model_output = model_output
         self.parameters_file = parameters_file
         self.parameters = self._load_parameters()
+        self.label_column = label_column
+        self.feature_columns = feature_columns
+        self.stream = stream
+        self.cv_folds = cv_folds
+        self.bootstrap_resamples = bootstrap_resamples
+        self.chunk_size = chunk_size
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoint_every_rounds = checkpoint_every_rounds
+        self.checkpoint_every_seconds = checkpoint_every_seconds
+        self.incremental_from = incremental_from
+        self.incremental_mode = incremental_mode
+        self.incremental_rounds = incremental_rounds
+        self.previous_data = previous_data
+        self.rebuild_tolerance = rebuild_tolerance
+        # Stage timings are always recorded; cProfile only runs with profile
+        self.profiler = StageProfiler(
+            profile_dir=os.path.join(output_dir, "profiles") if profile else None
+        )
+        self.loader = TypedCSVLoader(
+            label_column=label_column, feature_columns=feature_columns
+        )
+        self.data_cache = DataCache(cache_dir) if cache_dir else None
+        self.dataset_cache = (
+            DatasetCache(dataset_cache_dir) if dataset_cache_dir else None
+        )
 
     def _load_parameters(self) -> Dict:
         """
@@ -51,26 +117,182 @@ class TrainingPipeline:
             logging.warning(f"Error loading parameters: {e}")
             return {}
 
+    def _load_data(self) -> pd.DataFrame:
+        """
+        Load the input data, going through the binary data cache when enabled.
+
+        Returns:
+            pd.DataFrame: The input dataframe.
+        """
+        if self.data_cache is not None:
+            return self.data_cache.load(
+                self.input_data, reader=self.loader.load, variant=self.loader.cache_key
+            )
+        return self.loader.load(self.input_data)
+
+    def _checkpoint(self) -> Optional[TrainingCheckpoint]:
+        """
+        Set up training checkpoints, keyed on the parameters and input data.
+
+        Checkpointing is opt-in through ``checkpoint_dir``. It is skipped when
+        the input cannot be stat'ed, e.g. a URL read by pandas.
+
+        Returns:
+            Optional[TrainingCheckpoint]: The checkpoint, or None when disabled.
+        """
+        if not self.checkpoint_dir or (
+            self.checkpoint_every_rounds <= 0 and self.checkpoint_every_seconds <= 0
+        ):
+            return None
+        # Size and mtime identify the input without reading it again
+        try:
+            stat = os.stat(self.input_data)
+        except (OSError, TypeError, ValueError) as e:
+            logging.warning(
+                f"Checkpointing disabled: cannot stat input {self.input_data}: {e}"
+            )
+            return None
+        run_key = TrainingCheckpoint.key(
+            self.parameters,
+            input_path=os.path.abspath(self.input_data),
+            input_size=stat.st_size,
+            input_mtime_ns=stat.st_mtime_ns,
+            label_column=self.label_column,
+            feature_columns=self.feature_columns,
+            stream=self.stream,
+            chunk_size=self.chunk_size,
+        )
+        return TrainingCheckpoint(
+            self.checkpoint_dir,
+            run_key,
+            every_rounds=self.checkpoint_every_rounds,
+            every_seconds=self.checkpoint_every_seconds,
+        )
+
+    def _compare_incremental(
+        self,
+        incremental: IncrementalTrainer,
+        base_model,
+        data,
+        metrics: Dict[str, float],
+    ) -> Dict[str, float]:
+        """
+        Compare the incremental model with the base model and, when the previous
+        data is given, with a full retrain, on the new batch's validation rows.
+
+        Args:
+            incremental (IncrementalTrainer): The trainer that built the model.
+            base_model: The model the update started from.
+            data: Data tuple of the new batch.
+            metrics (Dict[str, float]): Validation metrics of the incremental model.
+
+        Returns:
+            Dict[str, float]: Metric deltas and ``rebuild_recommended`` (1.0 when
+            the incremental logloss trails by more than the rebuild tolerance).
+        """
+        compared = {
+            "incremental": metrics,
+            "base": ModelTrainer.evaluate(base_model, data),
+        }
+        if self.previous_data:
+            full_model, full_data = incremental.full_retrain(
+                self.loader.load(self.previous_data), self.label_column, data
+            )
+            compared["full"] = ModelTrainer.evaluate(full_model, full_data)
+
+        comparison = IncrementalTrainer.compare(compared)
+        against = "full" if "full" in compared else "base"
+        comparison["rebuild_recommended"] = float(
+            comparison[f"incremental_delta_logloss_vs_{against}"]
+            > self.rebuild_tolerance
+        )
+        logging.info(f"Incremental model compared with {against}: {comparison}")
+        return comparison
+
     def run(self):
         """
         Execute the training pipeline: load data, train model, evaluate, and save outputs.
         """
-        # Read input data
-        try:
-            df = pd.read_csv(self.input_data)
-            logging.info("Input data loaded successfully.")
-        except Exception as e:
-            logging.error(f"Error reading input data: {e}")
-            return
+        profiler = self.profiler
+        # Read input data (streaming mode reads it chunk by chunk while splitting)
+        df = None
+        if not self.stream:
+            try:
+                with profiler.stage("load_data"):
+                    df = self._load_data()
+                logging.info("Input data loaded successfully.")
+            except Exception as e:
+                logging.error(f"Error reading input data: {e}")
+                return
 
-        # Start MLflow run
-        with mlflow.start_run():
+        # Start MLflow run; params, metrics and artifacts are sent in the background
+        # The cleanup stack removes temporary files whether the run succeeds or not
+        with mlflow.start_run() as run, AsyncMlflowLogger(
+            run.info.run_id
+        ) as tracker, contextlib.ExitStack() as cleanup:
             # Log parameters
-            mlflow.log_params(self.parameters)
+            tracker.log_params(self.parameters)
+
+            # Cross-validate before training the final model on the single split
+            if self.cv_folds > 1:
+                with profiler.stage("cross_validation"):
+                    validator = CrossValidator(
+                        self.parameters,
+                        n_splits=self.cv_folds,
+                        label_column=self.label_column,
+                    )
+                    cv_results = validator.run(df)
+                tracker.log_metrics(CrossValidator.flatten(cv_results))
+
+            # A resumed run continues boosting through init_model, which needs
+            # the raw training rows that a cached binned Dataset no longer has
+            checkpoint = None if self.incremental_from else self._checkpoint()
+            dataset_cache = self.dataset_cache
+            resuming = checkpoint is not None and checkpoint.load() is not None
+            if resuming:
+                dataset_cache = None
 
             # Split data
-            splitter = DataSplitter()
-            data = splitter.split(df)
+            incremental = None
+            with profiler.stage("split"):
+                if self.incremental_from:
+                    # Only the new batch is read; it is binned like the base model's data
+                    incremental = IncrementalTrainer(
+                        self.parameters,
+                        mode=self.incremental_mode,
+                        num_boost_round=self.incremental_rounds,
+                        callbacks=[IterationMetricsLogger(tracker)],
+                    )
+                    base_model, base_labels, reference = incremental.load_base(
+                        self.incremental_from
+                    )
+                    data = incremental.split(
+                        df, self.label_column, base_labels, reference=reference
+                    )
+                elif self.stream:
+                    splitter = StreamingDataSplitter(
+                        label_column=self.label_column,
+                        feature_columns=self.feature_columns,
+                        chunk_size=self.chunk_size,
+                    )
+                    cleanup.callback(splitter.cleanup)
+                    data = splitter.split(self.input_data)
+                else:
+                    splitter = DataSplitter(
+                        label_column=self.label_column,
+                        parameters=self.parameters,
+                        dataset_cache=dataset_cache,
+                    )
+                    data = splitter.split(df)
+
+            # Bin the Datasets up front so binning is timed apart from boosting.
+            # A resumed run must keep the raw rows until init_model is applied,
+            # so it bins inside the training stage instead
+            if not resuming:
+                with profiler.stage("binning"):
+                    data[0].construct()
+                    data[1].construct()
+
             unique_labels = data[2].tolist()
             # Save the unique labels to a JSON file
             unique_labels_json = {"unique_labels": unique_labels}
@@ -79,27 +301,114 @@ class TrainingPipeline:
                 json.dump(unique_labels_json, f)
 
             # Log the JSON file as an artifact
-            mlflow.log_artifact(jsonfile)
+            tracker.log_artifact(jsonfile)
 
             # Train model
-            trainer = ModelTrainer(parameters=self.parameters)
-            model = trainer.train(data)
+            # The validation curve is logged per boosting round
+            trainer = ModelTrainer(
+                parameters=self.parameters,
+                checkpoint=checkpoint,
+                callbacks=[IterationMetricsLogger(tracker)],
+            )
+            with profiler.stage("train"):
+                if incremental is not None:
+                    model = incremental.update(base_model, data)
+                else:
+                    model = trainer.train(data)
+
+            # Bin mappers of the training data, reused by later incremental runs
+            reference_file = os.path.join(self.output_dir, REFERENCE_FILE)
+            if incremental is None:
+                save_reference(data[0], reference_file)
+            else:
+                base_reference = os.path.join(self.incremental_from, REFERENCE_FILE)
+                if os.path.exists(base_reference) and not (
+                    os.path.exists(reference_file)
+                    and os.path.samefile(base_reference, reference_file)
+                ):
+                    shutil.copyfile(base_reference, reference_file)
+            if os.path.exists(reference_file):
+                tracker.log_artifact(reference_file)
 
             # Evaluate metrics
-            metrics = trainer.evaluate(model, data)
+            confusion_file = os.path.join(self.output_dir, "confusion_matrix.json")
+            with profiler.stage("evaluate"):
+                if self.stream:
+                    # The streamed validation Dataset does not keep its raw rows
+                    metrics = trainer.evaluate_batches(
+                        model,
+                        splitter.iter_valid_batches(),
+                        data[2],
+                        confusion_matrix_path=confusion_file,
+                    )
+                else:
+                    bootstrap = None
+                    if self.bootstrap_resamples > 0:
+                        bootstrap = BootstrapEvaluator(
+                            n_resamples=self.bootstrap_resamples
+                        )
+                    metrics = trainer.evaluate(
+                        model,
+                        data,
+                        confusion_matrix_path=confusion_file,
+                        bootstrap=bootstrap,
+                    )
             logging.info(f"Model metrics: {metrics}")
 
-            # Log metrics to MLflow
-            mlflow.log_metrics(metrics)
+            if incremental is not None:
+                with profiler.stage("incremental_comparison"):
+                    metrics.update(
+                        self._compare_incremental(
+                            incremental, base_model, data, metrics
+                        )
+                    )
+
+            # Log metrics and the confusion matrix to MLflow
+            tracker.log_metrics(metrics)
+            tracker.log_artifact(confusion_file)
+
+            with profiler.stage("save_model"):
+                # Native model file, loaded by score.py without importing MLflow
+                native_file = os.path.join(self.output_dir, "model.txt")
+                model.save_model(native_file)
+                tracker.log_artifact(native_file)
+
+                # Compile the trees for the numpy predictor used by score.py,
+                # checked against the Booster on validation rows
+                compiled_dir = os.path.join(self.output_dir, "compiled_model")
+                if self.stream:
+                    sample = next(iter(splitter.iter_valid_batches()))[0]
+                else:
+                    sample = data[1].data
+                try:
+                    ModelExporter(predictor=TreeEnsemblePredictor).export(
+                        model, compiled_dir, sample=sample
+                    )
+                    tracker.log_artifacts(compiled_dir, artifact_path="compiled_model")
+                except ValueError as e:
+                    logging.warning(f"Skipping compiled model export: {e}")
 
             # Log model to MLflow
-            mlflow.sklearn.log_model(
-                sk_model=model,
-                artifact_path=self.output_dir,  # Dynamic path injected by Azure ML
-                registered_model_name=self.model_name,
-            )
+            with profiler.stage("log_model"):
+                mlflow.sklearn.log_model(
+                    sk_model=model,
+                    artifact_path=self.output_dir,  # Dynamic path injected by Azure ML
+                    registered_model_name=self.model_name,
+                )
+
+            logging.info(f"Model output path: {self.model_output}")
+
+            # The outputs are saved; a rerun should train afresh
+            if checkpoint is not None:
+                checkpoint.clear()
 
-            logging.info(f"Model output path: {args.model_output}")
+            # Stage timings are logged with the run so performance can be compared
+            tracker.log_metrics(profiler.metrics())
+            trace_file = os.path.join(self.output_dir, "stage_trace.json")
+            profiler.save_trace(trace_file)
+            tracker.log_artifact(trace_file)
+            if profiler.profile_dir and os.path.isdir(profiler.profile_dir):
+                tracker.log_artifacts(profiler.profile_dir, artifact_path="profiles")
 
             # Save outputs
             # self._save_outputs(model, metrics)
@@ -149,6 +458,107 @@ if __name__ == "__main__":
         default="models/Fruit_model",
         help="MLflow model output directory",
     )
+    parser.add_argument(
+        "--cache_dir",
+        type=str,
+        default=None,
+        help="Directory for the binary input cache (disabled when not set)",
+    )
+    parser.add_argument(
+        "--label_column", type=str, default="Class", help="Name of the label column"
+    )
+    parser.add_argument(
+        "--feature_columns",
+        type=str,
+        default=None,
+        help="Comma-separated feature columns to load (all columns when not set)",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read the input CSV in chunks instead of loading it into memory",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=100000,
+        help="Rows per chunk in streaming mode",
+    )
+    parser.add_argument(
+        "--dataset_cache_dir",
+        type=str,
+        default=None,
+        help="Directory for binned LightGBM training datasets (disabled when not set)",
+    )
+    parser.add_argument(
+        "--cv_folds",
+        type=int,
+        default=0,
+        help="Number of stratified cross-validation folds trained in parallel (off when < 2)",
+    )
+    parser.add_argument(
+        "--bootstrap_resamples",
+        type=int,
+        default=1000,
+        help="Bootstrap resamples for metric confidence intervals (off when 0)",
+    )
+
+    parser.add_argument(
+        "--checkpoint_dir",
+        type=str,
+        default=None,
+        help="Directory for training checkpoints (checkpointing is off when not set)",
+    )
+    parser.add_argument(
+        "--checkpoint_every_rounds",
+        type=int,
+        default=50,
+        help="Boosting rounds between checkpoints (0 disables the round trigger)",
+    )
+    parser.add_argument(
+        "--checkpoint_every_seconds",
+        type=float,
+        default=600.0,
+        help="Seconds between checkpoints (0 disables the time trigger)",
+    )
+
+    parser.add_argument(
+        "--incremental_from",
+        type=str,
+        default=None,
+        help="Output directory of a previous run to update with the input data only",
+    )
+    parser.add_argument(
+        "--incremental_mode",
+        type=str,
+        default="boost",
+        choices=IncrementalTrainer.MODES,
+        help="boost: add trees fitted to the new data; refit: re-estimate the leaf values",
+    )
+    parser.add_argument(
+        "--incremental_rounds",
+        type=int,
+        default=100,
+        help="Maximum boosting rounds added in incremental boost mode",
+    )
+    parser.add_argument(
+        "--previous_data",
+        type=str,
+        default=None,
+        help="Data of the base model, to compare the incremental model with a full retrain",
+    )
+    parser.add_argument(
+        "--rebuild_tolerance",
+        type=float,
+        default=0.01,
+        help="Logloss shortfall of the incremental model that recommends a full rebuild",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run each pipeline stage under cProfile and save the stats in <output_dir>/profiles",
+    )
 
     args, _ = parser.parse_known_args()
 
@@ -157,6 +567,25 @@ if __name__ == "__main__":
         model_name=args.model_name,
         output_dir=args.output_dir,
         model_output=args.model_output,
+        cache_dir=args.cache_dir,
+        label_column=args.label_column,
+        feature_columns=(
+            args.feature_columns.split(",") if args.feature_columns else None
+        ),
+        stream=args.stream,
+        chunk_size=args.chunk_size,
+        dataset_cache_dir=args.dataset_cache_dir,
+        cv_folds=args.cv_folds,
+        bootstrap_resamples=args.bootstrap_resamples,
+        checkpoint_dir=args.checkpoint_dir,
+        checkpoint_every_rounds=args.checkpoint_every_rounds,
+        checkpoint_every_seconds=args.checkpoint_every_seconds,
+        incremental_from=args.incremental_from,
+        incremental_mode=args.incremental_mode,
+        incremental_rounds=args.incremental_rounds,
+        previous_data=args.previous_data,
+        rebuild_tolerance=args.rebuild_tolerance,
+        profile=args.profile,
     )
     pipeline.run()
 
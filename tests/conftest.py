@@ -0,0 +1,35 @@
+import sys
+import numpy as np
+import pytest
+
+from helpers import DEPLOY_DIR, REPO_ROOT, make_classification
+
+# The training package is imported from the repo root; the scoring modules
+# import each other as top-level modules, as they do when deployed
+for path in (REPO_ROOT, DEPLOY_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+@pytest.fixture
+def multiclass_data():
+    return make_classification(classes=3)
+
+
+@pytest.fixture
+def binary_data():
+    return make_classification(classes=2, seed=1)
+
+
+@pytest.fixture
+def probabilities():
+    """
+    Multi-class probabilities with ties and their labels, for metric checks.
+    """
+    rng = np.random.default_rng(3)
+    logits = rng.normal(size=(500, 4))
+    labels = np.argmax(logits + rng.normal(scale=1.5, size=logits.shape), axis=1)
+    # Rounding creates tied scores, which the rank-based AUC must average
+    proba = np.round(np.exp(logits) / np.exp(logits).sum(axis=1, keepdims=True), 2)
+    proba /= proba.sum(axis=1, keepdims=True)
+    return proba, labels
@@ -0,0 +1,62 @@
+import os
+import json
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEPLOY_DIR = os.path.join(REPO_ROOT, "azure_ml", "deploy_model")
+FRUIT_CSV = os.path.join(REPO_ROOT, "data", "Date_Fruit_Datasets.csv")
+
+# Small, deterministic models keep the suite fast
+MULTICLASS_PARAMS = {
+    "objective": "multiclass",
+    "num_class": 3,
+    "metric": "multi_logloss",
+    "num_leaves": 7,
+    "learning_rate": 0.1,
+    "min_data_in_leaf": 5,
+    "num_threads": 1,
+    "deterministic": True,
+    "verbose": -1,
+}
+BINARY_PARAMS = {
+    "objective": "binary",
+    "metric": "binary_logloss",
+    "num_leaves": 7,
+    "learning_rate": 0.1,
+    "min_data_in_leaf": 5,
+    "num_threads": 1,
+    "deterministic": True,
+    "verbose": -1,
+}
+
+
+def make_classification(rows: int = 600, features: int = 5, classes: int = 3, seed=0):
+    """
+    Gaussian class clusters with a few missing values, as float32 features and int labels.
+    """
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, classes, size=rows)
+    centers = rng.normal(0.0, 1.5, size=(classes, features))
+    matrix = (centers[labels] + rng.normal(size=(rows, features))).astype(np.float32)
+    matrix[rng.random(matrix.shape) < 0.02] = np.nan
+    return matrix, labels
+
+
+def train_scoring_model(model_dir, params=MULTICLASS_PARAMS, labels=("x", "y", "z")):
+    """
+    Train a small Booster on named features and save it as score.py loads it.
+
+    Returns:
+        Tuple: The Booster and its training frame.
+    """
+    import lightgbm
+    import pandas as pd
+
+    matrix, codes = make_classification(classes=len(labels))
+    frame = pd.DataFrame(matrix, columns=[f"f{i}" for i in range(matrix.shape[1])])
+    booster = lightgbm.train(params, lightgbm.Dataset(frame, codes), 20)
+    os.makedirs(model_dir, exist_ok=True)
+    booster.save_model(os.path.join(model_dir, "model.txt"))
+    with open(os.path.join(model_dir, "unique_labels.json"), "w") as f:
+        json.dump({"unique_labels": list(labels)}, f)
+    return booster, frame
@@ -0,0 +1,106 @@
+import threading
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from batching import MicroBatcher
+
+
+def _row_sums(matrix):
+    return matrix.sum(axis=1, keepdims=True) * np.array([[1.0, -1.0]])
+
+
+@pytest.fixture
+def batcher():
+    batcher = MicroBatcher(_row_sums, max_batch_size=64, max_wait_ms=20)
+    yield batcher
+    batcher.close()
+
+
+def test_idle_request_is_predicted_inline(batcher):
+    matrix = np.arange(6, dtype=np.float32).reshape(3, 2)
+    np.testing.assert_array_equal(batcher.predict(matrix), _row_sums(matrix))
+    metrics = batcher.metrics()
+    assert (metrics["requests"], metrics["batches"]) == (1, 1)
+
+
+def test_concurrent_requests_are_merged_and_each_gets_its_rows():
+    calls = []
+    release = threading.Event()
+
+    def predict(matrix):
+        calls.append(len(matrix))
+        release.wait(5)
+        return _row_sums(matrix)
+
+    batcher = MicroBatcher(predict, max_batch_size=1000, max_wait_ms=200)
+    rng = np.random.default_rng(0)
+    matrices = [rng.random((n, 2)).astype(np.float32) for n in (1, 2, 3, 4, 5, 6)]
+    try:
+        futures = [batcher.submit(m) for m in matrices]
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        batcher.close()
+
+    for matrix, result in zip(matrices, results):
+        np.testing.assert_allclose(result, _row_sums(matrix))
+    assert sum(calls) == sum(len(m) for m in matrices)
+    assert len(calls) < len(matrices)
+
+
+def test_many_threads_get_their_own_predictions(batcher):
+    rng = np.random.default_rng(1)
+    matrices = [rng.random((int(n), 3)) for n in rng.integers(1, 20, size=200)]
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        results = list(pool.map(batcher.predict, matrices))
+    for matrix, result in zip(matrices, results):
+        np.testing.assert_allclose(result, _row_sums(matrix))
+    assert batcher.metrics()["requests"] == 200
+
+
+def test_a_failed_batch_fails_its_requests():
+    def predict(matrix):
+        raise RuntimeError("model failed")
+
+    batcher = MicroBatcher(predict)
+    try:
+        future = batcher.submit(np.zeros((2, 2)))
+        with pytest.raises(RuntimeError, match="model failed"):
+            future.result(timeout=5)
+    finally:
+        batcher.close()
+
+
+def test_closed_batcher_rejects_requests():
+    batcher = MicroBatcher(_row_sums)
+    batcher.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.submit(np.zeros((1, 2)))
+    # An idle batcher would otherwise predict in the caller's thread
+    with pytest.raises(RuntimeError, match="closed"):
+        batcher.predict(np.zeros((1, 2)))
+
+
+def test_batches_never_exceed_the_row_limit():
+    calls = []
+    release = threading.Event()
+
+    def predict(matrix):
+        calls.append(len(matrix))
+        release.wait(5)
+        return _row_sums(matrix)
+
+    batcher = MicroBatcher(predict, max_batch_size=10, max_wait_ms=200)
+    matrices = [np.full((4, 2), i, dtype=np.float32) for i in range(9)]
+    try:
+        futures = [batcher.submit(m) for m in matrices]
+        release.set()
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        batcher.close()
+
+    for matrix, result in zip(matrices, results):
+        np.testing.assert_allclose(result, _row_sums(matrix))
+    # A request that would overflow a batch opens the next one instead
+    assert max(calls) == 8 and sum(calls) == 36
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from classification.bootstrap import BootstrapEvaluator, _bootstrap_chunk
+from classification.metrics import classification_metrics
+
+LABELS = ["a", "b", "c", "d"]
+
+
+def _resample_rows(n_rows: int, n_resamples: int, seed: np.random.SeedSequence):
+    # The draws _bootstrap_chunk makes for the same seed
+    rng = np.random.default_rng(seed)
+    return rng.integers(0, n_rows, size=(n_resamples, n_rows))
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_every_resample_equals_metrics_of_the_resampled_rows(probabilities, binary):
+    proba, labels = probabilities
+    unique_labels = LABELS
+    if binary:
+        labels = (labels == 0).astype(np.int64)
+        proba = proba[:, 0]
+        unique_labels = ["rest", "a"]
+    seed = np.random.SeedSequence(7)
+    resampled = _bootstrap_chunk(proba, labels, unique_labels, 5, seed)
+
+    for i, rows in enumerate(_resample_rows(len(labels), 5, seed)):
+        expected, _ = classification_metrics(proba[rows], labels[rows], unique_labels)
+        assert set(resampled) == set(expected)
+        for key, value in expected.items():
+            assert resampled[key][i] == pytest.approx(value, nan_ok=True), key
+
+
+def test_intervals_bracket_the_point_estimates(probabilities):
+    proba, labels = probabilities
+    point, _ = classification_metrics(proba, labels, LABELS)
+    intervals = BootstrapEvaluator(n_resamples=200, n_jobs=1).run(proba, labels, LABELS)
+
+    assert set(intervals) == set(point)
+    for key, (lower, upper) in intervals.items():
+        assert lower <= point[key] <= upper, key
+
+
+def test_intervals_do_not_depend_on_the_worker_count(probabilities):
+    proba, labels = probabilities
+    # Small chunks, so the resamples are split over several workers
+    serial = BootstrapEvaluator(n_resamples=50, n_jobs=1, max_chunk_cells=5000)
+    parallel = BootstrapEvaluator(n_resamples=50, n_jobs=2, max_chunk_cells=5000)
+    assert serial.run(proba, labels, LABELS) == parallel.run(proba, labels, LABELS)
+
+
+def test_flatten_names():
+    flat = BootstrapEvaluator.flatten({"accuracy": (0.8, 0.9)})
+    assert flat == {"accuracy_ci_lower": 0.8, "accuracy_ci_upper": 0.9}
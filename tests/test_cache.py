@@ -0,0 +1,150 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from classification import cache
+from classification.cache import DataCache, DatasetCache, binning_params
+from classification.classifier import DataSplitter, ModelTrainer
+
+from helpers import MULTICLASS_PARAMS, make_classification
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    matrix, labels = make_classification(rows=200)
+    frame = pd.DataFrame(matrix, columns=[f"f{i}" for i in range(matrix.shape[1])])
+    frame["Class"] = np.array(["x", "y", "z"])[labels]
+    path = tmp_path / "input.csv"
+    frame.to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture
+def categorical_frame():
+    matrix, labels = make_classification(rows=600)
+    frame = pd.DataFrame(matrix[:, :3], columns=["f0", "f1", "f2"])
+    # The region is informative, so the trees split on it
+    regions = np.array(["east", "north", "west"])[(labels + np.arange(600) % 2) % 3]
+    frame["region"] = pd.Categorical(regions)
+    frame["Class"] = pd.Categorical(np.array(["x", "y", "z"])[labels])
+    return frame
+
+
+def test_data_cache_hit_returns_the_parsed_frame(csv_file, tmp_path):
+    data_cache = DataCache(str(tmp_path / "cache"))
+    first = data_cache.load(csv_file)
+    second = data_cache.load(csv_file)
+
+    pd.testing.assert_frame_equal(first, second)
+    assert (data_cache.misses, data_cache.hits) == (1, 1)
+
+
+def test_data_cache_trusts_size_and_mtime_without_hashing(
+    csv_file, tmp_path, monkeypatch
+):
+    data_cache = DataCache(str(tmp_path / "cache"))
+    data_cache.load(csv_file)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("the unchanged input was hashed")
+
+    monkeypatch.setattr(cache, "file_digest", fail)
+    data_cache.load(csv_file)
+    assert data_cache.hits == 1
+
+
+def test_data_cache_rereads_a_changed_source(csv_file, tmp_path):
+    data_cache = DataCache(str(tmp_path / "cache"))
+    data_cache.load(csv_file)
+    with open(csv_file, "a") as f:
+        f.write("0,0,0,0,0,x\n")
+
+    reloaded = data_cache.load(csv_file)
+    assert len(reloaded) == 201
+    assert data_cache.misses == 2
+
+
+def test_data_cache_touched_but_unchanged_source_is_a_hit(csv_file, tmp_path):
+    data_cache = DataCache(str(tmp_path / "cache"))
+    data_cache.load(csv_file)
+    stat = os.stat(csv_file)
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    data_cache.load(csv_file)
+    assert data_cache.hits == 1
+
+
+def test_data_cache_variants_are_separate_entries(csv_file, tmp_path):
+    data_cache = DataCache(str(tmp_path / "cache"))
+    data_cache.load(csv_file, variant="a")
+    data_cache.load(csv_file, variant="b")
+    assert data_cache.misses == 2
+
+
+def test_binning_params_keep_only_binning_settings():
+    selected = binning_params({"max_bin": 63, "learning_rate": 0.1, "verbose": -1})
+    # The log level is passed on to Datasets, but is not part of the cache key
+    assert selected == {"max_bin": 63, "verbose": -1}
+
+
+def test_dataset_cache_key_depends_on_data_and_binning(categorical_frame):
+    settings = {"label_column": "Class"}
+    key = DatasetCache.key(categorical_frame, settings, MULTICLASS_PARAMS)
+
+    assert key == DatasetCache.key(
+        categorical_frame.copy(), settings, MULTICLASS_PARAMS
+    )
+    assert key == DatasetCache.key(
+        categorical_frame, settings, dict(MULTICLASS_PARAMS, learning_rate=0.5)
+    )
+    assert key == DatasetCache.key(
+        categorical_frame, settings, dict(MULTICLASS_PARAMS, verbose=1)
+    )
+    assert key != DatasetCache.key(
+        categorical_frame, settings, dict(MULTICLASS_PARAMS, max_bin=15)
+    )
+    changed = categorical_frame.copy()
+    changed.loc[0, "f0"] = 123.0
+    assert key != DatasetCache.key(changed, settings, MULTICLASS_PARAMS)
+
+
+def test_dataset_cache_hit_keeps_the_category_mapping(categorical_frame, tmp_path):
+    dataset_cache = DatasetCache(str(tmp_path / "datasets"))
+    models = []
+    for _ in ("miss", "hit"):
+        splitter = DataSplitter(
+            parameters=MULTICLASS_PARAMS, dataset_cache=dataset_cache
+        )
+        data = splitter.split(categorical_frame)
+        models.append(
+            (ModelTrainer(MULTICLASS_PARAMS, num_boost_round=30).train(data), data)
+        )
+
+    (miss_model, miss_data), (hit_model, hit_data) = models
+    assert hit_model.pandas_categorical == [["east", "north", "west"]]
+    assert hit_model.pandas_categorical == miss_model.pandas_categorical
+    assert "pandas_categorical:" in hit_model.model_to_string()
+
+    # A frame whose categories are in another order is coded by the saved mapping
+    valid = hit_data[1].data.copy()
+    valid["region"] = valid["region"].cat.reorder_categories(["west", "north", "east"])
+    np.testing.assert_allclose(
+        hit_model.predict(valid), miss_model.predict(miss_data[1].data)
+    )
+
+
+@pytest.mark.parametrize("suffix", [".train.bin", ".categories.json"])
+def test_dataset_cache_corrupt_entry_is_a_miss(categorical_frame, tmp_path, suffix):
+    dataset_cache = DatasetCache(str(tmp_path / "datasets"))
+    splitter = DataSplitter(parameters=MULTICLASS_PARAMS, dataset_cache=dataset_cache)
+    splitter.split(categorical_frame)
+    (path,) = (tmp_path / "datasets").glob(f"*{suffix}")
+    path.write_bytes(path.read_bytes()[:20])
+
+    key = os.path.basename(path).split(".")[0]
+    assert dataset_cache.load(key, MULTICLASS_PARAMS) is None
+    # The split rebuilds the entry, and the next load is a hit again
+    data = splitter.split(categorical_frame)
+    ModelTrainer(MULTICLASS_PARAMS, num_boost_round=5).train(data)
+    assert dataset_cache.load(key, MULTICLASS_PARAMS) is not None
@@ -0,0 +1,123 @@
+import os
+import json
+import lightgbm
+import numpy as np
+import pytest
+from lightgbm.callback import early_stopping
+
+from classification.checkpoint import (
+    STATE_FILE,
+    ResumableEarlyStopping,
+    TrainingCheckpoint,
+)
+from classification.classifier import ModelTrainer
+
+from helpers import MULTICLASS_PARAMS, make_classification
+
+
+class Preempted(Exception):
+    pass
+
+
+def _preempt_after(rounds):
+    def callback(env):
+        if env.iteration + 1 == rounds:
+            raise Preempted
+
+    callback.order = 50
+    return callback
+
+
+def _data():
+    matrix, labels = make_classification(rows=800, seed=5)
+    train = lightgbm.Dataset(matrix[:600], label=labels[:600], free_raw_data=False)
+    valid = lightgbm.Dataset(
+        matrix[600:], label=labels[600:], reference=train, free_raw_data=False
+    )
+    return train, valid, np.array(["a", "b", "c"], dtype=object)
+
+
+def test_resumable_early_stopping_matches_lightgbm():
+    train, valid, _ = _data()
+    reference = lightgbm.train(
+        MULTICLASS_PARAMS,
+        train,
+        valid_sets=[valid],
+        num_boost_round=300,
+        callbacks=[early_stopping(10, verbose=False)],
+    )
+    model = lightgbm.train(
+        MULTICLASS_PARAMS,
+        train,
+        valid_sets=[valid],
+        num_boost_round=300,
+        callbacks=[ResumableEarlyStopping(10)],
+    )
+    assert model.best_iteration == reference.best_iteration
+    assert model.best_iteration < 300
+
+
+def test_resumed_training_matches_an_uninterrupted_run(tmp_path):
+    run_key = TrainingCheckpoint.key(MULTICLASS_PARAMS, input_digest="x")
+    uninterrupted = ModelTrainer(
+        MULTICLASS_PARAMS, num_boost_round=200, early_stopping_rounds=10
+    ).train(_data())
+
+    checkpoint = TrainingCheckpoint(str(tmp_path), run_key, every_rounds=7)
+    interrupted = ModelTrainer(
+        MULTICLASS_PARAMS,
+        num_boost_round=200,
+        early_stopping_rounds=10,
+        checkpoint=checkpoint,
+        callbacks=[_preempt_after(30)],
+    )
+    with pytest.raises(Preempted):
+        interrupted.train(_data())
+    # The last checkpoint before the preemption
+    assert TrainingCheckpoint(str(tmp_path), run_key).load()["iteration"] == 28
+
+    resumed = ModelTrainer(
+        MULTICLASS_PARAMS,
+        num_boost_round=200,
+        early_stopping_rounds=10,
+        checkpoint=TrainingCheckpoint(str(tmp_path), run_key, every_rounds=7),
+    ).train(_data())
+
+    assert uninterrupted.best_iteration > 30
+    assert resumed.best_iteration == uninterrupted.best_iteration
+    rows = _data()[1].data
+    np.testing.assert_allclose(resumed.predict(rows), uninterrupted.predict(rows))
+
+
+def test_checkpoint_of_another_run_is_ignored(tmp_path):
+    train, valid, _ = _data()
+    model = lightgbm.train(MULTICLASS_PARAMS, train, num_boost_round=5)
+    TrainingCheckpoint(str(tmp_path), "run-a").save(model, 5)
+
+    assert TrainingCheckpoint(str(tmp_path), "run-a").load()["iteration"] == 5
+    assert TrainingCheckpoint(str(tmp_path), "run-b").load() is None
+
+
+def test_save_keeps_only_the_latest_model_and_clear_removes_it(tmp_path):
+    train, _, _ = _data()
+    model = lightgbm.train(MULTICLASS_PARAMS, train, num_boost_round=5)
+    checkpoint = TrainingCheckpoint(str(tmp_path / "ck"), "run")
+    checkpoint.save(model, 3)
+    checkpoint.save(model, 5)
+
+    files = sorted(os.listdir(tmp_path / "ck"))
+    assert files == ["checkpoint_000005.txt", STATE_FILE]
+    with open(tmp_path / "ck" / STATE_FILE) as f:
+        assert json.load(f)["model_file"] == "checkpoint_000005.txt"
+
+    checkpoint.clear()
+    assert not os.path.exists(tmp_path / "ck")
+
+
+def test_key_depends_on_parameters_and_settings():
+    key = TrainingCheckpoint.key(MULTICLASS_PARAMS, input_size=1)
+    assert key == TrainingCheckpoint.key(dict(MULTICLASS_PARAMS), input_size=1)
+    assert key != TrainingCheckpoint.key(MULTICLASS_PARAMS, input_size=2)
+    assert key != TrainingCheckpoint.key(
+        dict(MULTICLASS_PARAMS, num_leaves=15), input_size=1
+    )
@@ -0,0 +1,97 @@
+import glob
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import pytest
+
+from classification.cross_validation import CrossValidator, feature_matrix
+
+from helpers import FRUIT_CSV, MULTICLASS_PARAMS, REPO_ROOT, make_classification
+
+
+@pytest.fixture
+def categorical_frame():
+    matrix, labels = make_classification(rows=300)
+    frame = pd.DataFrame(matrix[:, :3], columns=["f0", "f1", "f2"])
+    regions = np.array(["east", "north", "west"], dtype=object)[labels]
+    regions[::11] = None
+    frame["region"] = pd.Categorical(regions)
+    frame["Class"] = pd.Categorical(np.array(["x", "y", "z"])[labels])
+    return frame
+
+
+def _leftover_dirs():
+    return set(glob.glob(os.path.join(tempfile.gettempdir(), "lgb_cv_*")))
+
+
+def test_feature_matrix_codes_categories(categorical_frame):
+    features, categorical = feature_matrix(
+        categorical_frame, ["f0", "region", "f1", "f2"]
+    )
+    assert categorical == ["region"]
+    assert features.dtype == np.float32
+    codes = categorical_frame["region"].cat.codes.to_numpy()
+    np.testing.assert_array_equal(features[codes >= 0, 1], codes[codes >= 0])
+    assert np.isnan(features[codes < 0, 1]).all()
+    np.testing.assert_array_equal(
+        features[:, 0], categorical_frame["f0"].to_numpy(np.float32)
+    )
+
+
+def test_cross_validation_with_a_categorical_feature(categorical_frame):
+    before = _leftover_dirs()
+    validator = CrossValidator(
+        MULTICLASS_PARAMS, n_splits=3, n_workers=2, num_boost_round=30
+    )
+    results = validator.run(categorical_frame)
+
+    assert len(results["folds"]) == 3
+    # The region alone separates the classes
+    assert results["mean"]["accuracy"] > 0.8
+    assert _leftover_dirs() == before
+
+
+def test_given_work_dir_is_kept(categorical_frame, tmp_path):
+    validator = CrossValidator(
+        MULTICLASS_PARAMS,
+        n_splits=2,
+        n_workers=1,
+        num_boost_round=10,
+        work_dir=str(tmp_path),
+    )
+    validator.run(categorical_frame)
+    assert sorted(os.listdir(tmp_path)) == ["base.bin", "features.npy"]
+
+
+def test_flatten_names():
+    results = {
+        "folds": [{"accuracy": 0.8}, {"accuracy": 0.9}],
+        "mean": {"accuracy": 0.85},
+        "std": {"accuracy": 0.05},
+    }
+    assert CrossValidator.flatten(results) == {
+        "cv_fold0_accuracy": 0.8,
+        "cv_fold1_accuracy": 0.9,
+        "cv_accuracy_mean": 0.85,
+        "cv_accuracy_std": 0.05,
+    }
+
+
+@pytest.mark.parametrize(
+    "options", [{"stream": True}, {"incremental_from": "previous_run"}]
+)
+def test_pipeline_rejects_cv_without_an_in_memory_input(options, tmp_path):
+    pytest.importorskip("mlflow")
+    from main import TrainingPipeline
+
+    with pytest.raises(ValueError, match="--cv_folds"):
+        TrainingPipeline(
+            input_data=FRUIT_CSV,
+            model_name="test_model",
+            output_dir=str(tmp_path / "out"),
+            model_output=str(tmp_path / "model"),
+            parameters_file=os.path.join(REPO_ROOT, "yml_files", "algo_parms.yaml"),
+            cv_folds=3,
+            **options,
+        )
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+
+from classification.loader import TypedCSVLoader
+
+
+def _write_csv(path, late_value):
+    frame = pd.DataFrame(
+        {
+            "small": np.arange(100) % 7,
+            "late": np.arange(100),
+            "ratio": np.linspace(0.0, 1.0, 100),
+            "Class": np.array(["x", "y"])[np.arange(100) % 2],
+        }
+    )
+    frame["late"] = frame["late"].astype(object)
+    frame.loc[99, "late"] = late_value
+    frame.to_csv(path, index=False)
+
+
+def test_schema_read_uses_compact_dtypes(tmp_path):
+    _write_csv(tmp_path / "input.csv", 99)
+    df = TypedCSVLoader().load(str(tmp_path / "input.csv"))
+    assert df.dtypes.astype(str).to_dict() == {
+        "small": "int32",
+        "late": "int32",
+        "ratio": "float32",
+        "Class": "category",
+    }
+
+
+def test_reread_gives_the_schema_dtypes(tmp_path):
+    # The sample only sees integers, so the schema read fails on the last row
+    _write_csv(tmp_path / "input.csv", 2.5)
+    df = TypedCSVLoader(sample_rows=10).load(str(tmp_path / "input.csv"))
+    assert df.dtypes.astype(str).to_dict() == {
+        "small": "int32",
+        "late": "float32",
+        "ratio": "float32",
+        "Class": "category",
+    }
+
+
+def test_downcast_does_not_wrap_large_integers():
+    frame = pd.DataFrame({"small": [1, 2], "large": [1, 2**40]})
+    df = TypedCSVLoader(label_column="none")._downcast_frame(frame)
+    assert df["small"].dtype == np.int32
+    assert df["large"].dtype == np.float32
+    assert df["large"].iloc[-1] == np.float32(2**40)
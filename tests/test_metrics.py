@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+from sklearn import metrics as skm
+
+from classification.metrics import (
+    StreamingMetrics,
+    classification_metrics,
+    confusion_matrix,
+    expected_calibration_error,
+    f1_scores,
+    log_loss,
+    roc_auc_ovr,
+)
+
+LABELS = ["a", "b", "c", "d"]
+
+
+def test_multiclass_metrics_match_sklearn(probabilities):
+    proba, labels = probabilities
+    model_metrics, matrix = classification_metrics(proba, labels, LABELS)
+    predicted = np.argmax(proba, axis=1)
+
+    assert model_metrics["accuracy"] == pytest.approx(
+        skm.accuracy_score(labels, predicted)
+    )
+    np.testing.assert_array_equal(
+        matrix, skm.confusion_matrix(labels, predicted, labels=range(4))
+    )
+    for i, name in enumerate(LABELS):
+        assert model_metrics[f"auc_class_{name}"] == pytest.approx(
+            skm.roc_auc_score(labels == i, proba[:, i])
+        )
+    assert model_metrics["auc_macro"] == pytest.approx(
+        skm.roc_auc_score(labels, proba, multi_class="ovr", average="macro")
+    )
+    assert model_metrics["f1_macro"] == pytest.approx(
+        skm.f1_score(labels, predicted, average="macro")
+    )
+    assert model_metrics["f1_weighted"] == pytest.approx(
+        skm.f1_score(labels, predicted, average="weighted")
+    )
+    assert model_metrics["logloss"] == pytest.approx(
+        skm.log_loss(labels, proba, labels=range(4))
+    )
+
+
+def test_binary_metrics_match_sklearn():
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 2, size=400)
+    proba = np.clip(labels * 0.3 + rng.random(400) * 0.7, 0, 1).round(2)
+    model_metrics, _ = classification_metrics(proba, labels, ["no", "yes"])
+    predicted = (proba >= 0.5).astype(int)
+
+    assert model_metrics["accuracy"] == pytest.approx(
+        skm.accuracy_score(labels, predicted)
+    )
+    assert model_metrics["auc"] == pytest.approx(skm.roc_auc_score(labels, proba))
+    assert model_metrics["f1_macro"] == pytest.approx(
+        skm.f1_score(labels, predicted, average="macro")
+    )
+    assert model_metrics["logloss"] == pytest.approx(skm.log_loss(labels, proba))
+
+
+def test_auc_is_nan_for_a_class_without_rows(probabilities):
+    proba, labels = probabilities
+    labels = np.where(labels == 3, 0, labels)
+    auc = roc_auc_ovr(proba, labels)
+    assert np.isnan(auc[3])
+    assert not np.isnan(auc[:3]).any()
+
+
+def test_f1_of_a_never_predicted_class_is_zero():
+    matrix = confusion_matrix(np.array([0, 0, 1, 2]), np.array([0, 0, 1, 1]), 3)
+    f1_macro, _ = f1_scores(matrix)
+    expected = skm.f1_score([0, 0, 1, 2], [0, 0, 1, 1], average="macro")
+    assert f1_macro == pytest.approx(expected)
+
+
+def test_calibration_error_of_a_perfectly_calibrated_model():
+    # Confidence 0.75 and three out of four rows right
+    proba = np.tile([0.75, 0.25], (4, 1))
+    labels = np.array([0, 0, 0, 1])
+    assert expected_calibration_error(proba, labels) == pytest.approx(0.0)
+
+
+def test_log_loss_clips_zero_probabilities():
+    proba = np.array([[1.0, 0.0], [0.0, 1.0]])
+    assert np.isfinite(log_loss(proba, np.array([1, 0])))
+
+
+def test_streaming_metrics_match_exact_metrics(probabilities):
+    proba, labels = probabilities
+    exact, exact_matrix = classification_metrics(proba, labels, LABELS)
+
+    accumulator = StreamingMetrics(LABELS)
+    for start in range(0, len(labels), 64):
+        accumulator.update(proba[start : start + 64], labels[start : start + 64])
+    streamed, streamed_matrix = accumulator.result()
+
+    np.testing.assert_array_equal(streamed_matrix, exact_matrix)
+    for key in ("accuracy", "f1_macro", "f1_weighted", "logloss"):
+        assert streamed[key] == pytest.approx(exact[key])
+    assert streamed["calibration_error"] == pytest.approx(exact["calibration_error"])
+    # AUC comes from score histograms, so it is approximate
+    for i, name in enumerate(LABELS):
+        assert streamed[f"auc_class_{name}"] == pytest.approx(
+            exact[f"auc_class_{name}"], abs=1e-3
+        )
+
+
+def test_streaming_metrics_need_rows():
+    with pytest.raises(ValueError):
+        StreamingMetrics(LABELS).result()
@@ -0,0 +1,224 @@
+import os
+import json
+import time
+import random
+import shutil
+import threading
+import numpy as np
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+import score
+from model_registry import LABELS_FILE, ModelRegistry, ModelVersion
+
+from helpers import train_scoring_model
+
+
+class FakeModel:
+    """
+    A model that fails if it is used after its version was closed.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.closed = False
+
+    def feature_name(self):
+        return ["a"]
+
+    def predict(self, matrix):
+        assert not self.closed, f"{self.name} predicted after it was closed"
+        time.sleep(0.001)
+        return np.zeros((len(matrix), 2))
+
+
+class FakeBatcher:
+    def __init__(self, model):
+        self.model = model
+
+    def predict(self, matrix):
+        return self.model.predict(matrix)
+
+    def close(self):
+        self.model.closed = True
+
+    def metrics(self):
+        return {}
+
+
+def fake_load(version, model_path):
+    model = FakeModel(f"{version}@{model_path}")
+    return ModelVersion(version, model_path, model, ["x", "y"], FakeBatcher(model))
+
+
+def _publish(root, name):
+    """
+    Write a version directory next to the root and rename it in, as documented.
+    """
+    tmp = os.path.join(root, f"{name}.tmp")
+    os.makedirs(tmp)
+    with open(os.path.join(tmp, LABELS_FILE), "w") as f:
+        json.dump({"unique_labels": ["x", "y"]}, f)
+    path = os.path.join(root, name)
+    if os.path.exists(path):
+        shutil.rmtree(path)
+    os.rename(tmp, path)
+
+
+def test_replaced_version_is_closed_after_its_last_lease():
+    registry = ModelRegistry(fake_load)
+    registry.load("v1", "first")
+    with registry.use() as first:
+        with registry.use("v1") as second:
+            registry.load("v1", "second")
+            assert second is first
+            first.predict(np.zeros((1, 1)))
+        assert not first.model.closed
+        with registry.use() as replacement:
+            assert replacement.model_path == "second"
+    assert first.model.closed
+    assert not registry.get("v1").model.closed
+    registry.close()
+    assert replacement.model.closed
+
+
+def test_swaps_during_in_flight_requests_never_fail_them():
+    registry = ModelRegistry(fake_load)
+    registry.load("v1", "0")
+    stop = threading.Event()
+
+    def requests():
+        served = 0
+        while not stop.is_set():
+            with registry.use() as entry:
+                entry.predict(np.zeros((2, 1)))
+            served += 1
+        return served
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        futures = [pool.submit(requests) for _ in range(8)]
+        for i in range(1, 50):
+            registry.load("v1", str(i))
+            time.sleep(0.002)
+        stop.set()
+        served = [future.result() for future in futures]
+
+    assert sum(served) > 0
+    assert registry.get().model_path == "49"
+    assert registry.get().metrics()["in_flight"] == 0
+    registry.close()
+
+
+def test_traffic_weights_split_unversioned_requests():
+    registry = ModelRegistry(fake_load)
+    for version in ("v1", "v2", "v3"):
+        registry.load(version, version)
+    # Zero weights and versions that are not loaded never receive traffic
+    registry.set_traffic({"v1": 90, "v2": 10, "v3": 0, "v9": 50})
+
+    random.seed(0)
+    counts = {"v1": 0, "v2": 0, "v3": 0}
+    for _ in range(5000):
+        with registry.use() as entry:
+            counts[entry.version] += 1
+    assert counts["v3"] == 0
+    assert counts["v1"] / 5000 == pytest.approx(0.9, abs=0.02)
+
+    # A named version bypasses the split; without a split the latest version serves
+    with registry.use("v3") as entry:
+        assert entry.version == "v3"
+    registry.set_traffic({})
+    with registry.use() as entry:
+        assert entry.version == "v3"
+    with pytest.raises(ValueError, match="negative"):
+        registry.set_traffic({"v1": -1})
+    registry.close()
+
+
+def test_unknown_version_is_an_error():
+    registry = ModelRegistry(fake_load)
+    with pytest.raises(RuntimeError, match="No model version"):
+        with registry.use():
+            pass
+    registry.load("v1", "v1")
+    with pytest.raises(
+        ValueError, match=r"Unknown model version 'v9'; loaded: \['v1'\]"
+    ):
+        with registry.use("v9"):
+            pass
+    assert registry.get("v1").metrics()["in_flight"] == 0
+    registry.close()
+
+
+def test_sync_mirrors_the_registry_directory(tmp_path):
+    root = str(tmp_path)
+    registry = ModelRegistry(fake_load)
+    _publish(root, "v1")
+    os.makedirs(os.path.join(root, "half-written.tmp"))
+    registry.sync(root)
+    assert registry.versions() == ["v1"]
+
+    _publish(root, "v2")
+    with open(os.path.join(root, "traffic.json"), "w") as f:
+        json.dump({"v1": 1, "v2": 1}, f)
+    registry.sync(root)
+    assert registry.versions() == ["v1", "v2"]
+    assert registry.metrics()["default"] == "v2"
+    assert registry.metrics()["traffic"] == {"v1": 1, "v2": 1}
+
+    # An unchanged directory is not reloaded; a republished one is
+    v1 = registry.get("v1")
+    registry.sync(root)
+    assert registry.get("v1") is v1
+    _publish(root, "v1")
+    registry.sync(root)
+    assert registry.get("v1") is not v1 and v1.model.closed
+
+    v2 = registry.get("v2")
+    shutil.rmtree(os.path.join(root, "v2"))
+    os.remove(os.path.join(root, "traffic.json"))
+    registry.sync(root)
+    assert registry.versions() == ["v1"] and v2.model.closed
+    assert registry.metrics()["traffic"] == {}
+    registry.close()
+
+
+def test_watch_picks_up_new_versions(tmp_path):
+    root = str(tmp_path)
+    registry = ModelRegistry(fake_load)
+    registry.watch(root, interval=0.01)
+    _publish(root, "v1")
+    deadline = time.monotonic() + 5
+    while registry.versions() != ["v1"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.versions() == ["v1"]
+    registry.close()
+    assert registry.versions() == [] and registry._watcher.is_alive() is False
+
+
+def test_scoring_through_a_hot_swap(tmp_path, monkeypatch):
+    root = tmp_path / "registry"
+    _, frame = train_scoring_model(root / "v1")
+    body = json.dumps({"data": frame.head(5).to_dict("records")})
+    monkeypatch.setenv("MODEL_REGISTRY_DIR", str(root))
+    monkeypatch.setenv("MODEL_REGISTRY_POLL_SECONDS", "0")
+    monkeypatch.setenv("SCORE_PREDICTOR", "native")
+    score.init()
+    try:
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            futures = [pool.submit(score.score_request, body) for _ in range(200)]
+            # Publish v2 and retire v1 while requests are in flight
+            train_scoring_model(tmp_path / "v2.tmp")
+            os.rename(tmp_path / "v2.tmp", root / "v2")
+            shutil.rmtree(root / "v1")
+            score.registry.sync(str(root))
+            served = {future.result()[2] for future in futures}
+        assert served <= {"v1", "v2"}
+        assert score.registry.versions() == ["v2"]
+        _, _, version = score.score_request(body)
+        assert version == "v2"
+        with pytest.raises(ValueError, match="Unknown model version 'v1'"):
+            score.score_request(body, version="v1")
+    finally:
+        score.registry.close()
+        score.registry = None
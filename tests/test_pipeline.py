@@ -0,0 +1,115 @@
+import os
+import sys
+import shutil
+import logging
+import functools
+import threading
+import subprocess
+import pytest
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+pytest.importorskip("mlflow")
+
+from main import TrainingPipeline  # noqa: E402
+
+from helpers import FRUIT_CSV, REPO_ROOT  # noqa: E402
+
+PARAMETERS_FILE = os.path.join(REPO_ROOT, "yml_files", "algo_parms.yaml")
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def csv_url():
+    handler = functools.partial(QuietHandler, directory=os.path.dirname(FRUIT_CSV))
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_port}/{os.path.basename(FRUIT_CSV)}"
+    server.shutdown()
+
+
+def _pipeline(input_data, tmp_path, **kwargs):
+    return TrainingPipeline(
+        input_data=input_data,
+        model_name="test_model",
+        output_dir=str(tmp_path / "out"),
+        model_output=str(tmp_path / "model"),
+        parameters_file=PARAMETERS_FILE,
+        **kwargs,
+    )
+
+
+def test_training_run_in_process(tmp_path, monkeypatch):
+    # MLflow needs a relative artifact path, so the run works from tmp_path
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("MLFLOW_TRACKING_URI", (tmp_path / "mlruns").as_uri())
+    shutil.copytree(os.path.join(REPO_ROOT, "yml_files"), tmp_path / "yml_files")
+    os.makedirs(tmp_path / "out")
+    pipeline = TrainingPipeline(
+        input_data=FRUIT_CSV,
+        model_name="test_model",
+        output_dir="out",
+        model_output="model",
+        bootstrap_resamples=0,
+    )
+    pipeline.run()
+    assert os.path.exists(tmp_path / "out" / "model.txt")
+
+
+def test_checkpointing_is_off_by_default(tmp_path):
+    assert _pipeline(FRUIT_CSV, tmp_path)._checkpoint() is None
+
+
+def test_checkpoint_key_follows_input_size_and_mtime(tmp_path):
+    input_csv = tmp_path / "input.csv"
+    shutil.copyfile(FRUIT_CSV, input_csv)
+    pipeline = _pipeline(str(input_csv), tmp_path, checkpoint_dir=str(tmp_path / "ck"))
+    key = pipeline._checkpoint().run_key
+    assert pipeline._checkpoint().run_key == key
+
+    stat = os.stat(input_csv)
+    os.utime(input_csv, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert pipeline._checkpoint().run_key != key
+
+
+def test_url_input_disables_checkpointing_with_a_warning(csv_url, tmp_path, caplog):
+    pipeline = _pipeline(csv_url, tmp_path, checkpoint_dir=str(tmp_path / "ck"))
+    with caplog.at_level(logging.WARNING):
+        assert pipeline._checkpoint() is None
+    assert "Checkpointing disabled" in caplog.text
+
+
+def test_training_run_on_a_url_input(csv_url, tmp_path):
+    # Relative output paths, as MLflow needs for the model artifact path
+    shutil.copytree(os.path.join(REPO_ROOT, "yml_files"), tmp_path / "yml_files")
+    os.makedirs(tmp_path / "out")
+    env = dict(
+        os.environ,
+        MLFLOW_TRACKING_URI=(tmp_path / "mlruns").as_uri(),
+        PYTHONPATH=REPO_ROOT,
+    )
+    completed = subprocess.run(
+        [
+            sys.executable,
+            os.path.join(REPO_ROOT, "main.py"),
+            "--input_data",
+            csv_url,
+            "--output_dir",
+            "out",
+            "--checkpoint_dir",
+            "ck",
+            "--bootstrap_resamples",
+            "0",
+        ],
+        cwd=tmp_path,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert completed.returncode == 0, completed.stderr[-2000:]
+    assert os.path.exists(tmp_path / "out" / "model.txt")
+    assert not os.path.exists(tmp_path / "ck")
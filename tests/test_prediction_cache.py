@@ -0,0 +1,89 @@
+import time
+import numpy as np
+
+from prediction_cache import ENTRY_OVERHEAD_BYTES, PredictionCache
+
+
+def _put(cache, matrix):
+    keys = cache.keys(matrix)
+    cache.put_many(keys, matrix * 2)
+    return keys
+
+
+def test_cached_rows_are_returned_and_the_rest_reported_missing():
+    cache = PredictionCache("v1")
+    stored = np.array([[1.0, 2.0], [3.0, 4.0]])
+    _put(cache, stored)
+
+    query = np.array([[3.0, 4.0], [5.0, 6.0], [1.0, 2.0]])
+    hits, misses = cache.get_many(cache.keys(query))
+    assert misses == [1]
+    np.testing.assert_array_equal(hits[0], [6.0, 8.0])
+    np.testing.assert_array_equal(hits[2], [2.0, 4.0])
+    metrics = cache.metrics()
+    assert (metrics["hits"], metrics["misses"]) == (2, 1)
+    assert metrics["hit_rate"] == 2 / 3
+
+
+def test_keys_canonicalize_dtype_zero_and_nan():
+    cache = PredictionCache("v1")
+    float64_rows = np.array([[0.0, np.nan, 1.5]])
+    float32_rows = np.array([[-0.0, -np.nan, 1.5]], dtype=np.float32)
+    assert cache.keys(float64_rows) == cache.keys(float32_rows)
+    assert cache.keys(float64_rows) != cache.keys(np.array([[0.0, 0.0, 1.5]]))
+
+
+def test_model_versions_do_not_share_entries():
+    rows = np.array([[1.0, 2.0]])
+    old = PredictionCache("v1")
+    assert old.keys(rows) != PredictionCache("v2").keys(rows)
+
+
+def test_least_recently_used_rows_are_evicted_first():
+    cache = PredictionCache("v1", max_entries=2)
+    keys = _put(cache, np.array([[1.0], [2.0]]))
+    cache.get_many([keys[0]])
+    _put(cache, np.array([[3.0]]))
+
+    hits, misses = cache.get_many(keys)
+    assert list(hits) == [0] and misses == [1]
+    assert cache.metrics()["evictions"] == 1
+
+
+def test_memory_cap_bounds_the_cache():
+    row_bytes = 8 + ENTRY_OVERHEAD_BYTES
+    cache = PredictionCache("v1", max_bytes=3 * row_bytes)
+    _put(cache, np.arange(10, dtype=np.float64).reshape(10, 1))
+    metrics = cache.metrics()
+    assert metrics["entries"] == 3
+    assert metrics["bytes"] <= 3 * row_bytes
+
+
+def test_expired_rows_are_missing():
+    cache = PredictionCache("v1", ttl_seconds=0.01)
+    keys = _put(cache, np.array([[1.0]]))
+    time.sleep(0.05)
+    hits, misses = cache.get_many(keys)
+    assert not hits and misses == [0]
+    assert cache.metrics()["expirations"] == 1
+    assert cache.metrics()["bytes"] == 0
+
+
+def test_stored_rows_do_not_keep_the_batch_alive():
+    cache = PredictionCache("v1")
+    predictions = np.ones((100, 4))
+    keys = cache.keys(np.arange(100, dtype=np.float64).reshape(100, 1))
+    cache.put_many(keys, predictions)
+    hits, _ = cache.get_many(keys[:1])
+    assert hits[0].base is None
+
+
+def test_clear_drops_entries_and_resets_the_counters():
+    cache = PredictionCache("v1")
+    keys = _put(cache, np.array([[1.0], [2.0]]))
+    cache.get_many(keys + cache.keys(np.array([[3.0]])))
+    cache.clear()
+
+    metrics = cache.metrics()
+    assert (metrics["entries"], metrics["bytes"]) == (0, 0)
+    assert (metrics["hits"], metrics["misses"], metrics["hit_rate"]) == (0, 0, 0.0)
@@ -0,0 +1,148 @@
+import json
+import struct
+import numpy as np
+import pytest
+
+from request_formats import (
+    ARROW,
+    ARROW_CONTENT_TYPE,
+    COLUMNAR,
+    FLOAT32,
+    FLOAT32_CONTENT_TYPE,
+    JSON_CONTENT_TYPE,
+    ROWS,
+    decode_request,
+    encode_response,
+)
+
+FEATURES = ["a", "b", "c"]
+# Requests send the columns in another order than the model
+REQUEST_COLUMNS = ["c", "a", "b"]
+LABELS = np.array(["x", "y", "z"], dtype=object)
+
+
+def _rows_to_matrix(rows):
+    return np.array([[row[name] for name in FEATURES] for row in rows], np.float32)
+
+
+def _float32_body(matrix, header):
+    header = json.dumps(header).encode()
+    return struct.pack("<I", len(header)) + header + matrix.astype("<f4").tobytes()
+
+
+def _arrow_body(matrix, columns):
+    pa = pytest.importorskip("pyarrow")
+    table = pa.table({name: matrix[:, i] for i, name in enumerate(columns)})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _request(request_format, matrix, columns=REQUEST_COLUMNS):
+    """
+    Encode a matrix whose columns are ``columns`` as a request body of one format.
+    """
+    if request_format == ROWS:
+        rows = [dict(zip(columns, map(float, row))) for row in matrix]
+        return json.dumps({"data": rows}), JSON_CONTENT_TYPE
+    if request_format == COLUMNAR:
+        body = {"columns": columns, "values": matrix.tolist()}
+        return json.dumps(body), JSON_CONTENT_TYPE
+    if request_format == ARROW:
+        return _arrow_body(matrix, columns), ARROW_CONTENT_TYPE
+    header = {"columns": columns, "shape": list(matrix.shape)}
+    return _float32_body(matrix, header), FLOAT32_CONTENT_TYPE
+
+
+def _decode_response(request_format, body):
+    """
+    Read the predicted labels and (n, k) probabilities back from a response.
+    """
+    if request_format == FLOAT32:
+        (length,) = struct.unpack_from("<I", body)
+        header = json.loads(body[4 : 4 + length])
+        rows, classes = header["shape"]
+        predicted = np.frombuffer(body, "<i4", count=rows, offset=4 + length)
+        probabilities = np.frombuffer(
+            body, "<f4", count=rows * classes, offset=4 + length + 4 * rows
+        ).reshape(rows, classes)
+        return [header["labels"][i] for i in predicted], probabilities
+    if request_format == ARROW:
+        import pyarrow as pa
+
+        table = pa.ipc.open_stream(pa.py_buffer(body)).read_all()
+        probabilities = np.column_stack(
+            [table.column(label).to_numpy() for label in LABELS]
+        )
+        return table.column("prediction").to_pylist(), probabilities
+    response = json.loads(body)
+    if request_format == COLUMNAR:
+        assert response["columns"] == LABELS.tolist()
+        return response["predictions"], np.array(response["values"])
+    probabilities = np.column_stack(
+        [response["probabilities"][label] for label in LABELS]
+    )
+    return response["predictions"], probabilities
+
+
+@pytest.fixture
+def matrix():
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(20, 3)).astype(np.float32)
+
+
+@pytest.mark.parametrize("request_format", [ROWS, COLUMNAR, ARROW, FLOAT32])
+def test_round_trip(request_format, matrix):
+    body, content_type = _request(request_format, matrix)
+    decoded_format, decoded = decode_request(
+        body, content_type, FEATURES, _rows_to_matrix
+    )
+    assert decoded_format == request_format
+    assert decoded.dtype == np.float32
+    # Request columns c, a, b are laid out in model order a, b, c
+    np.testing.assert_array_equal(decoded, matrix[:, [1, 2, 0]])
+
+    probabilities = np.abs(decoded) / np.abs(decoded).sum(axis=1, keepdims=True)
+    predicted = probabilities.argmax(axis=1)
+    response, response_type = encode_response(
+        decoded_format, probabilities, predicted, LABELS
+    )
+    assert response_type == content_type
+    labels, decoded_probabilities = _decode_response(request_format, response)
+    assert labels == LABELS.take(predicted).tolist()
+    np.testing.assert_allclose(decoded_probabilities, probabilities, rtol=1e-6)
+
+
+def test_float32_request_in_model_order_is_used_in_place(matrix):
+    body = _float32_body(matrix, {"shape": list(matrix.shape)})
+    _, decoded = decode_request(body, FLOAT32_CONTENT_TYPE, FEATURES, None)
+    assert not decoded.flags.owndata
+    np.testing.assert_array_equal(decoded, matrix)
+
+
+def test_columnar_nulls_become_nan():
+    body = json.dumps({"columns": FEATURES, "values": [[1.0, None, 3.0]]})
+    _, decoded = decode_request(body, JSON_CONTENT_TYPE, FEATURES, None)
+    np.testing.assert_array_equal(decoded, [[1.0, np.nan, 3.0]])
+
+
+@pytest.mark.parametrize("request_format", [COLUMNAR, ARROW, FLOAT32])
+def test_missing_features_are_an_error(request_format, matrix):
+    body, content_type = _request(request_format, matrix[:, :2], columns=["a", "b"])
+    with pytest.raises(ValueError, match=r"Missing features: \['c'\]"):
+        decode_request(body, content_type, FEATURES, _rows_to_matrix)
+
+
+@pytest.mark.parametrize("request_format", [COLUMNAR, ARROW, FLOAT32])
+def test_named_columns_need_model_feature_names(request_format, matrix):
+    body, content_type = _request(request_format, matrix)
+    with pytest.raises(ValueError, match="feature names"):
+        decode_request(body, content_type, None, _rows_to_matrix)
+
+
+def test_float32_columns_must_match_the_shape(matrix):
+    header = {"columns": ["a", "b"], "shape": list(matrix.shape)}
+    body = _float32_body(matrix, header)
+    with pytest.raises(ValueError, match="2 columns given for 3 values per row"):
+        decode_request(body, FLOAT32_CONTENT_TYPE, FEATURES, _rows_to_matrix)
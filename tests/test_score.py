@@ -0,0 +1,137 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+
+import score
+from score import _to_matrix, classify
+
+from helpers import BINARY_PARAMS, MULTICLASS_PARAMS, train_scoring_model
+
+FEATURES = [f"f{i}" for i in range(5)]
+
+
+@pytest.fixture(params=["multiclass", "binary"])
+def served_model(request, tmp_path, monkeypatch):
+    """
+    A native model served by score.init, with its booster, labels and training rows.
+    """
+    if request.param == "multiclass":
+        params, labels = MULTICLASS_PARAMS, ["x", "y", "z"]
+    else:
+        params, labels = BINARY_PARAMS, ["no", "yes"]
+    booster, frame = train_scoring_model(tmp_path / "outputs", params, labels)
+
+    monkeypatch.setenv("AZUREML_MODEL_DIR", str(tmp_path))
+    monkeypatch.setenv("SCORE_PREDICTOR", "native")
+    monkeypatch.delenv("MODEL_REGISTRY_DIR", raising=False)
+    score.init()
+    yield booster, labels, frame
+    score.registry.close()
+    score.registry = None
+
+
+def baseline_run(booster, labels, raw_data):
+    """
+    The row request path before vectorization: a DataFrame straight into predict.
+    """
+    try:
+        probabilities = booster.predict(pd.DataFrame(json.loads(raw_data)["data"]))
+        if probabilities.ndim > 1:
+            predicted_classes = np.argmax(probabilities, axis=1)
+            class_probabilities = {
+                labels[i]: probabilities[:, i].tolist() for i in range(len(labels))
+            }
+        else:
+            predicted_classes = (probabilities >= 0.5).astype(int)
+            class_probabilities = {
+                labels[0]: (1 - probabilities).tolist(),
+                labels[1]: probabilities.tolist(),
+            }
+        return json.dumps(
+            {
+                "predictions": [labels[idx] for idx in predicted_classes],
+                "probabilities": class_probabilities,
+            }
+        )
+    except Exception as e:
+        return json.dumps({"error": str(e)})
+
+
+def _assert_same_response(response, expected):
+    response, expected = json.loads(response), json.loads(expected)
+    assert response["predictions"] == expected["predictions"]
+    assert response["probabilities"].keys() == expected["probabilities"].keys()
+    for label, values in expected["probabilities"].items():
+        np.testing.assert_allclose(response["probabilities"][label], values, atol=1e-7)
+
+
+def test_row_response_matches_the_baseline(served_model):
+    booster, labels, frame = served_model
+    raw_data = json.dumps({"data": frame.head(50).to_dict("records")})
+    _assert_same_response(score.run(raw_data), baseline_run(booster, labels, raw_data))
+
+
+def test_null_values_are_predicted_as_missing(served_model):
+    booster, labels, frame = served_model
+    rows = frame.head(10).to_dict("records")
+    rows[3]["f1"] = None
+    rows[7] = dict.fromkeys(FEATURES)
+    raw_data = json.dumps({"data": rows})
+    _assert_same_response(score.run(raw_data), baseline_run(booster, labels, raw_data))
+
+
+def test_missing_feature_is_an_error(served_model):
+    booster, labels, frame = served_model
+    raw_data = json.dumps({"data": frame.drop(columns="f2").head(4).to_dict("records")})
+
+    assert json.loads(score.run(raw_data)) == {"error": "Missing features: ['f2']"}
+    assert "error" in json.loads(baseline_run(booster, labels, raw_data))
+
+
+def test_feature_missing_from_one_row_is_an_error(served_model):
+    _, _, frame = served_model
+    rows = frame.head(4).to_dict("records")
+    del rows[2]["f2"]
+    response = json.loads(score.run(json.dumps({"data": rows})))
+    assert response == {"error": "Missing features: ['f2']"}
+
+
+def test_missing_feature_next_to_nulls_is_an_error():
+    rows = [{"a": None, "b": 1.0}, {"a": 2.0}]
+    with pytest.raises(ValueError, match=r"Missing features: \['b'\]"):
+        _to_matrix(rows, ["a", "b"])
+
+
+def test_rows_become_a_float32_matrix_in_feature_order():
+    # Features are matched by name, whatever the key order of a row
+    rows = [{"b": 2, "a": 1.5}, {"a": -1, "b": 0.25}]
+    matrix = _to_matrix(rows, ["a", "b"])
+    assert matrix.dtype == np.float32 and matrix.flags.c_contiguous
+    np.testing.assert_array_equal(matrix, [[1.5, 2.0], [-1.0, 0.25]])
+    # A single feature goes through itemgetter without the chain
+    np.testing.assert_array_equal(_to_matrix(rows, ["b"]), [[2.0], [0.25]])
+
+
+def test_classify_expands_binary_scores():
+    probabilities, predicted = classify(np.array([0.2, 0.5, 0.9]))
+    np.testing.assert_allclose(probabilities, [[0.8, 0.2], [0.5, 0.5], [0.1, 0.9]])
+    np.testing.assert_array_equal(predicted, [0, 1, 1])
+    label_array = np.array(["no", "yes"], dtype=object)
+    assert label_array.take(predicted).tolist() == ["no", "yes", "yes"]
+
+
+def test_classify_picks_the_most_likely_class():
+    scores = np.array([[0.1, 0.7, 0.2], [0.5, 0.2, 0.3]])
+    probabilities, predicted = classify(scores)
+    assert probabilities is scores
+    np.testing.assert_array_equal(predicted, [1, 0])
+
+
+def test_warmup_is_not_counted_in_the_cache_metrics(served_model):
+    _, _, frame = served_model
+    assert score.cache_metrics()["misses"] == 0
+
+    score.run(json.dumps({"data": frame.head(3).to_dict("records")}))
+    metrics = score.cache_metrics()
+    assert (metrics["hits"], metrics["misses"]) == (0, 3)
@@ -0,0 +1,127 @@
+import json
+import asyncio
+import threading
+import pytest
+
+import score
+from serve import ScoringServer
+
+from helpers import train_scoring_model
+
+
+@pytest.fixture
+def model_dir(tmp_path, monkeypatch):
+    _, frame = train_scoring_model(tmp_path / "outputs")
+    monkeypatch.setenv("AZUREML_MODEL_DIR", str(tmp_path))
+    monkeypatch.setenv("SCORE_PREDICTOR", "native")
+    monkeypatch.delenv("MODEL_REGISTRY_DIR", raising=False)
+    yield json.dumps({"data": frame.head(3).to_dict("records")})
+    if score.registry is not None:
+        score.registry.close()
+        score.registry = None
+
+
+async def _request(port, method, path, body=b""):
+    """
+    Send one HTTP request and return the status, headers and JSON body.
+    """
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = body.encode() if isinstance(body, str) else body
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+        "Connection: close\r\n\r\n".encode() + body
+    )
+    response = await reader.read()
+    writer.close()
+    head, _, payload = response.partition(b"\r\n\r\n")
+    status_line, *header_lines = head.decode().split("\r\n")
+    headers = dict(line.split(": ", 1) for line in header_lines)
+    return int(status_line.split()[1]), headers, json.loads(payload)
+
+
+def _serve(test, **kwargs):
+    """
+    Run ``test(server, port)`` against a started server on a free port.
+    """
+
+    async def run():
+        server = ScoringServer(port=0, **kwargs)
+        try:
+            await server.start()
+            port = server._server.sockets[0].getsockname()[1]
+            return await test(server, port)
+        finally:
+            await server.stop()
+
+    return asyncio.run(run())
+
+
+def test_health_and_ready_before_the_model_is_loaded():
+    async def test():
+        server = ScoringServer()
+        health = await server._dispatch("GET", "/health", {}, b"")
+        ready = await server._dispatch("GET", "/ready", {}, b"")
+        scored = await server._dispatch("POST", "/score", {}, b"{}")
+        return health, ready, scored
+
+    health, ready, scored = asyncio.run(test())
+    assert health.startswith(b"HTTP/1.1 200")
+    assert ready.startswith(b"HTTP/1.1 503") and b'"loading"' in ready
+    assert scored.startswith(b"HTTP/1.1 503") and b"Retry-After: 1" in scored
+
+
+def test_ready_server_scores_requests(model_dir):
+    async def test(server, port):
+        return (
+            await _request(port, "GET", "/ready"),
+            await _request(port, "POST", "/score", model_dir),
+            await _request(port, "POST", "/score", '{"data": [{"f0": 1.0}]}'),
+            await _request(port, "GET", "/metrics"),
+        )
+
+    ready, scored, bad, metrics = _serve(test)
+    assert ready[0] == 200 and ready[2] == {"status": "ready"}
+    assert scored[0] == 200 and len(scored[2]["predictions"]) == 3
+    assert scored[1]["x-model-version"] == "default"
+    assert bad[0] == 400 and "Missing features" in bad[2]["error"]
+    assert metrics[2]["requests"] == 2 and metrics[2]["errors"] == 1
+
+
+def test_requests_beyond_max_pending_are_shed(model_dir, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+    score_request = score.score_request
+
+    def slow_score_request(*args):
+        started.set()
+        release.wait(10)
+        return score_request(*args)
+
+    monkeypatch.setattr(score, "score_request", slow_score_request)
+
+    async def test(server, port):
+        first = asyncio.ensure_future(_request(port, "POST", "/score", model_dir))
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, started.wait, 10)
+        shed = await _request(port, "POST", "/score", model_dir)
+        release.set()
+        return await first, shed, server.metrics()
+
+    first, shed, metrics = _serve(test, max_pending=1)
+    assert first[0] == 200
+    assert shed[0] == 503 and shed[1]["Retry-After"] == "1"
+    assert shed[2] == {"error": "Overloaded"}
+    assert (metrics["requests"], metrics["shed"], metrics["pending"]) == (2, 1, 0)
+
+
+def test_process_pool_workers_all_load_the_model(model_dir):
+    async def test(server, port):
+        return await _request(port, "POST", "/score", model_dir)
+
+    status, _, response = _serve(test, pool="process", workers=2)
+    assert status == 200 and len(response["predictions"]) == 3
+
+
+def test_process_pool_startup_fails_when_a_worker_cannot_load(model_dir, tmp_path):
+    (tmp_path / "outputs" / "model.txt").unlink()
+    with pytest.raises(RuntimeError, match="predict worker failed to start"):
+        _serve(lambda server, port: None, pool="process", workers=2)
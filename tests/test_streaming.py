@@ -0,0 +1,62 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+
+from classification.streaming import StreamingDataSplitter, iter_csv_batches
+
+from helpers import make_classification
+
+
+def _write_csv(path, with_region=False):
+    matrix, labels = make_classification(rows=500)
+    frame = pd.DataFrame(matrix, columns=[f"f{i}" for i in range(matrix.shape[1])])
+    if with_region:
+        frame["region"] = np.array(["east", "west"])[np.arange(500) % 2]
+    frame["Class"] = np.array(["x", "y", "z"])[labels]
+    frame.to_csv(path, index=False)
+    return frame
+
+
+def test_streamed_split_keeps_every_row(tmp_path):
+    frame = _write_csv(tmp_path / "input.csv")
+    splitter = StreamingDataSplitter(chunk_size=64, work_dir=str(tmp_path / "work"))
+    train_data, valid_data, unique_labels = splitter.split(str(tmp_path / "input.csv"))
+    train_data.construct()
+    valid_data.construct()
+
+    assert train_data.num_data() + valid_data.num_data() == len(frame)
+    assert sorted(unique_labels) == ["x", "y", "z"]
+    batches = list(splitter.iter_valid_batches())
+    assert sum(len(labels) for _, labels in batches) == valid_data.num_data()
+    assert all(len(labels) <= 64 for _, labels in batches)
+
+    splitter.cleanup()
+    assert not os.path.exists(tmp_path / "work")
+
+
+def test_string_feature_fails_with_a_clear_error(tmp_path):
+    _write_csv(tmp_path / "input.csv", with_region=True)
+    splitter = StreamingDataSplitter(chunk_size=64, work_dir=str(tmp_path / "work"))
+    with pytest.raises(ValueError, match=r"--stream needs numeric features.*region"):
+        splitter.split(str(tmp_path / "input.csv"))
+
+
+def test_csv_batches_reject_string_features(tmp_path):
+    _write_csv(tmp_path / "input.csv", with_region=True)
+    with pytest.raises(ValueError, match="region"):
+        next(iter_csv_batches(str(tmp_path / "input.csv"), "Class", ["x", "y", "z"]))
+
+
+def test_csv_batches_code_labels_in_model_order(tmp_path):
+    frame = _write_csv(tmp_path / "input.csv")
+    unique_labels = ["z", "x", "y"]
+    batches = list(
+        iter_csv_batches(
+            str(tmp_path / "input.csv"), "Class", unique_labels, chunk_size=200
+        )
+    )
+    codes = np.concatenate([labels for _, labels in batches])
+    np.testing.assert_array_equal(
+        np.array(unique_labels)[codes], frame["Class"].to_numpy()
+    )
@@ -0,0 +1,103 @@
+import os
+import lightgbm
+import numpy as np
+import pandas as pd
+import pytest
+
+import tree_predictor
+from tree_predictor import ARRAY_NAMES, TreeEnsemblePredictor
+from classification import export
+from classification.export import ModelExporter
+
+from helpers import BINARY_PARAMS, MULTICLASS_PARAMS
+
+
+def _train(params, data, rounds=40, **dataset_kwargs):
+    matrix, labels = data
+    return lightgbm.train(
+        params, lightgbm.Dataset(matrix, label=labels, **dataset_kwargs), rounds
+    )
+
+
+def _edge_rows(matrix):
+    # Rows with NaN, exact zeros and values beyond every threshold
+    rows = matrix[:50].copy()
+    rows[::3, 0] = np.nan
+    rows[1::3, 1] = 0.0
+    rows[2::5] = 1e6
+    return rows
+
+
+@pytest.mark.parametrize(
+    "params, fixture",
+    [(MULTICLASS_PARAMS, "multiclass_data"), (BINARY_PARAMS, "binary_data")],
+)
+def test_compiled_predictions_match_the_booster(params, fixture, request):
+    data = request.getfixturevalue(fixture)
+    model = _train(params, data)
+    compiled = ModelExporter.flatten(model)
+    predictor = TreeEnsemblePredictor(compiled["arrays"], compiled["meta"])
+
+    rows = np.vstack([data[0], _edge_rows(data[0])])
+    np.testing.assert_allclose(predictor.predict(rows), model.predict(rows), atol=1e-9)
+
+
+def test_zero_as_missing_matches_the_booster(multiclass_data):
+    matrix, labels = multiclass_data
+    matrix = matrix.copy()
+    matrix[::4, 2] = 0.0
+    params = dict(MULTICLASS_PARAMS, zero_as_missing=True)
+    model = _train(params, (matrix, labels))
+    compiled = ModelExporter.flatten(model)
+    predictor = TreeEnsemblePredictor(compiled["arrays"], compiled["meta"])
+
+    rows = _edge_rows(matrix)
+    np.testing.assert_allclose(predictor.predict(rows), model.predict(rows), atol=1e-9)
+
+
+def test_export_round_trip_with_memory_maps(multiclass_data, tmp_path):
+    model = _train(MULTICLASS_PARAMS, multiclass_data)
+    output_dir = str(tmp_path / "compiled_model")
+    ModelExporter(predictor=TreeEnsemblePredictor).export(
+        model, output_dir, sample=multiclass_data[0][:100]
+    )
+
+    assert sorted(os.listdir(output_dir)) == sorted(
+        [f"{name}.npy" for name in ARRAY_NAMES] + ["meta.json"]
+    )
+    loaded = TreeEnsemblePredictor.load(output_dir, mmap=True)
+    rows = multiclass_data[0][:100]
+    np.testing.assert_allclose(loaded.predict(rows), model.predict(rows), atol=1e-9)
+    assert loaded.feature_name() == model.feature_name()
+
+
+def test_export_rejects_a_predictor_that_disagrees(multiclass_data, tmp_path):
+    class OffByOne(TreeEnsemblePredictor):
+        def predict(self, data):
+            return super().predict(data) + 1
+
+    model = _train(MULTICLASS_PARAMS, multiclass_data)
+    output_dir = str(tmp_path / "compiled_model")
+    with pytest.raises(ValueError):
+        ModelExporter(predictor=OffByOne).export(
+            model, output_dir, sample=multiclass_data[0][:20]
+        )
+    assert not os.path.exists(output_dir)
+
+
+def test_categorical_splits_are_not_compiled(multiclass_data):
+    matrix, labels = multiclass_data
+    frame = pd.DataFrame(matrix[:, :2], columns=["x0", "x1"])
+    frame["group"] = pd.Categorical(np.where(labels == 0, "p", "q"))
+    model = _train(MULTICLASS_PARAMS, (frame, labels))
+    with pytest.raises(ValueError, match="categorical"):
+        ModelExporter.flatten(model)
+
+
+def test_exporter_and_predictor_agree_on_missing_codes():
+    # The exporter ships without the deployment code, so the codes are duplicated
+    assert (export.MISSING_NONE, export.MISSING_ZERO, export.MISSING_NAN) == (
+        tree_predictor.MISSING_NONE,
+        tree_predictor.MISSING_ZERO,
+        tree_predictor.MISSING_NAN,
+    )
@@ -0,0 +1,86 @@
+import os
+import argparse
+import yaml
+import logging
+import mlflow
+from classification.classifier import DataSplitter
+from classification.loader import TypedCSVLoader
+from classification.tuning import HyperparameterSearch, SearchSpace
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+
+def main():
+    parser = argparse.ArgumentParser("tune")
+    parser.add_argument(
+        "--input_data",
+        type=str,
+        default="data/Date_Fruit_Datasets.csv",
+        help="Input data path",
+    )
+    parser.add_argument(
+        "--parameters_file",
+        type=str,
+        default="yml_files/algo_parms.yaml",
+        help="YAML file with the training parameters and the search block",
+    )
+    parser.add_argument(
+        "--output_dir", type=str, default="results", help="Directory to save outputs"
+    )
+    parser.add_argument(
+        "--label_column", type=str, default="Class", help="Name of the label column"
+    )
+    parser.add_argument(
+        "--strategy",
+        type=str,
+        default=None,
+        choices=HyperparameterSearch.STRATEGIES,
+        help="Overrides the strategy of the search block",
+    )
+    parser.add_argument(
+        "--n_trials", type=int, default=None, help="Overrides the number of trials"
+    )
+    parser.add_argument(
+        "--n_workers", type=int, default=None, help="Number of parallel trials"
+    )
+    args, _ = parser.parse_known_args()
+
+    with open(args.parameters_file, errors="ignore") as f:
+        config = yaml.safe_load(f)
+    parameters = config["training"]
+    search = dict(config.get("search", {}))
+    space = SearchSpace(search.pop("space"))
+    if args.strategy:
+        search["strategy"] = args.strategy
+    if args.n_trials:
+        search["n_trials"] = args.n_trials
+
+    df = TypedCSVLoader(label_column=args.label_column).load(args.input_data)
+    data = DataSplitter(label_column=args.label_column, parameters=parameters).split(df)
+
+    with mlflow.start_run(run_name="hyperparameter_search"):
+        mlflow.log_params({f"search_{k}": v for k, v in search.items()})
+        tuner = HyperparameterSearch(
+            parameters, space, n_workers=args.n_workers, **search
+        )
+        result = tuner.run(data)
+
+        best_file = tuner.save_best(
+            result, os.path.join(args.output_dir, "best_params.yaml")
+        )
+        mlflow.log_artifact(best_file)
+        mlflow.log_metrics(
+            {
+                f"best_{tuner.metric}": result["score"],
+                "best_iteration": result["best_iteration"],
+                "num_trials": len(result["trials"]),
+            }
+        )
+        logging.info(f"Best parameters written to {best_file}: {result['params']}")
+
+
+if __name__ == "__main__":
+    main()